@@ -1,34 +1,64 @@
 import argparse
 import asyncio
-from ingestion.sync_ingestor import SyncIngestor
-from ingestion.async_ingestor import AsyncIngestor
-from processing.processor import DataProcessor
 from configs.config import API_URLS
-from utils.logger import get_logger
+from utils.logger import get_logger, setup_logging
 
 logger = get_logger(__name__)
 
 
+def process_datasets(urls, data):
+    """Validate each URL's payload with the schema of its resource (posts, comments, albums)."""
+    from processing.processor import DataProcessor
+    from processing.schemas import schema_for_url
+
+    total = 0
+    for url, payload in zip(urls, data):
+        schema = schema_for_url(url)
+        processed = DataProcessor(table_name=schema.name, schema=schema).process(payload)
+        logger.info(f"{schema.name}: {len(processed)} records processed.")
+        total += len(processed)
+    logger.info(f"Processing complete. {total} records across {len(data)} datasets processed.")
+
+
 def run_sync_pipeline():
+    # Imported per mode: a sync run never loads aiohttp
+    from ingestion.sync_ingestor import SyncIngestor
+
     logger.info("Running Sync Ingestion Pipeline")
-    ingestor = SyncIngestor(API_URLS)
-    data = ingestor.ingest_all()
+    with SyncIngestor(max_workers=len(API_URLS)) as ingestor:
+        data = ingestor.ingest_all(API_URLS)  # in API_URLS order
     logger.info(f"Sync ingestion complete. {len(data)} datasets retrieved.")
-
-    processor = DataProcessor()
-    processed = processor.process(data)
-    logger.info(f"Processing complete. {len(processed)} datasets processed.")
+    process_datasets(API_URLS, data)
 
 
 async def run_async_pipeline():
+    from ingestion.async_ingestor import AsyncIngestor
+
     logger.info("Running Async Ingestion Pipeline")
-    ingestor = AsyncIngestor(API_URLS)
-    data = await ingestor.ingest_all()
+    # One ingestor per URL: run() returns completion order, and each payload needs its schema
+    results = await asyncio.gather(*(AsyncIngestor([url]).run() for url in API_URLS))
+    data = [payloads[0] if payloads else None for payloads in results]
     logger.info(f"Async ingestion complete. {len(data)} datasets retrieved.")
+    process_datasets(API_URLS, data)
 
-    processor = DataProcessor()
-    processed = processor.process(data)
-    logger.info(f"Processing complete. {len(processed)} datasets processed.")
+
+def run_profiled(mode: str):
+    from orchestrator.orchestrator import PROFILE_DIR
+    from utils.profiling import Profiler
+
+    profiler = Profiler(PROFILE_DIR)
+    try:
+        with profiler.pipeline(f"main_{mode}") as prof:
+            if mode == "sync":
+                run_sync_pipeline()
+            else:
+                async def _run():
+                    async with prof.loop_lag():
+                        await run_async_pipeline()
+
+                asyncio.run(_run())
+    finally:
+        profiler.write_summary()  # a failing run is the one worth profiling
 
 
 if __name__ == "__main__":
@@ -41,9 +71,17 @@ if __name__ == "__main__":
         default="sync",
         help="Choose ingestion mode",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write cProfile, tracemalloc (and event-loop lag) artifacts to docs/profiles/",
+    )
     args = parser.parse_args()
+    setup_logging()
 
-    if args.mode == "sync":
+    if args.profile:
+        run_profiled(args.mode)
+    elif args.mode == "sync":
         run_sync_pipeline()
     else:
         asyncio.run(run_async_pipeline())
@@ -0,0 +1,253 @@
+"""
+Sharded ingestion: one async pipeline's id_range split across worker processes.
+
+A single event loop becomes CPU-bound (JSON decoding, validation) on large id
+ranges. Here the range is cut into shard_size pieces that a ProcessPoolExecutor
+hands to `workers` processes. Each process keeps its own event loop, asyncpg
+pool, circuit breaker and retry budget for all the shards it runs. The parent
+sums the per-shard results into one IngestionEvent.
+
+    python -m app.multi_ingest --pipeline posts_async --workers 4 --shard-size 5000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from orchestrator.checkpoints import ChunkStatus, id_chunks as shard_ranges, pending_chunks
+from utils.logger import get_logger, setup_logging
+
+if TYPE_CHECKING:
+    from db.async_postgres import AsyncPostgresDB
+    from orchestrator.event_store import IngestionEvent
+    from retry_decorator.resilience import CircuitBreaker, RetryBudget
+
+logger = get_logger(__name__)
+
+
+@dataclass(slots=True)
+class ShardResult:
+    start: int
+    end: int
+    records: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    failed_fetches: int = 0
+    seconds: float = 0.0
+    worker: int = 0  # pid
+    error: Optional[str] = None
+
+
+# ---------- worker process ----------
+
+# Per worker process, created by _init_worker and reused by every shard it runs
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_async_db: Optional[AsyncPostgresDB] = None
+_breaker: Optional[CircuitBreaker] = None
+_budget: Optional[RetryBudget] = None
+
+
+def _init_worker(resilience: Dict[str, Any]) -> None:
+    global _loop, _async_db, _breaker, _budget
+    from multiprocessing.util import Finalize
+
+    from db.async_postgres import AsyncPostgresDB
+    from retry_decorator.resilience import CircuitBreaker, RetryBudget
+
+    setup_logging(queued=False)  # a listener thread per worker buys nothing here
+    _loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_loop)
+    # The pool is bound to this loop, which is why the loop outlives each shard
+    _async_db = AsyncPostgresDB(min_size=1, max_size=2)  # stream_to_db has a single writer
+    _breaker = CircuitBreaker(
+        failure_threshold=resilience.get("failure_threshold", 5),
+        reset_timeout=resilience.get("reset_timeout", 30.0),
+    )
+    budget_cfg = resilience.get("retry_budget") or {}
+    _budget = RetryBudget(
+        capacity=budget_cfg.get("capacity", 100),
+        refill_per_s=budget_cfg.get("refill_per_s", 10.0),
+    )
+    # Runs when the pool shuts the worker down (atexit does not, workers leave via os._exit)
+    Finalize(None, _close_worker, exitpriority=10)
+
+
+def _close_worker() -> None:
+    if _loop is not None and not _loop.is_closed():
+        _loop.run_until_complete(_async_db.close())
+        _loop.close()
+
+
+def _run_shard(pipeline: Dict[str, Any], start: int, end: int, workers: int) -> ShardResult:
+    """Entry point in the worker process: ingest ids start..end of `pipeline`."""
+    result = ShardResult(start=start, end=end, worker=os.getpid())
+    began = time.perf_counter()
+    try:
+        count, stats, failed = _loop.run_until_complete(_ingest_shard(pipeline, start, end, workers))
+        result.records, result.failed_fetches = count, failed
+        result.inserted, result.updated, result.unchanged = stats.inserted, stats.updated, stats.unchanged
+    except Exception as e:
+        logger.exception("[%s] shard %s-%s failed.", pipeline["name"], start, end)
+        result.error = f"{type(e).__name__}: {e}"
+    result.seconds = time.perf_counter() - began
+    return result
+
+
+async def _ingest_shard(pipeline: Dict[str, Any], start: int, end: int, workers: int):
+    from ingestion.async_ingestor import AsyncIngestor
+    from ingestion.rate_limit import RateLimiter
+    from orchestrator.orchestrator import PipelineConfig, pipeline_schema, requests_for
+    from orchestrator.streaming import stream_to_db
+    from processing.processor import DataProcessor
+    from utils import metrics
+
+    p = PipelineConfig(**pipeline)
+    metrics.current_pipeline.set(p.name)
+    limiter = None
+    if p.rate_limit:
+        settings = dict(p.rate_limit)
+        if settings.get("rate"):
+            # Every worker has its own bucket: split the rate so the host sees the configured total
+            settings["rate"] = settings["rate"] / workers
+        limiter = RateLimiter(**settings)
+
+    processor = DataProcessor(
+        table_name=p.table, batch_size=p.batch_size, write_mode=p.write_mode,
+        async_db=_async_db, incremental=p.incremental,
+        parallel_threshold=None,  # already one process per core; no nested pool
+        columnar=p.columnar, schema=pipeline_schema(p),
+    )
+    ing = AsyncIngestor(
+        requests_for(p, (start, end)), concurrency=p.concurrency, connector=p.connector,
+        breaker=_breaker, budget=_budget, limiter=limiter,
+        decoder=p.decoder, offload_decode_bytes=p.decode_offload_bytes,
+    )
+    count, stats, stream = await stream_to_db(ing.stream(), processor, p.batch_size, p.queue_depth)
+    return count, stats, stream.failed_fetches
+
+
+# ---------- parent process ----------
+
+def shard_status(result: ShardResult) -> ChunkStatus:
+    """Checkpoint status of a finished shard (only DONE shards are skipped on resume)."""
+    if result.error:
+        return "FAILED"
+    return "INCOMPLETE" if result.failed_fetches else "DONE"
+
+
+def summarise(pipeline: str, started_at: datetime, results: List[ShardResult], workers: int,
+              skipped: int = 0) -> IngestionEvent:
+    """One IngestionEvent for the whole run; FAILED if any shard failed."""
+    from orchestrator.event_store import IngestionEvent
+
+    failed = [r for r in results if r.error]
+    seconds = sorted(r.seconds for r in results)
+    return IngestionEvent(
+        pipeline=pipeline,
+        status="FAILED" if failed else "SUCCESS",
+        detail="; ".join(f"ids {r.start}-{r.end}: {r.error}" for r in failed) or None,
+        started_at=started_at, finished_at=datetime.utcnow(),
+        records=sum(r.records for r in results),
+        inserted=sum(r.inserted for r in results),
+        updated=sum(r.updated for r in results),
+        unchanged=sum(r.unchanged for r in results),
+        stats={
+            "sharded": {
+                "workers": workers,
+                "shards": len(results),
+                "skipped_shards": skipped,
+                "failed_shards": len(failed),
+                "incomplete_shards": sum(shard_status(r) == "INCOMPLETE" for r in results),
+                "worker_pids": len({r.worker for r in results}),
+                "shard_seconds_max": round(seconds[-1], 3) if seconds else 0.0,
+                "shard_seconds_total": round(sum(seconds), 3),
+            }
+        },
+    )
+
+
+def run_sharded(cfg_path: str, pipeline_name: Optional[str], workers: int, shard_size: int,
+                resume: bool = False) -> str:
+    """
+    Run one async pipeline sharded across `workers` processes; returns SUCCESS | FAILED.
+    Every shard is checkpointed; with resume, shards a previous run finished are skipped.
+    """
+    from db.postgres import PostgresDB
+    from orchestrator.checkpoints import CheckpointStore
+    from orchestrator.event_store import EventStore, IngestionEvent
+    from orchestrator.orchestrator import load_config, parse_pipelines
+
+    cfg = load_config(cfg_path)
+    candidates = [p for p in parse_pipelines(cfg) if p.mode == "async"]
+    if pipeline_name:
+        candidates = [p for p in candidates if p.name == pipeline_name]
+    if not candidates:
+        raise SystemExit(f"No async pipeline named {pipeline_name!r} in {cfg_path}" if pipeline_name
+                         else f"No async pipeline in {cfg_path}")
+    p = candidates[0]
+    if not (p.url_pattern and p.id_range):
+        raise SystemExit(f"{p.name}: sharding needs url_pattern and id_range")
+
+    db = PostgresDB()
+    store = EventStore(db=db)
+    store.ensure_table()
+    checkpoints = CheckpointStore(db=db)
+    checkpoints.ensure_table()
+
+    all_shards = shard_ranges(p.id_range["start"], p.id_range["end"], shard_size)
+    if resume:
+        shards = pending_chunks(all_shards, checkpoints.done_ranges(p.name))
+    else:
+        checkpoints.clear(p.name)
+        shards = all_shards
+    workers = max(1, min(workers, len(shards)))
+    started = datetime.utcnow()
+    store.log(IngestionEvent(pipeline=p.name, status="RUNNING", started_at=started))
+    logger.info("[%s] %s of %s shard(s) of %s id(s) across %s worker process(es)",
+                p.name, len(shards), len(all_shards), shard_size, workers)
+
+    results: List[ShardResult] = []
+    resilience = dict(cfg.get("resilience") or {})
+    pipeline = asdict(p)
+    # spawn: forking a process that holds connections and a logging thread is unsafe
+    with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker, initargs=(resilience,),
+    ) as pool:
+        futures = [pool.submit(_run_shard, pipeline, lo, hi, workers) for lo, hi in shards]
+        for done in as_completed(futures):
+            r = done.result()
+            results.append(r)
+            checkpoints.mark(p.name, (r.start, r.end), shard_status(r), r.records)
+            logger.info("[%s] shard %s-%s: %s record(s) in %.2fs%s", p.name, r.start, r.end, r.records,
+                        r.seconds, f" FAILED ({r.error})" if r.error else "")
+
+    event = summarise(p.name, started, results, workers, skipped=len(all_shards) - len(shards))
+    store.log(event)
+    db.close()
+    return event.status
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sharded multi-process ingestion of one async pipeline")
+    parser.add_argument("--config", default="configs/pipelines.yaml", help="Path to YAML config")
+    parser.add_argument("--pipeline", help="Async pipeline to run (default: the first one in the config)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--shard-size", type=int, default=5_000, help="Ids per shard")
+    parser.add_argument("--resume", action="store_true", help="Skip shards a previous run checkpointed as DONE")
+    args = parser.parse_args()
+    setup_logging()
+    status = run_sharded(args.config, args.pipeline, args.workers, args.shard_size, resume=args.resume)
+    raise SystemExit(0 if status == "SUCCESS" else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+JSON decoding and compressed-transfer benchmark.
+
+Two parts:
+  - decoders:  every installed decoder (ingestion.codecs) on jsonplaceholder-shaped
+               bodies of increasing size, in MB/s
+  - pipelines: each enabled pipeline in the config, re-pointed at a local mock
+               of jsonplaceholder, fetched with its own ingestor per
+               (decoder, encoding): wall time, time spent decoding, bytes on the
+               wire and decoded bytes
+
+    python -m benchmarks.bench_decode --payload-size 1024 --ids 200 --output decode.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import dataclasses
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Sequence
+
+from benchmarks.mock_api import MockAPI, make_post
+from ingestion.codecs import ACCEPT_ENCODING, available_decoders
+from utils import metrics
+
+ENCODINGS = ("identity", "gzip")
+
+
+# ---------- decoders ----------
+
+def bench_decoders(sizes: Sequence[int], payload_size: int, min_seconds: float) -> Dict[str, Any]:
+    """MB/s per installed decoder for bodies holding 1, 100, ... posts."""
+    results: Dict[str, Any] = {}
+    for n in sizes:
+        body = json.dumps([make_post(i, payload_size) for i in range(1, n + 1)]).encode("utf-8")
+        row: Dict[str, Any] = {"body_bytes": len(body)}
+        for name, decode in available_decoders().items():
+            loops, began = 0, time.perf_counter()
+            while True:
+                decode(body)
+                loops += 1
+                elapsed = time.perf_counter() - began
+                if elapsed >= min_seconds:
+                    break
+            row[name] = {
+                "us_per_decode": round(elapsed / loops * 1e6, 1),
+                "mb_per_s": round(len(body) * loops / elapsed / 1e6, 1),
+            }
+        results[f"{n}_posts"] = row
+    return results
+
+
+# ---------- pipelines ----------
+
+class _DecodeTimer:
+    """Wraps an ingestor's decode function and sums the time spent in it (from any thread)."""
+
+    def __init__(self, decode: Callable[[bytes], Any]) -> None:
+        self._decode = decode
+        self._lock = threading.Lock()
+        self.seconds = 0.0
+        self.calls = 0
+
+    def __call__(self, body: bytes) -> Any:
+        began = time.perf_counter()
+        try:
+            return self._decode(body)
+        finally:
+            with self._lock:
+                self.seconds += time.perf_counter() - began
+                self.calls += 1
+
+
+def _fetch_pipeline(p: Any, decoder: str, opts: Dict[str, Any]) -> _DecodeTimer:
+    from orchestrator.orchestrator import _sync_requests, requests_for
+
+    if p.mode == "sync":
+        from ingestion.sync_ingestor import SyncIngestor
+        with SyncIngestor(decoder=decoder, pool_size=p.concurrency, max_workers=p.concurrency) as ing:
+            ing.decode = timer = _DecodeTimer(ing.decode)
+            urls = _sync_requests(p)
+            if len(urls) == 1 and isinstance(urls[0], str):
+                ing.fetch(urls[0])
+            else:
+                ing.ingest_all(urls)
+        return timer
+
+    from ingestion.async_ingestor import AsyncIngestor
+    ing = AsyncIngestor(
+        requests_for(p, (p.id_range["start"], p.id_range["end"])), concurrency=p.concurrency,
+        connector=p.connector, decoder=decoder, offload_decode_bytes=opts["offload_bytes"],
+    )
+    ing.decode = timer = _DecodeTimer(ing.decode)
+    asyncio.run(ing.run())
+    return timer
+
+
+def bench_pipelines(cfg_path: str, api: MockAPI, opts: Dict[str, Any]) -> Dict[str, Any]:
+    from orchestrator.orchestrator import load_config, parse_pipelines
+
+    host = api.base_url
+    results: Dict[str, Any] = {}
+    for p in parse_pipelines(load_config(cfg_path)):
+        if not p.enabled:
+            continue
+        # Same request shape, against the mock; no rate limit so the numbers are about decoding
+        changes: Dict[str, Any] = {"base_url": host, "rate_limit": None}
+        if p.id_range:
+            changes["id_range"] = {"start": 1, "end": opts["ids"]}
+        p = dataclasses.replace(p, **changes)
+        row: Dict[str, Any] = {}
+        _fetch_pipeline(p, "json", opts)  # warm-up: imports, first connections
+        for decoder in available_decoders():
+            for encoding in ENCODINGS:
+                api.compress = encoding == "gzip"
+                wire = metrics.TRANSFERRED_BYTES.value(host=host)
+                decoded = metrics.FETCHED_BYTES.value(host=host)
+                requests_before = api.requests
+                began = time.perf_counter()
+                timer = _fetch_pipeline(p, decoder, opts)
+                row[f"{decoder}/{encoding}"] = {
+                    "seconds": round(time.perf_counter() - began, 4),
+                    "decode_ms": round(timer.seconds * 1e3, 2),
+                    "decodes": timer.calls,
+                    "requests": api.requests - requests_before,
+                    "wire_bytes": int(metrics.TRANSFERRED_BYTES.value(host=host) - wire),
+                    "decoded_bytes": int(metrics.FETCHED_BYTES.value(host=host) - decoded),
+                }
+        results[p.name] = row
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark JSON decoders and compressed transfer")
+    parser.add_argument("--config", default="configs/pipelines.yaml", help="pipelines to replay")
+    parser.add_argument("--payload-size", type=int, default=512, help="post body size, bytes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 1000, 10_000],
+                        help="posts per body in the decoder benchmark")
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="time per decoder per size")
+    parser.add_argument("--ids", type=int, default=200, help="id_range end for async pipelines")
+    parser.add_argument("--list-size", type=int, default=100, help="posts returned by GET /posts")
+    parser.add_argument("--offload-bytes", type=int, default=262_144,
+                        help="async: decode bodies this large in a worker thread")
+    parser.add_argument("--compress-level", type=int, default=6, help="mock server gzip level")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--verbose", action="store_true", help="keep ingestor logging on")
+    args = parser.parse_args()
+    if not args.verbose:
+        logging.disable(logging.INFO)
+
+    report: Dict[str, Any] = {
+        "params": {
+            "payload_size": args.payload_size, "ids": args.ids, "list_size": args.list_size,
+            "offload_bytes": args.offload_bytes, "compress_level": args.compress_level,
+            "accept_encoding": ACCEPT_ENCODING,
+        },
+        "decoders": bench_decoders(args.sizes, args.payload_size, args.min_seconds),
+    }
+    with MockAPI(payload_size=args.payload_size, list_size=args.list_size,
+                 compress_level=args.compress_level) as api:
+        report["pipelines"] = bench_pipelines(args.config, api, vars(args))
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+End-to-end ingestion benchmark against a local mock of jsonplaceholder.
+
+Scenarios (each in a fresh process, so peak RSS is per scenario):
+  - sync:      SyncIngestor.fetch, one URL after another
+  - threaded:  SyncIngestor.fetch across a ThreadPoolExecutor
+  - process:   URL shards across a ProcessPoolExecutor, sync fetches in each worker
+  - async:     AsyncIngestor.stream with bounded concurrency
+  - save_upsert / save_copy: GET /posts -> DataProcessor.process -> save_to_db,
+    per write_mode (needs --db, a reachable Postgres with PostgresDB's settings)
+
+Reports throughput, p50/p95/p99 latency and peak RSS as JSON. With --baseline
+the run is compared against a saved report and exits 1 on regressions.
+
+    python -m benchmarks.bench_ingest --requests 500 --latency 0.02 --output bench.json
+    python -m benchmarks.bench_ingest --requests 500 --latency 0.02 --baseline bench.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from benchmarks.mock_api import MockAPI
+from ingestion.async_ingestor import AsyncIngestor
+from ingestion.sync_ingestor import SyncIngestor
+
+SCENARIOS = ("sync", "threaded", "process", "async", "async_batched", "save_upsert", "save_copy")
+# metric -> +1 if bigger is better, -1 if smaller is better
+COMPARED_METRICS = {
+    "throughput_per_s": +1,
+    "p50_ms": -1,
+    "p95_ms": -1,
+    "p99_ms": -1,
+    "peak_rss_mb": -1,
+}
+
+
+# ---------- scenarios ----------
+
+def _timed_fetches(urls: Sequence[str], ing: Optional[SyncIngestor] = None) -> Tuple[List[float], int]:
+    """Fetch urls one after another (on `ing`, or a fresh ingestor); returns (latencies, errors)."""
+    if ing is None:
+        with SyncIngestor() as own:
+            return _timed_fetches(urls, own)
+    latencies, errors = [], 0
+    for url in urls:
+        start = time.perf_counter()
+        try:
+            ing.fetch(url)
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors
+
+
+def run_sync(urls: List[str], opts: Dict[str, Any]) -> Tuple[List[float], int]:
+    return _timed_fetches(urls)
+
+
+def run_threaded(urls: List[str], opts: Dict[str, Any]) -> Tuple[List[float], int]:
+    """Threads sharing one pooled SyncIngestor session, like SyncIngestor.ingest_all."""
+    workers = opts["workers"]
+    with SyncIngestor(pool_size=workers, max_workers=workers) as ing, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda url: _timed_fetches([url], ing), urls))
+    return [lat for lats, _ in results for lat in lats], sum(err for _, err in results)
+
+
+def run_process(urls: List[str], opts: Dict[str, Any]) -> Tuple[List[float], int]:
+    workers = opts["workers"]
+    shards = [urls[i::workers] for i in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_timed_fetches, shards))
+    return [lat for lats, _ in results for lat in lats], sum(err for _, err in results)
+
+
+class _TimedAsyncIngestor(AsyncIngestor):
+    """AsyncIngestor that records per-request latency (errors come back as None)."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.latencies: List[float] = []
+
+    async def fetch(self, session, url):
+        start = time.perf_counter()
+        try:
+            return await super().fetch(session, url)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+
+def run_async(urls: List[str], opts: Dict[str, Any]) -> Tuple[List[float], int]:
+    ing = _TimedAsyncIngestor(urls, concurrency=opts["concurrency"])
+    results = asyncio.run(ing.run())
+    return ing.latencies, sum(1 for r in results if r is None)
+
+
+def run_async_batched(urls: List[str], opts: Dict[str, Any]) -> Tuple[List[float], int]:
+    """Same ids as "async", as ?id=..&id=.. collection requests (requests/latencies are per collection call)."""
+    from ingestion.batching import CollectionBatching
+
+    batching = CollectionBatching(collection="/posts", size=opts["batch_ids"])
+    ing = _TimedAsyncIngestor(
+        batching.requests(opts["base_url"], "/posts/{id}", 1, len(urls)), concurrency=opts["concurrency"],
+    )
+    results = asyncio.run(ing.run())
+    return ing.latencies, sum(1 for r in results if r is None)
+
+
+def _run_save(write_mode: str) -> Callable[[List[str], Dict[str, Any]], Tuple[List[float], int]]:
+    def run(urls: List[str], opts: Dict[str, Any]) -> Tuple[List[float], int]:
+        # DB modules are only imported when a DB scenario actually runs
+        from db.postgres import PostgresDB
+        from processing.processor import DataProcessor
+
+        raw = SyncIngestor().fetch(f"{opts['base_url']}/posts?_limit={opts['rows']}")
+        batch_size = opts["batch_size"]
+        latencies = []
+        with PostgresDB() as db:
+            processor = DataProcessor(
+                table_name=opts["table"], batch_size=batch_size, db=db, write_mode=write_mode,
+            )
+            db.execute(f"DROP TABLE IF EXISTS {opts['table']};")
+            for i in range(0, len(raw), batch_size):
+                start = time.perf_counter()
+                processor.save_to_db(processor.process(raw[i: i + batch_size]))
+                latencies.append(time.perf_counter() - start)
+            db.execute(f"DROP TABLE IF EXISTS {opts['table']};")
+        return latencies, 0
+
+    return run
+
+
+RUNNERS: Dict[str, Callable[[List[str], Dict[str, Any]], Tuple[List[float], int]]] = {
+    "sync": run_sync,
+    "threaded": run_threaded,
+    "process": run_process,
+    "async": run_async,
+    "async_batched": run_async_batched,
+    "save_upsert": _run_save("upsert"),
+    "save_copy": _run_save("copy"),
+}
+
+
+# ---------- measurement ----------
+
+def _peak_rss_mb() -> float:
+    """Peak RSS of this process and any workers it waited for (ru_maxrss is KiB on Linux)."""
+    self_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    scale = 1 if sys.platform == "darwin" else 1024  # macOS reports bytes
+    return round(max(self_kb, children_kb) * scale / 2 ** 20, 1)
+
+
+def percentiles(latencies: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99 in milliseconds."""
+    if not latencies:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    if len(latencies) == 1:
+        ms = round(latencies[0] * 1000, 2)
+        return {"p50_ms": ms, "p95_ms": ms, "p99_ms": ms}
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {f"p{p}_ms": round(cuts[p - 1] * 1000, 2) for p in (50, 95, 99)}
+
+
+def run_scenario(name: str, opts: Dict[str, Any]) -> Dict[str, Any]:
+    """Entry point inside the scenario's own process."""
+    if not opts["verbose"]:
+        logging.disable(logging.CRITICAL)  # per-request log lines would dominate the timings
+    urls = [f"{opts['base_url']}/posts/{i}" for i in range(1, opts["requests"] + 1)]
+    start = time.perf_counter()
+    latencies, errors = RUNNERS[name](urls, opts)
+    seconds = time.perf_counter() - start
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "throughput_per_s": round(len(latencies) / seconds, 1) if seconds else 0.0,
+        **percentiles(latencies),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Regressions of current vs baseline results, e.g.
+    "async.p95_ms: 41.0 -> 63.2 (+54%)". Scenarios or metrics missing on
+    either side (skipped, new, removed) are ignored.
+    """
+    regressions = []
+    for name, base in baseline.get("results", {}).items():
+        cur = current.get("results", {}).get(name)
+        if not cur or "skipped" in cur or "skipped" in base:
+            continue
+        for metric, direction in COMPARED_METRICS.items():
+            old, new = base.get(metric), cur.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if change * direction < -tolerance:
+                regressions.append(f"{name}.{metric}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+# ---------- CLI ----------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark ingestion modes against a local mock API")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS[:5]))
+    parser.add_argument("--requests", type=int, default=200, help="URLs fetched per scenario")
+    parser.add_argument("--latency", type=float, default=0.01, help="mock server latency, seconds")
+    parser.add_argument("--payload-size", type=int, default=256, help="post body size, bytes")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of HTTP 500s")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=50, help="async in-flight requests")
+    parser.add_argument("--workers", type=int, default=8, help="threads / processes")
+    parser.add_argument("--batch-ids", type=int, default=50, help="ids per async_batched collection request")
+    parser.add_argument("--db", action="store_true", help="also run save_* scenarios (needs Postgres)")
+    parser.add_argument("--rows", type=int, default=10_000, help="rows per save_* scenario")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--table", default="bench_posts")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="compare against this saved report")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative regression")
+    parser.add_argument("--verbose", action="store_true", help="keep ingestor logging on")
+    args = parser.parse_args()
+
+    scenarios = list(args.scenarios)
+    if args.db:
+        scenarios += [s for s in ("save_upsert", "save_copy") if s not in scenarios]
+
+    report: Dict[str, Any] = {
+        "params": {
+            "requests": args.requests, "latency": args.latency, "payload_size": args.payload_size,
+            "error_rate": args.error_rate, "concurrency": args.concurrency, "workers": args.workers,
+            "batch_ids": args.batch_ids,
+        },
+        "results": {},
+    }
+    with MockAPI(latency=args.latency, payload_size=args.payload_size,
+                 error_rate=args.error_rate, seed=args.seed) as api:
+        opts = {**vars(args), "base_url": api.base_url}
+        spawn = multiprocessing.get_context("spawn")
+        for name in scenarios:
+            if name.startswith("save_") and not args.db:
+                report["results"][name] = {"skipped": "pass --db to run against Postgres"}
+                continue
+            # Fresh interpreter per scenario: peak RSS and pools don't leak between runs
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as runner:
+                try:
+                    report["results"][name] = runner.submit(run_scenario, name, opts).result()
+                except Exception as e:
+                    report["results"][name] = {"skipped": f"{type(e).__name__}: {e}"}
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("params") != report["params"]:
+            print("WARNING baseline was recorded with different params", file=sys.stderr)
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%}.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark event-loop stalls caused by per-request logging.
+
+A fake ingestion loop logs one "Success: <url>" line per request while a
+monitor coroutine measures how late its 1 ms ticks fire. Modes:
+  - direct:   handlers on the root logger (I/O on the event-loop thread)
+  - queued:   utils.logger's DeferredQueueHandler + background QueueListener
+  - sampled:  queued, plus the RateLimitFilter used for per-request success logs
+
+Console + file handlers both write to temp files so stdout stays clean.
+--io-latency adds a blocking delay per write (a slow terminal, a network
+filesystem, a full disk queue); that is where the queued modes pay off.
+
+    python -m benchmarks.bench_logging --requests 50000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from utils import logger as log_config
+
+MODES = ("direct", "queued", "sampled")
+TICK = 0.001
+
+
+class _SlowFile:
+    """File wrapper whose writes block for `delay` seconds (GIL released, like real I/O)."""
+
+    def __init__(self, path: Path, delay: float) -> None:
+        self._f = open(path, "w")
+        self.delay = delay
+
+    def write(self, text: str) -> int:
+        if self.delay:
+            time.sleep(self.delay)
+        return self._f.write(text)
+
+    def flush(self) -> None:
+        self._f.flush()
+
+    def close(self) -> None:
+        self._f.close()
+
+
+async def _monitor(lags: List[float], done: asyncio.Event) -> None:
+    while not done.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(max(0.0, time.perf_counter() - start - TICK))
+
+
+async def _ingest(log: logging.Logger, requests: int, done: asyncio.Event) -> None:
+    for i in range(requests):
+        log.info("Success: %s", f"http://mock/posts/{i}")
+        if i % 10 == 0:
+            await asyncio.sleep(0)  # a "response" arrives
+    done.set()
+
+
+def bench_mode(mode: str, requests: int, workdir: Path, io_latency: float) -> Dict[str, float]:
+    console = logging.StreamHandler(_SlowFile(workdir / f"{mode}.out", io_latency))
+    console.setFormatter(log_config.formatter)
+    file_ = logging.StreamHandler(_SlowFile(workdir / f"{mode}.log", io_latency))
+    file_.setFormatter(log_config.formatter)
+    log_config.configure([console, file_], queued=mode != "direct")
+
+    log = logging.getLogger(f"bench.{mode}")
+    if mode == "sampled":
+        log.addFilter(log_config.RateLimitFilter(per_second=10))
+
+    async def main() -> List[float]:
+        lags: List[float] = []
+        done = asyncio.Event()
+        await asyncio.gather(_monitor(lags, done), _ingest(log, requests, done))
+        return lags
+
+    start = time.perf_counter()
+    lags = asyncio.run(main())
+    loop_s = time.perf_counter() - start
+    log_config.configure([console, file_], queued=False)  # drains the listener
+    console.stream.close()
+    file_.stream.close()
+
+    cuts = statistics.quantiles(lags, n=100) if len(lags) > 1 else lags * 99
+    return {
+        "loop_s": round(loop_s, 3),
+        "loop_us_per_request": round(loop_s / requests * 1e6, 2),
+        "stall_total_ms": round(sum(lags) * 1000, 1),
+        "stall_p99_ms": round(cuts[98] * 1000, 3),
+        "stall_max_ms": round(max(lags, default=0.0) * 1000, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark event-loop stalls from logging")
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--io-latency", type=float, default=0.0001, help="seconds each write blocks")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {mode: bench_mode(mode, args.requests, Path(tmp), args.io_latency) for mode in args.modes}
+
+    print(json.dumps({"requests": args.requests, "io_latency": args.io_latency, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
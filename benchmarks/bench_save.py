@@ -0,0 +1,67 @@
+"""
+Benchmark DataProcessor.save_to_db: execute_values batches vs COPY + merge.
+
+Needs a reachable Postgres (same settings as PostgresDB). Each mode is timed twice
+on a scratch table: once inserting fresh rows, once updating all of them.
+
+    python -m benchmarks.bench_save --rows 200000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Dict, List
+
+from db.postgres import PostgresDB
+from processing.processor import DataProcessor, PostRecord
+from utils.logger import setup_logging
+
+
+def make_records(n: int) -> List[PostRecord]:
+    return [
+        PostRecord(id=i, title=f"title {i}", body=f"body {i}\n" * 4, user_id=i % 10)
+        for i in range(1, n + 1)
+    ]
+
+
+def bench_mode(db: PostgresDB, mode: str, records: List[PostRecord], table: str, batch_size: int) -> Dict[str, float]:
+    processor = DataProcessor(table_name=table, batch_size=batch_size, db=db, write_mode=mode)
+    db.execute(f"DROP TABLE IF EXISTS {table};")
+
+    start = time.perf_counter()
+    processor.save_to_db(records)
+    insert_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    processor.save_to_db(records)
+    update_s = time.perf_counter() - start
+
+    return {
+        "insert_s": round(insert_s, 3),
+        "update_s": round(update_s, 3),
+        "insert_rows_per_s": round(len(records) / insert_s),
+        "update_rows_per_s": round(len(records) / update_s),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark save_to_db write modes")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--table", default="bench_posts")
+    args = parser.parse_args()
+    setup_logging()
+
+    records = make_records(args.rows)
+    results = {}
+    with PostgresDB() as db:
+        for mode in DataProcessor.WRITE_MODES:
+            results[mode] = bench_mode(db, mode, records, args.table, args.batch_size)
+        db.execute(f"DROP TABLE IF EXISTS {args.table};")
+
+    print(json.dumps({"rows": args.rows, "batch_size": args.batch_size, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Local stand-in for jsonplaceholder, for benchmarks and tests.
+
+    GET /posts/{id}               -> one post
+    GET /posts?_limit=N           -> list of N posts (default: list_size)
+    GET /posts?id=1&id=2...       -> those posts
+    GET /posts?_page=P&_limit=N   -> posts (P-1)*N+1 .. P*N
+
+Latency, body size, error rate and gzip compression (for clients that send
+Accept-Encoding: gzip) are configurable so ingestion modes can be compared
+without touching the network:
+
+    with MockAPI(latency=0.02, payload_size=512, error_rate=0.01) as api:
+        SyncIngestor().fetch(f"{api.base_url}/posts/1")
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+
+def make_post(post_id: int, payload_size: int) -> Dict[str, Any]:
+    """A jsonplaceholder-shaped post whose body is ~payload_size bytes."""
+    return {
+        "userId": post_id % 10 + 1,
+        "id": post_id,
+        "title": f"post {post_id}",
+        "body": ("lorem ipsum " * (payload_size // 12 + 1))[:payload_size],
+    }
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # async benchmarks open many connections at once
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so client connection pools are exercised
+    # Headers and body are separate writes; with Nagle on, every keep-alive
+    # response after the first waits ~40ms for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.api._count(connection=True)
+    server: _Server
+
+    def do_GET(self) -> None:
+        api: MockAPI = self.server.api
+        api._count()
+        if api.latency:
+            time.sleep(api.latency)
+        if api._should_fail():
+            self._send(500, {"error": "injected failure"})
+            return
+
+        parts = urlsplit(self.path)
+        segments = [s for s in parts.path.split("/") if s]
+        if segments[:1] != ["posts"] or len(segments) > 2:
+            self._send(404, {"error": "not found"})
+            return
+        if len(segments) == 2:
+            try:
+                post_id = int(segments[1])
+            except ValueError:
+                self._send(404, {"error": "not found"})
+                return
+            self._send(200, make_post(post_id, api.payload_size))
+            return
+        query = parse_qs(parts.query)
+        if "id" in query:
+            ids = [int(i) for i in query["id"]]
+        else:
+            limit = int(query.get("_limit", [api.list_size])[0])
+            first = (int(query.get("_page", ["1"])[0]) - 1) * limit + 1
+            ids = range(first, first + limit)
+        self._send(200, [make_post(i, api.payload_size) for i in ids])
+
+    def _send(self, status: int, payload: Any) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        if self.server.api.compress and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=self.server.api.compress_level)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass  # one line per request would dominate the benchmark
+
+
+class MockAPI:
+    """Threaded HTTP server on 127.0.0.1 (random free port by default), run in a background thread."""
+
+    def __init__(
+            self,
+            latency: float = 0.0,
+            payload_size: int = 256,
+            error_rate: float = 0.0,
+            list_size: int = 100,
+            port: int = 0,
+            seed: Optional[int] = None,
+            compress: bool = False,
+            compress_level: int = 6,
+    ) -> None:
+        """
+        :param latency: Seconds each request sleeps before answering.
+        :param payload_size: Size of each post's body, in bytes.
+        :param error_rate: Fraction of requests (0..1) answered with HTTP 500.
+        :param list_size: Posts returned by GET /posts without _limit.
+        :param port: Port to bind (0 = any free port).
+        :param seed: Seed for the error injection, for repeatable runs.
+        :param compress: Gzip bodies for clients that accept gzip.
+        :param compress_level: Gzip level, 1 (fast) to 9 (small).
+        """
+        if not 0.0 <= error_rate <= 1.0:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.latency = latency
+        self.payload_size = payload_size
+        self.error_rate = error_rate
+        self.list_size = list_size
+        self.port = port
+        self.compress = compress
+        self.compress_level = compress_level
+        self.requests = 0
+        self.connections = 0  # TCP connections accepted (lower than requests when clients keep alive)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[_Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        if self._server is None:
+            raise RuntimeError("MockAPI is not running")
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self) -> "MockAPI":
+        self._server = _Server(("127.0.0.1", self.port), _Handler)
+        self._server.api = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "MockAPI":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    def _count(self, connection: bool = False) -> None:
+        with self._lock:
+            if connection:
+                self.connections += 1
+            else:
+                self.requests += 1
+
+    def _should_fail(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._rng.random() < self.error_rate
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Iterable, List, Optional, Sequence
+
+import asyncpg
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class AsyncPostgresDB:
+    """
+    asyncpg-backed counterpart of PostgresDB for code running on the event loop.
+
+    Owns one connection pool (created lazily on first use) that is meant to be
+    shared: build a single instance and pass it to every DataProcessor.
+    """
+
+    def __init__(self, host: Optional[str] = None, dbname: Optional[str] = None, user: Optional[str] = None,
+                 password: Optional[str] = None, port: Optional[int] = None,
+                 min_size: int = 1, max_size: int = 10):
+        """Connection settings left as None come from DB_HOST, DB_NAME, DB_USER, DB_PASSWORD and DB_PORT."""
+        self.pool: Optional[asyncpg.Pool] = None
+        self.config = {
+            "host": host or os.getenv("DB_HOST", "localhost"),
+            "database": dbname or os.getenv("DB_NAME", "ingestiondb"),
+            "user": user or os.getenv("DB_USER", "ingestionuser"),
+            "password": password or os.getenv("DB_PASSWORD", "postgres"),
+            "port": port or int(os.getenv("DB_PORT", 5432)),
+        }
+        self.min_size = min_size
+        self.max_size = max_size
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def connect(self) -> None:
+        """Create the connection pool (once, even under concurrent callers)."""
+        if self.pool:
+            return
+        async with self._lock:
+            if self.pool:
+                return
+            try:
+                self.pool = await asyncpg.create_pool(
+                    **self.config, min_size=self.min_size, max_size=self.max_size
+                )
+                logger.info(f"Created asyncpg pool (min={self.min_size}, max={self.max_size}).")
+            except Exception as e:
+                logger.error(f"Failed to create asyncpg pool: {e}")
+                raise
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[asyncpg.Connection]:
+        """Acquire a pooled connection and run the block in one transaction."""
+        if not self.pool:
+            await self.connect()
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                yield conn
+
+    async def execute(self, query: str, *args: Any) -> str:
+        async with self.transaction() as conn:
+            return await conn.execute(query, *args)
+
+    async def executemany(self, query: str, args: Iterable[Sequence[Any]]) -> None:
+        async with self.transaction() as conn:
+            await conn.executemany(query, args)
+
+    async def fetch(self, query: str, *args: Any) -> List[asyncpg.Record]:
+        async with self.transaction() as conn:
+            return await conn.fetch(query, *args)
+
+    async def close(self) -> None:
+        """Close every pooled connection."""
+        if self.pool:
+            try:
+                await self.pool.close()
+                logger.info("🔌 asyncpg pool closed.")
+            except Exception as e:
+                logger.warning(f"⚠️ Error closing asyncpg pool: {e}")
+            finally:
+                self.pool = None
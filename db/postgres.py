@@ -1,18 +1,35 @@
 import os
+import threading
 
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
 from psycopg2 import OperationalError, DatabaseError
 from utils.logger import get_logger
 from contextlib import contextmanager
-import os
 
 logger = get_logger(__name__)
 
 
 class PostgresDB:
-    def __init__(self, host="localhost", dbname="mydb", user="postgres", password="postgres", port=5432):
+    """
+    psycopg2 wrapper with two modes:
+      - single connection (default): one lazily opened self.conn
+      - pooled (pool_max > 0): a thread-safe ThreadedConnectionPool; every cursor()
+        checks a connection out (health-checked), commits, and returns it. Safe to
+        share one instance across asyncio.to_thread workers and pipelines.
+    """
+
+    def __init__(self, host="localhost", dbname="mydb", user="postgres", password="postgres", port=5432,
+                 pool_min: int = 0, pool_max: int = 0, health_check: bool = True):
         self.conn = None
+        self.pool = None
+        self.pool_min = pool_min
+        self.pool_max = pool_max
+        self.health_check = health_check
+        # getconn() raises instead of waiting when the pool is exhausted; this makes callers wait
+        self._slots = threading.BoundedSemaphore(pool_max) if pool_max > 0 else None
+        self._pool_lock = threading.Lock()
         self.config = {
             "host": host or os.getenv("DB_HOST", "localhost"),
             "dbname": dbname or os.getenv("DB_NAME", "ingestiondb"),
@@ -26,13 +43,20 @@ class PostgresDB:
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if exc_type:
+        if exc_type and self.conn:
             logger.error(f"Rolling back transition due to: {exc_val}")
             self.conn.rollback()
         self.close()
 
+    @property
+    def pooled(self) -> bool:
+        return self.pool_max > 0
+
     def connect(self):
-        """Establish connection to the database."""
+        """Establish connection (or connection pool) to the database."""
+        if self.pooled:
+            self._connect_pool()
+            return
         if not self.conn:
             try:
                 self.conn = psycopg2.connect(**self.config, cursor_factory=RealDictCursor)
@@ -45,9 +69,68 @@ class PostgresDB:
                 logger.error(f"Failed to connect to Postgress: {e}")
                 raise
 
+    def _connect_pool(self):
+        with self._pool_lock:
+            if self.pool:
+                return
+            try:
+                self.pool = ThreadedConnectionPool(
+                    self.pool_min, self.pool_max, **self.config, cursor_factory=RealDictCursor
+                )
+                logger.info(f"Created Postgres pool (min={self.pool_min}, max={self.pool_max}).")
+            except OperationalError as e:
+                logger.error(f" Operational error connecting to Postgres: {e} ")
+                raise
+
+    def _checkout(self):
+        """Take a connection from the pool, replacing it if it is dead."""
+        conn = self.pool.getconn()
+        if not self.health_check:
+            return conn
+        try:
+            if conn.closed:
+                raise OperationalError("connection closed")
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")  # opens the transaction the caller will commit
+            return conn
+        except (OperationalError, DatabaseError) as e:
+            logger.warning(f"⚠️ Discarding unhealthy pooled connection: {e}")
+            self.pool.putconn(conn, close=True)
+            return self.pool.getconn()
+
+    @contextmanager
+    def _pooled_cursor(self):
+        if not self.pool:
+            self._connect_pool()
+        self._slots.acquire()
+        conn = None
+        try:
+            conn = self._checkout()
+            with conn.cursor() as cur:
+                yield cur
+            conn.commit()
+        except DatabaseError as e:
+            if conn and not conn.closed:
+                conn.rollback()
+            logger.error(f"❌ Database error: {e}")
+            raise
+        except Exception as e:
+            if conn and not conn.closed:
+                conn.rollback()
+            logger.error(f"❌ Unexpected error: {e}")
+            raise
+        finally:
+            if conn is not None:
+                self.pool.putconn(conn, close=bool(conn.closed))
+            self._slots.release()
+
     @contextmanager
     def get_cursor(self):
-        """Context manager for DB cursor."""
+        """Context manager for DB cursor (pooled checkout in pooled mode)."""
+        if self.pooled:
+            with self._pooled_cursor() as cur:
+                yield cur
+            return
         if not self.conn:
             self.connect()
         try:
@@ -63,6 +146,9 @@ class PostgresDB:
             logger.error(f"❌ Unexpected error: {e}")
             raise
 
+    # DataProcessor / EventStore use `db.cursor()`
+    cursor = get_cursor
+
     def execute(self, query, params=None):
         """Execute INSERT/UPDATE/DELETE queries."""
         with self.get_cursor() as cur:
@@ -81,7 +167,15 @@ class PostgresDB:
             return cur.fetchone()
 
     def close(self):
-        """Close connection."""
+        """Close connection (and every pooled connection)."""
+        if self.pool:
+            try:
+                self.pool.closeall()
+                logger.info("🔌 Postgres pool closed.")
+            except Exception as e:
+                logger.warning(f"⚠️ Error closing Postgres pool: {e}")
+            finally:
+                self.pool = None
         if self.conn:
             try:
                 self.conn.close()
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class InMemoryRedis:
+    """
+    In-process stand-in for the subset of the redis client API used by RedisCache
+    (get / set with ex= / delete / ping). Used in tests and as a fallback when no
+    Redis server is reachable.
+    """
+
+    def __init__(self) -> None:
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def ping(self) -> bool:
+        return True
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None) -> bool:
+        expires_at = time.monotonic() + ex if ex else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(self._data.pop(k, None) is not None for k in keys)
+
+
+class RedisCache:
+    """
+    Read-through HTTP response cache keyed by URL.
+
+    Values are JSON-encoded, zlib-compressed and stored with a TTL. The sync API
+    (get/set) serves SyncIngestor; the async API (aget/aset) serves AsyncIngestor
+    and uses `async_client` (a redis.asyncio client) when one is given, else runs
+    the sync client in a worker thread.
+    Hits and misses are counted for run stats.
+    """
+
+    def __init__(self, client: Any = None, async_client: Any = None, ttl: int = 300,
+                 prefix: str = "http:", compress_level: int = 6) -> None:
+        self.client = client if client is not None else InMemoryRedis()
+        self.async_client = async_client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.compress_level = compress_level
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls, ttl: int = 300, **kwargs: Any) -> "RedisCache":
+        """
+        Connect to REDIS_HOST/REDIS_PORT (see docker-compose.yml).
+        Falls back to an in-process cache if redis isn't installed or reachable.
+        """
+        host = os.getenv("REDIS_HOST", "localhost")
+        port = int(os.getenv("REDIS_PORT", 6379))
+        try:
+            import redis
+            import redis.asyncio as aioredis
+
+            client = redis.Redis(host=host, port=port, socket_connect_timeout=1)
+            client.ping()
+            logger.info(f"Connected to Redis at {host}:{port}.")
+            return cls(client, aioredis.Redis(host=host, port=port), ttl=ttl, **kwargs)
+        except Exception as e:
+            logger.warning(f"⚠️ Redis unavailable ({e}); using in-process response cache.")
+            return cls(InMemoryRedis(), ttl=ttl, **kwargs)
+
+    def close(self) -> None:
+        """Close the sync client's connections (aclose() also closes the async client)."""
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            close()
+
+    async def aclose(self) -> None:
+        """Close both clients; await it on the loop the async client was used from."""
+        self.close()
+        if self.async_client is not None:
+            # redis.asyncio >= 5.0.1 has aclose(); older versions only an awaitable close()
+            close = getattr(self.async_client, "aclose", None) or self.async_client.close
+            await close()
+
+    # ---------- encoding ----------
+
+    def _key(self, url: str) -> str:
+        return f"{self.prefix}{url}"
+
+    def _encode(self, value: Any) -> bytes:
+        return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"), self.compress_level)
+
+    def _decode(self, raw: Optional[bytes]) -> Any:
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(zlib.decompress(raw))
+
+    # ---------- sync API ----------
+
+    def get(self, url: str) -> Any:
+        """Cached JSON payload for url, or None on a miss."""
+        try:
+            raw = self.client.get(self._key(url))
+        except Exception as e:
+            logger.warning("⚠️ Cache read failed for %s: %s", url, e)
+            raw = None
+        return self._decode(raw)
+
+    def set(self, url: str, value: Any) -> None:
+        if value is None:
+            return
+        try:
+            self.client.set(self._key(url), self._encode(value), ex=self.ttl)
+        except Exception as e:
+            logger.warning("⚠️ Cache write failed for %s: %s", url, e)
+
+    # ---------- async API ----------
+
+    async def aget(self, url: str) -> Any:
+        try:
+            raw = await self._acall("get", self._key(url))
+        except Exception as e:
+            logger.warning("⚠️ Cache read failed for %s: %s", url, e)
+            raw = None
+        return self._decode(raw)
+
+    async def aset(self, url: str, value: Any) -> None:
+        if value is None:
+            return
+        try:
+            await self._acall("set", self._key(url), self._encode(value), ex=self.ttl)
+        except Exception as e:
+            logger.warning("⚠️ Cache write failed for %s: %s", url, e)
+
+    async def _acall(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a client call without blocking the event loop: on the async client if
+        there is one, else the sync client's network round trip goes to a worker
+        thread (the in-process InMemoryRedis is called directly).
+        """
+        if self.async_client is not None:
+            result = getattr(self.async_client, method)(*args, **kwargs)
+            return await result if inspect.isawaitable(result) else result
+        call = getattr(self.client, method)
+        if isinstance(self.client, InMemoryRedis):
+            return call(*args, **kwargs)
+        return await asyncio.to_thread(call, *args, **kwargs)
+
+    def stats(self) -> Dict[str, int]:
+        return {"cache_hits": self.hits, "cache_misses": self.misses}
@@ -1,11 +1,106 @@
 import asyncio
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Union
+
 import aiohttp
-from utils.logger import logger  # Using your existing logger
+from db.redis_cache import RedisCache
+from ingestion.batching import BatchRequest
+from ingestion.codecs import ACCEPT_ENCODING, get_decoder, wire_bytes
+from ingestion.rate_limit import RateLimiter
+from ingestion.singleflight import SingleFlight
+from retry_decorator.resilience import CircuitBreaker, CircuitOpenError, RetryBudget, host_key, is_transient
+from retry_decorator.retry import retry
+from utils import metrics
+from utils.logger import REQUEST_LOGGER, get_logger, logger, setup_logging  # Using your existing logger
+
+# Per-request success lines; rate-limited by utils.logger so they can't flood the loop
+request_logger = get_logger(REQUEST_LOGGER)
+
+# Marker a worker puts on the result queue once it has drained the URL iterator
+_DONE = object()
+
+# Bodies at least this large are decoded in a worker thread instead of on the event loop
+OFFLOAD_DECODE_BYTES = 256 * 1024
 
 
 class AsyncIngestor:
-    def __init__(self, urls):
+    """
+    Bounded-concurrency async ingestor.
+
+    At most ``concurrency`` requests are in flight at any time, all sharing one
+    pooled ``aiohttp.TCPConnector``. Besides plain URLs, ``urls`` may contain
+    ``BatchRequest``s (see ingestion.batching): one collection request whose
+    response is split back into one result per id, with per-id requests for
+    the ids it didn't return. ``stream()`` yields results as they complete
+    so callers can start processing before the last response arrives; ``run()``
+    collects them into a list for callers that want everything at once.
+    """
+
+    def __init__(
+            self,
+            urls: Iterable[Union[str, BatchRequest]],
+            concurrency: int = 50,
+            connector: Optional[Dict[str, Any]] = None,
+            cache: Optional[RedisCache] = None,
+            coalescer: Optional[SingleFlight] = None,
+            breaker: Optional[CircuitBreaker] = None,
+            budget: Optional[RetryBudget] = None,
+            limiter: Optional[RateLimiter] = None,
+            decoder: str = "auto",
+            offload_decode_bytes: Optional[int] = OFFLOAD_DECODE_BYTES,
+    ):
+        """
+        :param urls: Any iterable of URLs or BatchRequests (a generator keeps large id ranges lazy).
+        :param concurrency: Max number of requests in flight at once.
+        :param connector: TCPConnector settings, e.g.
+            {limit, limit_per_host, keepalive_timeout, ttl_dns_cache}.
+        :param cache: Optional read-through response cache consulted before the network.
+        :param coalescer: Optional in-process LRU + single-flight layer (checked before the cache);
+            duplicate URLs, here or in other ingestors sharing it, are fetched once.
+        :param breaker: Optional per-host circuit breaker; while a host is open its URLs
+            fail fast (None) instead of each request retrying on its own.
+        :param budget: Optional retry budget shared by every request (and other ingestors).
+        :param limiter: Optional per-host token bucket + AIMD concurrency limit; every
+            attempt (retries included) waits for it, so at most min(concurrency, limit)
+            requests per host are in flight.
+        :param decoder: JSON decoder: "auto" (orjson > msgspec > stdlib, whichever is
+            installed) or one of ingestion.codecs.PREFERRED.
+        :param offload_decode_bytes: Decode bodies of at least this many bytes in a worker
+            thread so the event loop keeps serving other requests (None = never).
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
         self.urls = urls
+        self.concurrency = concurrency
+        self.connector_options = dict(connector or {})
+        self.cache = cache
+        self.coalescer = coalescer
+        self.breaker = breaker
+        self.budget = budget
+        self.limiter = limiter
+        self.decoder_name, self.decode = get_decoder(decoder)
+        self.offload_decode_bytes = offload_decode_bytes
+        # collection requests made / ids they missed (fetched one by one instead)
+        self.batch_requests = 0
+        self.fallback_requests = 0
+        self._get = retry(
+            max_attempts=3, delay_seconds=0.5, jitter=0.1,
+            exceptions=(aiohttp.ClientError, asyncio.TimeoutError),
+            breaker=breaker, budget=budget, key_func=lambda session, url: host_key(url),
+            retry_if=is_transient,
+        )(self._get)
+
+    def _make_session(self) -> aiohttp.ClientSession:
+        """Build a session whose connection pool matches the configured limits."""
+        opts = self.connector_options
+        connector = aiohttp.TCPConnector(
+            limit=opts.get("limit", 100),
+            limit_per_host=opts.get("limit_per_host", 0),
+            keepalive_timeout=opts.get("keepalive_timeout", 15),
+            ttl_dns_cache=opts.get("ttl_dns_cache", 10),
+            ssl=False,
+        )
+        # aiohttp decompresses transparently; say explicitly what it can decode
+        return aiohttp.ClientSession(connector=connector, headers={"Accept-Encoding": ACCEPT_ENCODING})
 
     async def fetch(self, session, url):
         """
@@ -15,28 +110,142 @@ class AsyncIngestor:
         :param url:
         :return:
         """
+        with metrics.stage_timer("fetch"):
+            if self.coalescer is not None:
+                return await self.coalescer.ado(url, lambda: self._fetch(session, url))
+            return await self._fetch(session, url)
+
+    async def _fetch(self, session, url):
+        """Response cache, then the network. Errors are logged and returned as None."""
+        if self.cache is not None:
+            cached = await self.cache.aget(url)
+            if cached is not None:
+                return cached
 
         try:
-            async with session.get(url, ssl = False) as response:
-                data = await  response.json()
-                logger.info(f"Success: {url}")
-                return data
+            data = await self._get(session, url)
+        except CircuitOpenError as e:
+            metrics.STAGE_ERRORS.inc(stage="fetch")
+            logger.warning("X Skipped %s: %s", url, e)
+            return None
         except Exception as e:
-            logger.exception(f"X Error fetching {url}: {e}")
+            metrics.STAGE_ERRORS.inc(stage="fetch")
+            logger.exception("X Error fetching %s: %s", url, e)
             return None
+        if self.cache is not None:
+            await self.cache.aset(url, data)
+        return data
 
-    async def run(self):
+    async def fetch_batch(self, session, request: BatchRequest) -> List[Any]:
         """
-        Create tasks for all URLs and run them concurrently.
+        One collection request split into per-id results (in id order); ids the
+        response lacks are fetched one by one, so a result is None only if that
+        per-id fetch failed too.
         """
+        self.batch_requests += 1
+        records, missing = request.split(await self.fetch(session, request.url))
+        if missing:
+            self.fallback_requests += len(missing)
+            logger.debug("%s: %d of %d id(s) missing, fetching them one by one",
+                         request.url, len(missing), len(request.ids))
+            for id_ in missing:
+                records.append(await self.fetch(session, request.fallback_url(id_)))
+        return records
 
-        async with aiohttp.ClientSession() as session:
-            tasks = [self.fetch(session, url) for url in self.urls]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            return results
+    async def _get(self, session, url):
+        """HTTP GET (retried, see __init__); raises on non-2xx."""
+        if self.limiter is None:
+            return await self._request(session, url)
+        async with self.limiter.slot(url) as permit:
+            return await self._request(session, url, permit)
+
+    async def _request(self, session, url, permit=None):
+        async with session.get(url, ssl = False) as response:
+            if permit is not None:
+                permit.status = response.status  # feeds the limiter's AIMD
+            response.raise_for_status()  # never cache an error body
+            body = await response.read()
+            host = host_key(url)
+            metrics.FETCHED_BYTES.inc(len(body), host=host)
+            # total_raw_bytes: aiohttp >= 3.12 counts what came off the socket, chunked or not
+            wire = wire_bytes(response.headers, getattr(response.content, "total_raw_bytes", None))
+            if wire is not None:
+                metrics.TRANSFERRED_BYTES.inc(wire, host=host)
+            request_logger.info("Success: %s", url)
+        # Decoded after the connection is back in the pool
+        if self.offload_decode_bytes is not None and len(body) >= self.offload_decode_bytes:
+            return await asyncio.to_thread(self.decode, body)
+        return self.decode(body)
+
+    async def stream(self) -> AsyncIterator[Any]:
+        """
+        Yield fetch results in completion order.
+
+        A fixed pool of ``concurrency`` workers pulls from the shared URL iterator,
+        so neither the URL list nor one task per URL is ever materialised. The
+        result queue is bounded: if the consumer falls behind, workers block
+        instead of buffering every response in memory. If a worker dies (an error
+        fetch() doesn't turn into a None result), the stream raises it.
+        """
+        urls = iter(self.urls)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        failures: List[BaseException] = []
+        closing = False
+
+        async with self._make_session() as session:
+
+            async def worker() -> None:
+                try:
+                    # next() never awaits, so sharing the iterator between workers is safe
+                    for url in urls:
+                        if isinstance(url, BatchRequest):
+                            for item in await self.fetch_batch(session, url):
+                                await queue.put(item)
+                        else:
+                            await queue.put(await self.fetch(session, url))
+                except BaseException as e:
+                    if not closing:
+                        failures.append(e)
+                    raise
+                finally:
+                    # Always signal the consumer, unless it is the one tearing workers down
+                    if not closing:
+                        await queue.put(_DONE)
+
+            workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+            try:
+                remaining = len(workers)
+                while remaining:
+                    item = await queue.get()
+                    if item is _DONE:
+                        remaining -= 1
+                        if failures:
+                            error = failures[0]
+                            if isinstance(error, asyncio.CancelledError):
+                                raise RuntimeError("a fetch worker was cancelled") from error
+                            raise error
+                        continue
+                    yield item
+            finally:
+                # Consumer stopped early (break / exception): don't leak workers
+                closing = True
+                for w in workers:
+                    w.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                if self.batch_requests:
+                    logger.info("%d collection request(s), %d per-id fallback(s)",
+                                self.batch_requests, self.fallback_requests)
+
+    async def run(self):
+        """
+        Fetch all URLs with bounded concurrency and return the results
+        (in completion order).
+        """
+        return [item async for item in self.stream()]
 
 
 if __name__ == "__main__":
+    setup_logging()
     urls = [f"https://jsonplaceholder.typicode.com/posts/{i}" for i in range(1, 21)]
     ingestor = AsyncIngestor(urls)
     results = asyncio.run(ingestor.run())
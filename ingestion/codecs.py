@@ -0,0 +1,80 @@
+"""
+Response decoding shared by the ingestors.
+
+JSON decoders are pluggable: "auto" picks the fastest one installed (orjson,
+then msgspec, then the stdlib), or name one explicitly. Both accept the raw
+bytes, so there is no separate UTF-8 decode step as with response.json().
+
+ACCEPT_ENCODING asks for compressed bodies explicitly. Brotli is only
+offered when a brotli module is installed, because the HTTP clients can only
+decode it then.
+"""
+from __future__ import annotations
+
+import importlib.util
+import json
+from typing import Any, Callable, Dict, Optional, Tuple
+
+Decoder = Callable[[bytes], Any]
+
+# Tried in this order by "auto"
+PREFERRED = ("orjson", "msgspec", "json")
+
+
+def _load(name: str) -> Decoder:
+    if name == "orjson":
+        import orjson
+        return orjson.loads
+    if name == "msgspec":
+        import msgspec
+        return msgspec.json.Decoder().decode
+    if name == "json":
+        return json.loads
+    raise ValueError(f"unknown JSON decoder {name!r}; expected 'auto' or one of {PREFERRED}")
+
+
+def get_decoder(name: str = "auto") -> Tuple[str, Decoder]:
+    """(resolved name, decode function). A decoder named explicitly must be installed."""
+    if name != "auto":
+        return name, _load(name)
+    for candidate in PREFERRED:
+        try:
+            return candidate, _load(candidate)
+        except ImportError:
+            continue
+    return "json", json.loads  # unreachable: the stdlib is always there
+
+
+def available_decoders() -> Dict[str, Decoder]:
+    """Every installed decoder, for benchmarks."""
+    found = {}
+    for name in PREFERRED:
+        try:
+            found[name] = _load(name)
+        except ImportError:
+            pass
+    return found
+
+
+def _accept_encoding() -> str:
+    encodings = ["gzip", "deflate"]
+    if any(importlib.util.find_spec(m) for m in ("brotli", "brotlicffi")):
+        encodings.append("br")
+    return ", ".join(encodings)
+
+
+ACCEPT_ENCODING = _accept_encoding()
+
+
+def wire_bytes(headers: Any, raw_read: Optional[int] = None) -> Optional[int]:
+    """
+    Body bytes on the wire (compressed size): the client's count of raw bytes read
+    if it keeps one, else Content-Length, else None (e.g. chunked and the client
+    can't tell). Never the decoded size, which would hide the compression.
+    """
+    if raw_read is not None:
+        return raw_read
+    try:
+        return int(headers.get("Content-Length"))
+    except (TypeError, ValueError):
+        return None
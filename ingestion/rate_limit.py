@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Optional
+
+from retry_decorator.resilience import host_key
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Upstream is telling us to slow down
+THROTTLE_STATUSES = (429, 503)
+
+
+@dataclass(slots=True)
+class Permit:
+    """Handed out by RateLimiter.slot(); set .status once the response arrives."""
+    status: Optional[int] = None
+
+
+class HostLimiter:
+    """
+    Rate limit + adaptive concurrency for one host (event-loop only, not thread-safe).
+
+    Requests first take a token from a bucket (`rate` per second, bursts up to
+    `burst`), then wait for one of `limit` in-flight slots. `limit` follows AIMD:
+    +increase/limit per healthy response (≈ +increase per round trip), and
+    × decrease on a 429/503 or when the latency EWMA exceeds
+    latency_tolerance × the best latency seen. Decreases are spaced by at least
+    one EWMA latency, so a burst of throttled responses counts once.
+    """
+
+    def __init__(
+            self,
+            rate: Optional[float] = None,
+            burst: Optional[float] = None,
+            initial_concurrency: int = 10,
+            min_concurrency: int = 1,
+            max_concurrency: int = 100,
+            increase: float = 1.0,
+            decrease: float = 0.5,
+            latency_tolerance: float = 2.0,
+    ) -> None:
+        if not 0 < decrease < 1:
+            raise ValueError("decrease must be between 0 and 1")
+        self.rate = rate
+        self.burst = burst if burst is not None else (rate or 1.0)
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.limit = float(min(max(initial_concurrency, self.min_concurrency), self.max_concurrency))
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self._tokens = self.burst
+        self._refilled = time.monotonic()
+        self._cond = asyncio.Condition()
+        self._last_decrease = 0.0
+        self._ewma: Optional[float] = None
+        self._best: Optional[float] = None
+        # reported in run stats
+        self.throttled = 0
+        self.decreases = 0
+        self.peak_limit = self.limit
+        self.low_limit = self.limit
+
+    async def acquire(self) -> None:
+        await self._take_token()
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, latency: float, status: Optional[int]) -> None:
+        """Feed one outcome back (status None = no response, e.g. connection error)."""
+        async with self._cond:
+            self.in_flight -= 1
+            self._observe(latency, status)
+            self._cond.notify_all()
+
+    def _observe(self, latency: float, status: Optional[int]) -> None:
+        if status is None:
+            return
+        if status in THROTTLE_STATUSES:
+            self.throttled += 1
+            self._back_off(f"HTTP {status}")
+            return
+        self._ewma = latency if self._ewma is None else 0.8 * self._ewma + 0.2 * latency
+        self._best = latency if self._best is None else min(self._best, latency)
+        if self._ewma > self._best * self.latency_tolerance:
+            self._back_off(f"latency {self._ewma * 1000:.0f}ms")
+        else:
+            self.limit = min(self.max_concurrency, self.limit + self.increase / self.limit)
+            self.peak_limit = max(self.peak_limit, self.limit)
+
+    def _back_off(self, reason: str) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < (self._ewma or 0.0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_concurrency, self.limit * self.decrease)
+        self.low_limit = min(self.low_limit, self.limit)
+        self.decreases += 1
+        # The latency baseline is re-learned at the new level
+        self._best = self._ewma
+        logger.debug("Concurrency limit down to %.1f (%s)", self.limit, reason)
+
+    async def _take_token(self) -> None:
+        if not self.rate:
+            return
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+            self._refilled = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "peak_limit": int(self.peak_limit),
+            "low_limit": int(self.low_limit),
+            "throttled": self.throttled,
+            "decreases": self.decreases,
+        }
+
+
+class RateLimiter:
+    """
+    One HostLimiter per host, created lazily with the same settings
+    (the `rate_limit` block of a pipeline in pipelines.yaml).
+    """
+
+    def __init__(self, **settings: Any) -> None:
+        HostLimiter(**settings)  # validate settings up front
+        self.settings = settings
+        self.hosts: Dict[str, HostLimiter] = {}
+
+    def for_url(self, url: str) -> HostLimiter:
+        key = host_key(url)
+        host = self.hosts.get(key)
+        if host is None:
+            host = self.hosts[key] = HostLimiter(**self.settings)
+        return host
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[Permit]:
+        """Hold a token + concurrency slot for url's host for the duration of one request."""
+        host = self.for_url(url)
+        await host.acquire()
+        permit = Permit()
+        started = time.perf_counter()
+        try:
+            yield permit
+        finally:
+            await host.release(time.perf_counter() - started, permit.status)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {key: host.stats() for key, host in self.hosts.items()}
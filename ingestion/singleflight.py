@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded LRU with per-entry TTL.
+    Least recently used entries are evicted once maxsize is reached;
+    expired entries are dropped lazily on access.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        """Value for key, or None if missing/expired."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class _LeaderAborted(Exception):
+    """Set on the shared future when the leader was cancelled: waiters claim the key again."""
+
+
+class SingleFlight:
+    """
+    Request coalescing in front of fetches, backed by an in-process LRU.
+
+    Concurrent callers asking for the same key share one in-flight call, whether
+    they are coroutines (`ado`) or threads (`do`) - e.g. an AsyncIngestor on the
+    event loop and a SyncIngestor hosted in asyncio.to_thread. Non-None results
+    are kept in the LRU for `ttl` seconds so later callers skip the call entirely.
+    A leader's cancellation is its own: waiting callers retry the key instead of
+    being cancelled with it, and a cancelled waiter leaves the shared call alone.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0) -> None:
+        self.lru = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.lru_hits = 0
+        self.coalesced = 0
+
+    def _claim(self, key: Hashable) -> Tuple[Any, Optional[Future], bool]:
+        """
+        Returns (cached_value, future, is_leader). Checking the LRU under the same
+        lock as the in-flight map means a caller can't miss a result that a leader
+        has just published.
+        """
+        with self._lock:
+            cached = self.lru.get(key)
+            if cached is not None:
+                self.lru_hits += 1
+                return cached, None, False
+            fut = self._inflight.get(key)
+            if fut is not None:
+                self.coalesced += 1
+                return None, fut, False
+            fut = Future()
+            self._inflight[key] = fut
+            return None, fut, True
+
+    def _settle(self, key: Hashable, fut: Future, value: Any = None,
+                exc: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+            if exc is None and value is not None:
+                self.lru.set(key, value)
+        if exc is not None:
+            # CancelledError / KeyboardInterrupt say nothing about the key; don't hand them on
+            fut.set_exception(exc if isinstance(exc, Exception) else _LeaderAborted())
+        else:
+            fut.set_result(value)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Blocking variant: run fn() once per key across all concurrent callers."""
+        while True:
+            cached, fut, leader = self._claim(key)
+            if fut is None:
+                return cached
+            if leader:
+                break
+            try:
+                return fut.result()
+            except _LeaderAborted:
+                continue
+        try:
+            value = fn()
+        except BaseException as e:
+            self._settle(key, fut, exc=e)
+            raise
+        self._settle(key, fut, value)
+        return value
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant: await fn() once per key across all concurrent callers."""
+        while True:
+            cached, fut, leader = self._claim(key)
+            if fut is None:
+                return cached
+            if leader:
+                break
+            try:
+                # shield: cancelling this waiter must not cancel the call others share
+                return await asyncio.shield(asyncio.wrap_future(fut))
+            except _LeaderAborted:
+                continue
+        try:
+            value = await fn()
+        except BaseException as e:
+            self._settle(key, fut, exc=e)
+            raise
+        self._settle(key, fut, value)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        return {"lru_hits": self.lru_hits, "coalesced": self.coalesced, "lru_size": len(self.lru)}
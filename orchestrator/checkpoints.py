@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable, List, Literal, Optional, Tuple
+
+from utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from db.postgres import PostgresDB
+
+logger = get_logger(__name__)
+
+# DONE: every id fetched and written. INCOMPLETE: written, but some fetches failed.
+# FAILED: the chunk raised. Only DONE chunks are skipped on resume.
+ChunkStatus = Literal["DONE", "INCOMPLETE", "FAILED"]
+
+IdRange = Tuple[int, int]  # inclusive
+
+
+def id_chunks(start: int, end: int, size: int) -> List[IdRange]:
+    """Split the inclusive range start..end into inclusive pieces of `size` ids."""
+    if size < 1:
+        raise ValueError("chunk size must be >= 1")
+    return [(lo, min(lo + size - 1, end)) for lo in range(start, end + 1, size)]
+
+
+def pending_chunks(chunks: Iterable[IdRange], done: Iterable[IdRange]) -> List[IdRange]:
+    """
+    Chunks not covered by a finished range. A chunk inside any DONE range counts
+    as finished, so a resume still skips work if the chunk size was changed.
+    """
+    done = list(done)
+    return [(lo, hi) for lo, hi in chunks if not any(d_lo <= lo and hi <= d_hi for d_lo, d_hi in done)]
+
+
+class CheckpointStore:
+    """
+    Per-chunk progress of id-range pipelines (ingestion_checkpoints, next to
+    ingestion_events): one row per (pipeline, id sub-range), upserted as each
+    chunk finishes, so a resumed run only fetches what is left.
+    """
+
+    def __init__(self, table_name: str = "ingestion_checkpoints", db: Optional[PostgresDB] = None) -> None:
+        self.table_name = table_name
+        if db is None:
+            from db.postgres import PostgresDB
+            db = PostgresDB()
+        self.db = db
+
+    def ensure_table(self) -> None:
+        ddl = f"""
+        CREATE TABLE IF NOT EXISTS {self.table_name} (
+            pipeline     TEXT NOT NULL,
+            range_start  BIGINT NOT NULL,
+            range_end    BIGINT NOT NULL,
+            status       TEXT NOT NULL,
+            records      BIGINT NOT NULL DEFAULT 0,
+            updated_at   TIMESTAMPTZ DEFAULT NOW(),
+            PRIMARY KEY (pipeline, range_start, range_end)
+        );
+        """
+        with self.db.cursor() as cur:
+            cur.execute(ddl)
+        logger.debug("Ensured ingestion_checkpoints table exists.")
+
+    def done_ranges(self, pipeline: str) -> List[IdRange]:
+        with self.db.cursor() as cur:
+            cur.execute(
+                f"SELECT range_start, range_end FROM {self.table_name} WHERE pipeline = %s AND status = 'DONE'",
+                (pipeline,),
+            )
+            return [(row["range_start"], row["range_end"]) for row in cur.fetchall()]
+
+    def mark(self, pipeline: str, chunk: IdRange, status: ChunkStatus, records: int = 0) -> None:
+        sql = f"""
+        INSERT INTO {self.table_name} (pipeline, range_start, range_end, status, records)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (pipeline, range_start, range_end)
+        DO UPDATE SET status = EXCLUDED.status, records = EXCLUDED.records, updated_at = NOW();
+        """
+        with self.db.cursor() as cur:
+            cur.execute(sql, (pipeline, chunk[0], chunk[1], status, records))
+        logger.debug("[%s] checkpoint %s-%s %s (%s records)", pipeline, chunk[0], chunk[1], status, records)
+
+    def clear(self, pipeline: str) -> None:
+        """Forget a pipeline's progress (a fresh, non-resumed run)."""
+        with self.db.cursor() as cur:
+            cur.execute(f"DELETE FROM {self.table_name} WHERE pipeline = %s", (pipeline,))
@@ -1,14 +1,20 @@
 from __future__ import annotations
+import asyncio
 from dataclasses import dataclass
-from typing import Optional, Literal
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Literal, Sequence
 from datetime import datetime
 
-from db.postgres import PostgresDB
 from utils.logger import get_logger
 
+if TYPE_CHECKING:
+    from db.postgres import PostgresDB
+
 logger = get_logger(__name__)
 
-Status = Literal["PENDING", "RUNNING", "SUCCESS", "FAILED"]
+Status = Literal["PENDING", "RUNNING", "SUCCESS", "FAILED", "SKIPPED"]
+
+# Queued by aclose() so the flusher drains what's left and exits
+_STOP = object()
 
 
 @dataclass(slots=True)
@@ -19,12 +25,35 @@ class IngestionEvent:
     started_at: Optional[datetime] = None
     finished_at: Optional[datetime] = None
     records: Optional[int] = None
+    # write outcome (DataProcessor.WriteStats)
+    inserted: Optional[int] = None
+    updated: Optional[int] = None
+    unchanged: Optional[int] = None
+    # run stats (e.g. per-host rate limiter state), stored as JSONB
+    stats: Optional[Dict[str, Any]] = None
 
 
 class EventStore:
-    def __init__(self, table_name: str = "ingestion_events", db: Optional[PostgresDB] = None) -> None:
+    """
+    Persists IngestionEvents.
+
+    log() writes synchronously. After `await start()`, log_async() only enqueues:
+    a background task flushes events in multi-row INSERTs (when flush_size events
+    are queued or flush_interval seconds have passed) from a worker thread, so the
+    event loop never waits on the events table. `await aclose()` drains the queue.
+    """
+
+    def __init__(self, table_name: str = "ingestion_events", db: Optional[PostgresDB] = None,
+                 flush_size: int = 100, flush_interval: float = 1.0) -> None:
         self.table_name = table_name
-        self.db = db or PostgresDB()
+        if db is None:
+            from db.postgres import PostgresDB
+            db = PostgresDB()
+        self.db = db
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
 
     def ensure_table(self) -> None:
         ddl = f"""
@@ -36,8 +65,17 @@ class EventStore:
             started_at   TIMESTAMPTZ NULL,
             finished_at  TIMESTAMPTZ NULL,
             records      BIGINT NULL,
+            inserted     BIGINT NULL,
+            updated      BIGINT NULL,
+            unchanged    BIGINT NULL,
+            stats        JSONB NULL,
             created_at   TIMESTAMPTZ DEFAULT NOW()
         );
+        ALTER TABLE {self.table_name}
+            ADD COLUMN IF NOT EXISTS inserted  BIGINT NULL,
+            ADD COLUMN IF NOT EXISTS updated   BIGINT NULL,
+            ADD COLUMN IF NOT EXISTS unchanged BIGINT NULL,
+            ADD COLUMN IF NOT EXISTS stats     JSONB NULL;
         """
         with self.db.cursor() as cur:
             cur.execute(ddl)
@@ -46,9 +84,94 @@ class EventStore:
     def log(self, evt: IngestionEvent) -> None:
         sql = f"""
         INSERT INTO {self.table_name}
-        (pipeline, status, detail, started_at, finished_at, records)
-        VALUES (%s, %s, %s, %s, %s, %s);
+        (pipeline, status, detail, started_at, finished_at, records, inserted, updated, unchanged, stats)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
+        """
+        with self.db.cursor() as cur:
+            cur.execute(sql, _row(evt))
+        logger.info(_summary(evt))
+
+    def log_many(self, events: Sequence[IngestionEvent]) -> None:
+        """Write several events in one multi-row INSERT / one transaction."""
+        if not events:
+            return
+        sql = f"""
+        INSERT INTO {self.table_name}
+        (pipeline, status, detail, started_at, finished_at, records, inserted, updated, unchanged, stats)
+        VALUES %s;
         """
+        from psycopg2.extras import execute_values
+
         with self.db.cursor() as cur:
-            cur.execute(sql, (evt.pipeline, evt.status, evt.detail, evt.started_at, evt.finished_at, evt.records))
-        logger.info(f"[{evt.pipeline}] status={evt.status} records={evt.records or 0}")
+            execute_values(cur, sql, [_row(e) for e in events])
+        logger.debug("Flushed %d ingestion event(s).", len(events))
+
+    # ---------- buffered async mode ----------
+
+    async def start(self) -> None:
+        """Switch to buffered mode: start the background flusher on the running loop."""
+        if self._flusher is None:
+            self._queue = asyncio.Queue()
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def log_async(self, evt: IngestionEvent) -> None:
+        """Enqueue (buffered mode) or write in a worker thread (not started)."""
+        if self._queue is None:
+            await asyncio.to_thread(self.log, evt)
+            return
+        self._queue.put_nowait(evt)
+        logger.info(_summary(evt))
+
+    async def aclose(self) -> None:
+        """Flush everything still queued and stop the background flusher."""
+        if self._flusher is None:
+            return
+        self._queue.put_nowait(_STOP)
+        await self._flusher
+        self._flusher = None
+        self._queue = None
+
+    async def _flush_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch: List[IngestionEvent] = [item]
+            # Keep collecting until the batch is full or flush_interval has elapsed
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.flush_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                await asyncio.to_thread(self.log_many, batch)
+            except Exception:
+                # Never let a failed flush kill the flusher (and block shutdown)
+                logger.exception(f"Failed to flush {len(batch)} ingestion event(s).")
+
+
+def _summary(evt: IngestionEvent) -> str:
+    line = f"[{evt.pipeline}] status={evt.status} records={evt.records or 0}"
+    if evt.inserted is not None:
+        line += f" inserted={evt.inserted} updated={evt.updated} unchanged={evt.unchanged}"
+    return line
+
+
+def _row(evt: IngestionEvent) -> tuple:
+    from psycopg2.extras import Json
+
+    return (
+        evt.pipeline, evt.status, evt.detail, evt.started_at, evt.finished_at, evt.records,
+        evt.inserted, evt.updated, evt.unchanged,
+        Json(evt.stats) if evt.stats is not None else None,
+    )
@@ -2,21 +2,38 @@ from __future__ import annotations
 
 import argparse
 import asyncio
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
 
-import yaml
-
-from ingestion.sync_ingestor import SyncIngestor
-from ingestion.async_ingestor import AsyncIngestor
-from processing.processor import DataProcessor
+from ingestion.rate_limit import RateLimiter
+from ingestion.singleflight import SingleFlight
+from retry_decorator.resilience import CircuitBreaker, RetryBudget
+from orchestrator.checkpoints import CheckpointStore, IdRange, id_chunks, pending_chunks
 from orchestrator.event_store import EventStore, IngestionEvent
-from orchestrator.visualize import mermaid_from_config, write_mermaid
-from utils.logger import get_logger
+from orchestrator.scheduler import DagScheduler
+from orchestrator.streaming import StreamStats, stream_to_db
+from orchestrator.visualise import mermaid_from_config, write_mermaid
+from utils import metrics
+from utils.logger import get_logger, setup_logging
+
+# HTTP clients, DB drivers and yaml are imported where a pipeline mode needs them,
+# so a sync-only run never loads aiohttp/asyncpg (and importing this module is cheap)
+if TYPE_CHECKING:
+    from db.async_postgres import AsyncPostgresDB
+    from db.postgres import PostgresDB
+    from db.redis_cache import RedisCache
+    from processing.processor import DataProcessor, WriteStats
+    from utils.profiling import Profiler
 
 logger = get_logger(__name__)
 
+T = TypeVar("T")
+
+DAG_OUTPUT = "docs/ingestion_dag.md"
+# --profile artifacts go next to the DAG diagram
+PROFILE_DIR = "docs/profiles"
+
 
 @dataclass(slots=True)
 class PipelineConfig:
@@ -25,15 +42,52 @@ class PipelineConfig:
     mode: str  # "sync" | "async"
     base_url: str
     table: str
+    schema: Optional[str] = None  # processing.schemas resource to validate + load as (default: see pipeline_schema)
     batch_size: int = 500
-    # sync-specific
+    write_mode: str = "upsert"  # "upsert" (execute_values batches) | "copy" (COPY + merge)
+    cache_ttl: Optional[int] = None  # seconds; enables the Redis response cache for this pipeline
+    incremental: bool = False  # skip rows whose content hash is unchanged
+    parallel_threshold: Optional[int] = 50_000  # validate in a process pool at >= N rows (null = never)
+    validation_workers: Optional[int] = None  # process pool size (null = cpu count)
+    columnar: bool = False  # validate into an array-backed ColumnBatch instead of record objects
+    streaming: bool = False  # overlap fetch, validation and writes (orchestrator.streaming)
+    queue_depth: int = 2  # streaming: batches buffered between stages before upstream blocks
+    checkpoint_size: Optional[int] = None  # async: ids per checkpointed chunk (enables --resume)
+    decoder: str = "auto"  # JSON decoder: auto | orjson | msgspec | json (ingestion.codecs)
+    decode_offload_bytes: Optional[int] = 262_144  # async: decode bodies this large off the loop (null = never)
+    # scheduling
+    depends_on: List[str] = field(default_factory=list)  # start only after these succeed
+    slots: int = 1  # how many of the global max_parallel slots this pipeline occupies
+    # sync-specific (url_pattern + id_range work too, fetched on `concurrency` threads)
     endpoint: Optional[str] = None
+    endpoints: Optional[List[str]] = None  # several endpoints, fetched on `concurrency` threads
     # async-specific
     url_pattern: Optional[str] = None
     id_range: Optional[Dict[str, int]] = None
+    concurrency: int = 50  # max in-flight requests (sync: threads + pooled connections)
+    connector: Optional[Dict[str, Any]] = None  # aiohttp.TCPConnector settings
+    rate_limit: Optional[Dict[str, Any]] = None  # per-host token bucket + AIMD concurrency (RateLimiter)
+    batching: Optional[Dict[str, Any]] = None  # collection requests instead of one per id (CollectionBatching)
+
+
+@dataclass(slots=True)
+class RunContext:
+    """Resources created once in run_all and shared by every pipeline."""
+    store: EventStore
+    db: Optional[PostgresDB] = None  # pooled psycopg2 (sync paths + event store)
+    async_db: Optional[AsyncPostgresDB] = None  # asyncpg pool (async write path)
+    cache: Optional[RedisCache] = None  # Redis clients; pipelines opt in via cache_ttl
+    coalescer: Optional[SingleFlight] = None  # in-process LRU + single-flight for fetches
+    breaker: Optional[CircuitBreaker] = None  # per-host circuit breaker for every fetch
+    budget: Optional[RetryBudget] = None  # retry tokens shared by every fetch
+    profiler: Optional[Profiler] = None  # set by --profile (pipelines then run one at a time)
+    checkpoints: Optional[CheckpointStore] = None  # per-chunk progress of checkpointed pipelines
+    resume: bool = False  # --resume: skip chunks a previous run finished
 
 
 def load_config(path: str) -> Dict[str, Any]:
+    import yaml
+
     with open(path, "r") as f:
         return yaml.safe_load(f)
 
@@ -41,87 +95,416 @@ def load_config(path: str) -> Dict[str, Any]:
 def parse_pipelines(cfg: Dict[str, Any]) -> List[PipelineConfig]:
     items = []
     for p in cfg.get("pipelines", []):
-        items.append(PipelineConfig(**p))
+        pipeline = PipelineConfig(**p)
+        pipeline.schema = pipeline_schema(pipeline)  # a bad `schema:` fails here, before any run
+        items.append(pipeline)
     return items
 
 
-async def run_pipeline_async(p: PipelineConfig, store: EventStore) -> str:
+def pipeline_schema(p: PipelineConfig) -> str:
+    """
+    The processing.schemas resource a pipeline validates and loads as: `schema:` if set,
+    else the table name if it is a registered schema, else the resource in the
+    pipeline's URL, else posts (the layout every table was loaded with before schemas).
+    """
+    from processing.schemas import get_schema, schema_for_url
+
+    if p.schema:
+        try:
+            return get_schema(p.schema).name
+        except ValueError as e:
+            raise ValueError(f"{p.name}: {e}") from None
+    try:
+        return get_schema(p.table).name
+    except ValueError:
+        pass
+    path = p.endpoint or (p.endpoints or [""])[0] or p.url_pattern or ""
+    try:
+        name = schema_for_url(path.replace("{id}", "1")).name
+    except ValueError:
+        name = "posts"
+    logger.warning(
+        "[%s] table %r is not a registered schema; loading it as %r (set `schema:` to choose).",
+        p.name, p.table, name,
+    )
+    return name
+
+
+async def _process_and_save(processor: DataProcessor, raw: List[Any], stats: WriteStats) -> int:
+    recs = await processor.process_async(raw)
+    stats += await processor.save_to_db_async(recs)
+    return len(recs)
+
+
+async def run_pipeline_async(p: PipelineConfig, ctx: RunContext) -> str:
     """
     Return final status string: SUCCESS | FAILED
     """
+    from processing.processor import DataProcessor, WriteStats
+
+    # Labels every metric recorded by this task and the threads it hands work to
+    metrics.current_pipeline.set(p.name)
+    store = ctx.store
+    # Per-pipeline view (own TTL + hit/miss counters) over the shared Redis clients
+    cache = None
+    if ctx.cache is not None and p.cache_ttl:
+        from db.redis_cache import RedisCache
+        cache = RedisCache(ctx.cache.client, ctx.cache.async_client, ttl=p.cache_ttl)
     start = datetime.utcnow()
-    store.log(IngestionEvent(pipeline=p.name, status="RUNNING", started_at=start))
+    await store.log_async(IngestionEvent(pipeline=p.name, status="RUNNING", started_at=start))
+    limiter = RateLimiter(**p.rate_limit) if p.rate_limit and p.mode == "async" else None
+    stream_stats: Optional[StreamStats] = None
+    extra: Dict[str, Any] = {}  # more IngestionEvent.stats sections
 
     try:
-        processor = DataProcessor(table_name=p.table, batch_size=p.batch_size)
+        processor = DataProcessor(
+            table_name=p.table, batch_size=p.batch_size, write_mode=p.write_mode, db=ctx.db,
+            async_db=ctx.async_db if p.mode == "async" else None,
+            incremental=p.incremental,
+            parallel_threshold=p.parallel_threshold, workers=p.validation_workers,
+            columnar=p.columnar, schema=pipeline_schema(p),
+        )
+        stats = WriteStats()
 
         if p.mode == "sync":
             # Sync mode can still live in async orchestrator via to_thread
-            def _run_sync() -> int:
-                ing = SyncIngestor()
-                url = f"{p.base_url}{p.endpoint}"
-                raw = ing.fetch(url)
-                recs = processor.process(raw)
-                processor.save_to_db(recs)
-                return len(recs)
+            def _fetch_sync() -> Any:
+                from ingestion.sync_ingestor import SyncIngestor  # requests, loaded in the worker thread
+                urls = _sync_requests(p)
+                with SyncIngestor(
+                        cache=cache, coalescer=ctx.coalescer, breaker=ctx.breaker, budget=ctx.budget,
+                        pool_size=p.concurrency, max_workers=p.concurrency, decoder=p.decoder,
+                ) as ing:
+                    if len(urls) == 1 and isinstance(urls[0], str):
+                        return ing.fetch(urls[0])  # a single endpoint's payload, errors propagate
+                    return _flatten(ing.ingest_all(urls))
+
+            def _run_sync() -> Tuple[int, WriteStats]:
+                recs = processor.process(_fetch_sync())
+                return len(recs), processor.save_to_db(recs)
 
-            count = await asyncio.to_thread(_run_sync)
+            if p.streaming:
+                # One response, but validation of batch n+1 overlaps the write of batch n
+                raw = await asyncio.to_thread(_profiled, _fetch_sync)
+                count, stats, stream_stats = await stream_to_db(
+                    _iter_payload(raw), processor, p.batch_size, p.queue_depth,
+                )
+            else:
+                count, stats = await asyncio.to_thread(_profiled, _run_sync)
 
         elif p.mode == "async":
-            # Build URL list from pattern and range
             if not (p.url_pattern and p.id_range):
                 raise ValueError(f"{p.name}: async pipeline requires url_pattern and id_range")
-            urls = [
-                f"{p.base_url}{p.url_pattern.replace('{id}', str(i))}"
-                for i in range(p.id_range["start"], p.id_range["end"] + 1)
-            ]
-            ing = AsyncIngestor(urls)
-            raw_list = await ing.run()
-            raw = [r for r in raw_list if r]
-            recs = await processor.process_async(raw)
-            await processor.save_to_db_async(recs)
-            count = len(recs)
+
+            async def _ingest(ids: IdRange) -> Tuple[int, int, Optional[StreamStats]]:
+                return await _ingest_ids(p, ctx, processor, stats, ids, cache, limiter)
+
+            if p.checkpoint_size and ctx.checkpoints is not None:
+                count, stream_stats, extra["checkpoints"] = await _ingest_checkpointed(p, ctx, _ingest)
+            else:
+                count, _, stream_stats = await _ingest((p.id_range["start"], p.id_range["end"]))
 
         else:
             raise ValueError(f"{p.name}: invalid mode {p.mode}")
 
-        store.log(IngestionEvent(
+        if cache is not None:
+            logger.info(f"[{p.name}] response cache hits={cache.hits} misses={cache.misses}")
+
+        await store.log_async(IngestionEvent(
             pipeline=p.name, status="SUCCESS",
             started_at=start, finished_at=datetime.utcnow(),
-            records=count
+            records=count, inserted=stats.inserted, updated=stats.updated, unchanged=stats.unchanged,
+            stats=_run_stats(limiter, stream_stats, extra),
         ))
         return "SUCCESS"
 
     except Exception as e:
         logger.exception(f"[{p.name}] failed.")
-        store.log(IngestionEvent(
+        await store.log_async(IngestionEvent(
             pipeline=p.name, status="FAILED",
             detail=str(e), started_at=start, finished_at=datetime.utcnow(),
+            stats=_run_stats(limiter, stream_stats, extra),
         ))
         return "FAILED"
 
 
-async def run_all(cfg_path: str) -> None:
+async def _ingest_ids(p: PipelineConfig, ctx: RunContext, processor: DataProcessor, stats: WriteStats,
+                      ids: IdRange, cache: Optional[RedisCache],
+                      limiter: Optional[RateLimiter]) -> Tuple[int, int, Optional[StreamStats]]:
+    """
+    Fetch, validate and save ids[0]..ids[1] (inclusive) of an async pipeline,
+    adding to `stats`. Returns (records, failed fetches, stream stats if streaming).
+    """
+    from ingestion.async_ingestor import AsyncIngestor
+
+    ing = AsyncIngestor(
+        requests_for(p, ids), concurrency=p.concurrency, connector=p.connector,
+        cache=cache, coalescer=ctx.coalescer, breaker=ctx.breaker, budget=ctx.budget,
+        limiter=limiter, decoder=p.decoder, offload_decode_bytes=p.decode_offload_bytes,
+    )
+    if p.streaming:
+        count, written, stream = await stream_to_db(ing.stream(), processor, p.batch_size, p.queue_depth)
+        stats += written
+        return count, stream.failed_fetches, stream
+
+    # Validate + save each batch_size worth of responses while the rest are still in flight
+    count = failed = 0
+    raw: List[Any] = []
+    async for item in ing.stream():
+        if item:
+            raw.append(item)
+        elif item is None:
+            failed += 1
+        if len(raw) >= p.batch_size:
+            count += await _process_and_save(processor, raw, stats)
+            raw = []
+    if raw:
+        count += await _process_and_save(processor, raw, stats)
+    return count, failed, None
+
+
+def requests_for(p: PipelineConfig, ids: IdRange) -> Iterator[Any]:
+    """Lazily, what to fetch for ids[0]..ids[1]: per-id URLs, or BatchRequests when p.batching is set."""
+    if p.batching:
+        from ingestion.batching import CollectionBatching
+        return CollectionBatching(**p.batching).requests(p.base_url, p.url_pattern, ids[0], ids[1])
+    return (f"{p.base_url}{p.url_pattern.replace('{id}', str(i))}" for i in range(ids[0], ids[1] + 1))
+
+
+async def _ingest_checkpointed(
+        p: PipelineConfig, ctx: RunContext,
+        ingest: Callable[[IdRange], Awaitable[Tuple[int, int, Optional[StreamStats]]]],
+) -> Tuple[int, Optional[StreamStats], Dict[str, int]]:
+    """
+    Ingest the id range one checkpoint_size chunk at a time, recording each chunk
+    in ctx.checkpoints when it finishes. With ctx.resume, chunks already DONE are
+    skipped; otherwise the pipeline's old checkpoints are cleared first. A chunk
+    with failed fetches is INCOMPLETE and is fetched again on resume.
+    """
+    store = ctx.checkpoints
+    chunks = id_chunks(p.id_range["start"], p.id_range["end"], p.checkpoint_size)
+    if ctx.resume:
+        pending = pending_chunks(chunks, await asyncio.to_thread(store.done_ranges, p.name))
+        logger.info("[%s] resuming: %s of %s chunk(s) left", p.name, len(pending), len(chunks))
+    else:
+        await asyncio.to_thread(store.clear, p.name)
+        pending = chunks
+
+    count = incomplete = 0
+    merged: Optional[StreamStats] = None
+    for chunk in pending:
+        try:
+            n, failed, stream = await ingest(chunk)
+        except Exception:
+            await asyncio.to_thread(store.mark, p.name, chunk, "FAILED")
+            raise
+        count += n
+        incomplete += failed > 0
+        if stream is not None:
+            merged = merged if merged is not None else StreamStats()
+            merged += stream
+        await asyncio.to_thread(store.mark, p.name, chunk, "INCOMPLETE" if failed else "DONE", n)
+    return count, merged, {"chunks": len(chunks), "skipped": len(chunks) - len(pending), "incomplete": incomplete}
+
+
+def _profiled(fn: Callable[[], T]) -> T:
+    """Call fn in this worker thread; cProfile is per thread, so under --profile it profiles itself."""
+    from utils.profiling import thread_cpu
+
+    with thread_cpu():
+        return fn()
+
+
+async def _run_profiled(p: PipelineConfig, ctx: RunContext) -> str:
+    """
+    run_pipeline_async under ctx.profiler: tracemalloc for the whole run, cProfile
+    on the event loop (async) or in the worker thread (sync), loop lag for async.
+    """
+    is_async = p.mode == "async"
+    with ctx.profiler.pipeline(p.name, cpu_here=is_async) as prof:
+        if not is_async:
+            return await run_pipeline_async(p, ctx)
+        async with prof.loop_lag():
+            return await run_pipeline_async(p, ctx)
+
+
+def _run_stats(limiter: Optional[RateLimiter], stream_stats: Optional[StreamStats] = None,
+               extra: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """Extra per-run numbers for IngestionEvent.stats (None when there is nothing to report)."""
+    out: Dict[str, Any] = dict(extra or {})
+    if limiter is not None and limiter.hosts:
+        out["rate_limit"] = limiter.stats()
+    if stream_stats is not None:
+        out["streaming"] = stream_stats.to_dict()
+    return out or None
+
+
+def _sync_requests(p: PipelineConfig) -> List[Any]:
+    """What a sync pipeline fetches: endpoint, endpoints, then url_pattern over id_range."""
+    urls: List[Any] = [f"{p.base_url}{e}" for e in ([p.endpoint] if p.endpoint else []) + (p.endpoints or [])]
+    if p.url_pattern and p.id_range:
+        urls.extend(requests_for(p, (p.id_range["start"], p.id_range["end"])))
+    if not urls:
+        raise ValueError(f"{p.name}: sync pipeline requires endpoint, endpoints or url_pattern + id_range")
+    return urls
+
+
+def _flatten(results: List[Any]) -> List[Any]:
+    """ingest_all results as one list of records (list payloads spliced in, failed fetches dropped)."""
+    records: List[Any] = []
+    for result in results:
+        if isinstance(result, list):
+            records.extend(result)
+        elif result:
+            records.append(result)
+    return records
+
+
+async def _iter_payload(raw: Any) -> AsyncGenerator[Any, None]:
+    """A fetched payload as an async generator (a dict is one item, a list its items)."""
+    for item in raw if isinstance(raw, list) else [raw]:
+        yield item
+
+
+async def _refresh_metrics(path: str, interval: float) -> None:
+    """Rewrite the Prometheus textfile every `interval` seconds while pipelines run."""
+    while True:
+        try:
+            await asyncio.to_thread(metrics.write_textfile, path)
+        except OSError:
+            logger.exception("Failed to write metrics textfile %s", path)
+        await asyncio.sleep(interval)
+
+
+def _prune_disabled_deps(pipelines: List[PipelineConfig], all_names: List[str]) -> None:
+    """Dependencies on disabled pipelines are treated as satisfied."""
+    enabled = {p.name for p in pipelines}
+    for p in pipelines:
+        disabled = [d for d in p.depends_on if d in all_names and d not in enabled]
+        if disabled:
+            logger.warning(f"[{p.name}] ignoring dependencies on disabled pipelines: {disabled}")
+            p.depends_on = [d for d in p.depends_on if d not in disabled]
+
+
+async def run_all(cfg_path: str, profile: bool = False, resume: bool = False) -> None:
     cfg = load_config(cfg_path)
-    pipelines = [p for p in parse_pipelines(cfg) if p.enabled]
+    all_pipelines = parse_pipelines(cfg)
+    pipelines = [p for p in all_pipelines if p.enabled]
+    _prune_disabled_deps(pipelines, [p.name for p in all_pipelines])
+    from db.postgres import PostgresDB
 
-    store = EventStore()
+    # One thread-safe connection pool shared by the EventStore and every DataProcessor
+    pool_cfg = cfg.get("db_pool") or {}
+    db = PostgresDB(
+        pool_min=pool_cfg.get("min", 1),
+        pool_max=pool_cfg.get("max", len(pipelines) + 1),
+    )
+    store_cfg = cfg.get("event_store") or {}
+    store = EventStore(
+        db=db,
+        flush_size=store_cfg.get("flush_size", 100),
+        flush_interval=store_cfg.get("flush_interval", 1.0),
+    )
     store.ensure_table()
+    # Buffered: status changes are queued and batch-inserted off the event loop
+    await store.start()
+
+    # One asyncpg pool shared by every async pipeline (writes stay on the event loop)
+    async_db = None
+    if any(p.mode == "async" for p in pipelines):
+        from db.async_postgres import AsyncPostgresDB
+        async_db = AsyncPostgresDB()
+    # Redis clients shared by every pipeline that sets cache_ttl
+    cache = None
+    if any(p.cache_ttl for p in pipelines):
+        from db.redis_cache import RedisCache
+        cache = RedisCache.from_env()
+    # Concurrent pipelines asking for the same URL share one request
+    mem_cfg = cfg.get("memory_cache") or {}
+    coalescer = SingleFlight(maxsize=mem_cfg.get("maxsize", 1024), ttl=mem_cfg.get("ttl", 60))
+    # Failing hosts trip one breaker for every pipeline; retries draw on one shared budget
+    res_cfg = cfg.get("resilience") or {}
+    breaker = CircuitBreaker(
+        failure_threshold=res_cfg.get("failure_threshold", 5),
+        reset_timeout=res_cfg.get("reset_timeout", 30.0),
+    )
+    budget_cfg = res_cfg.get("retry_budget") or {}
+    budget = RetryBudget(
+        capacity=budget_cfg.get("capacity", 100),
+        refill_per_s=budget_cfg.get("refill_per_s", 10.0),
+    )
+    # Chunk progress for pipelines with checkpoint_size, so --resume can skip finished id ranges
+    checkpoints = None
+    if any(p.checkpoint_size and p.mode == "async" for p in pipelines):
+        checkpoints = CheckpointStore(db=db)
+        checkpoints.ensure_table()
+    ctx = RunContext(
+        store=store, db=db, async_db=async_db, cache=cache, coalescer=coalescer,
+        breaker=breaker, budget=budget, checkpoints=checkpoints, resume=resume,
+    )
+    max_parallel = cfg.get("max_parallel")
+    if profile:
+        from utils.profiling import Profiler
+        ctx.profiler = Profiler(PROFILE_DIR)
+        # Overlapping pipelines would show up in each other's profiles
+        max_parallel = 1
+        logger.info("Profiling enabled: pipelines run one at a time, artifacts in %s", PROFILE_DIR)
 
-    # Run all enabled pipelines concurrently (safe: mix of asyncio + threads)
-    results = await asyncio.gather(*(run_pipeline_async(p, store) for p in pipelines), return_exceptions=False)
+    async def _log_skipped(p: PipelineConfig, reason: str) -> None:
+        now = datetime.utcnow()
+        await store.log_async(IngestionEvent(
+            pipeline=p.name, status="SKIPPED", detail=reason, started_at=now, finished_at=now,
+        ))
+
+    # Topologically scheduled: independent pipelines overlap (mix of asyncio + threads),
+    # dependents start as soon as their parents succeed
+    scheduler = DagScheduler(
+        pipelines,
+        run=lambda p: _run_profiled(p, ctx) if ctx.profiler else run_pipeline_async(p, ctx),
+        max_parallel=max_parallel,
+        on_skip=_log_skipped,
+    )
+    metrics_cfg = cfg.get("metrics") or {}
+    metrics_server = metrics.start_http_server(metrics_cfg["port"]) if metrics_cfg.get("port") else None
+    refresher = None
+    if metrics_cfg.get("textfile"):
+        refresher = asyncio.create_task(
+            _refresh_metrics(metrics_cfg["textfile"], metrics_cfg.get("refresh_interval", 5.0))
+        )
+    try:
+        status_map = await scheduler.run()
+    finally:
+        if refresher is not None:
+            refresher.cancel()
+            await asyncio.gather(refresher, return_exceptions=True)
+            metrics.write_textfile(metrics_cfg["textfile"])  # final numbers
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        await store.aclose()  # drain queued events before the pool goes away
+        if cache is not None:
+            await cache.aclose()
+        if async_db:
+            await async_db.close()
+        db.close()
+    logger.info(f"Fetch coalescing stats: {coalescer.stats()}")
+    logger.info(f"Retry budget: {budget.denied} retries denied")
 
-    # Build a status map for DAG rendering
-    status_map = {pipelines[i].name: results[i] for i in range(len(pipelines))}
-    mermaid = mermaid_from_config(cfg, status_map)
-    write_mermaid(mermaid, "docs/ingestion_dag.md")
+    mermaid = mermaid_from_config(cfg, status_map, scheduler.durations)
+    write_mermaid(mermaid, DAG_OUTPUT)
+    if ctx.profiler is not None:
+        ctx.profiler.write_summary()
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Config-driven ingestion orchestrator")
     parser.add_argument("--config", default="configs/pipelines.yaml", help="Path to YAML config")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"cProfile + tracemalloc (+ loop lag) per pipeline, written to {PROFILE_DIR}/")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip id chunks that a previous run checkpointed as DONE")
     args = parser.parse_args()
-    asyncio.run(run_all(args.config))
+    setup_logging()
+    asyncio.run(run_all(args.config, profile=args.profile, resume=args.resume))
 
 
 if __name__ == "__main__":
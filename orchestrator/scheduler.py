@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class DagScheduler:
+    """
+    Runs pipelines as a dependency DAG.
+
+    Each pipeline (anything with .name, .depends_on and .slots) starts as soon as
+    all of its parents have succeeded and enough of the global `max_parallel`
+    slots are free; independent branches overlap. If a parent does not succeed,
+    its descendants are marked SKIPPED and never run.
+    """
+
+    def __init__(
+            self,
+            pipelines: Sequence[Any],
+            run: Callable[[Any], Awaitable[str]],
+            max_parallel: Optional[int] = None,
+            on_skip: Optional[Callable[[Any, str], Awaitable[None]]] = None,
+    ) -> None:
+        """
+        :param pipelines: Pipeline configs to schedule.
+        :param run: Coroutine function running one pipeline; returns SUCCESS | FAILED.
+        :param max_parallel: Total slots shared by all pipelines (None = unbounded).
+        :param on_skip: Optional callback for pipelines skipped because a parent failed.
+        """
+        self.pipelines = {p.name: p for p in pipelines}
+        if len(self.pipelines) != len(pipelines):
+            raise ValueError("Pipeline names must be unique")
+        self.run_fn = run
+        self.max_parallel = max_parallel
+        self.on_skip = on_skip
+        self.statuses: Dict[str, str] = {}
+        self.durations: Dict[str, float] = {}
+        self._free = max_parallel
+        self._cond: Optional[asyncio.Condition] = None
+
+    def topo_order(self) -> List[str]:
+        """Kahn's algorithm; raises ValueError on unknown dependencies or cycles."""
+        indegree = {name: 0 for name in self.pipelines}
+        children: Dict[str, List[str]] = {name: [] for name in self.pipelines}
+        for name, p in self.pipelines.items():
+            for dep in p.depends_on:
+                if dep not in self.pipelines:
+                    raise ValueError(f"{name}: depends on unknown pipeline {dep!r}")
+                indegree[name] += 1
+                children[dep].append(name)
+
+        ready = [name for name, deg in indegree.items() if deg == 0]
+        order: List[str] = []
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for child in children[name]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    ready.append(child)
+
+        if len(order) != len(self.pipelines):
+            cyclic = sorted(set(self.pipelines) - set(order))
+            raise ValueError(f"Dependency cycle between pipelines: {cyclic}")
+        return order
+
+    async def run(self) -> Dict[str, str]:
+        """Run every pipeline respecting dependencies and slots; returns name -> status."""
+        order = self.topo_order()
+        self._cond = asyncio.Condition()
+        finished = {name: asyncio.Event() for name in order}
+
+        async def _one(name: str) -> None:
+            p = self.pipelines[name]
+            try:
+                for dep in p.depends_on:
+                    await finished[dep].wait()
+                failed = [d for d in p.depends_on if self.statuses.get(d) != "SUCCESS"]
+                if failed:
+                    self.statuses[name] = "SKIPPED"
+                    reason = f"upstream did not succeed: {', '.join(failed)}"
+                    logger.warning(f"[{name}] skipped, {reason}")
+                    if self.on_skip:
+                        await self.on_skip(p, reason)
+                    return
+
+                need = self._slots_needed(p)
+                await self._acquire(need)
+                started = time.perf_counter()
+                try:
+                    self.statuses[name] = await self.run_fn(p)
+                finally:
+                    self.durations[name] = time.perf_counter() - started
+                    await self._release(need)
+            except Exception:
+                logger.exception(f"[{name}] scheduler error.")
+                self.statuses[name] = "FAILED"
+            finally:
+                finished[name].set()
+
+        await asyncio.gather(*(_one(name) for name in order))
+        return self.statuses
+
+    # ---------- slots ----------
+
+    def _slots_needed(self, p: Any) -> int:
+        need = max(1, int(getattr(p, "slots", 1) or 1))
+        # A pipeline wider than the whole pool would wait forever: cap it
+        return min(need, self.max_parallel) if self.max_parallel else need
+
+    async def _acquire(self, need: int) -> None:
+        if self.max_parallel is None:
+            return
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._free >= need)
+            self._free -= need
+
+    async def _release(self, need: int) -> None:
+        if self.max_parallel is None:
+            return
+        async with self._cond:
+            self._free += need
+            self._cond.notify_all()
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Coroutine, Dict, List, Tuple
+
+from utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from processing.processor import DataProcessor, WriteStats
+
+logger = get_logger(__name__)
+
+# Marks the end of a stage's output
+_END = object()
+
+
+@dataclass(slots=True)
+class StreamStats:
+    """How the stages of one streaming run interacted (reported in IngestionEvent.stats)."""
+    batches: int = 0
+    failed_fetches: int = 0  # None items from the source
+    fetch_blocked_s: float = 0.0  # fetch waited for validation to take a batch (downstream slower)
+    validate_blocked_s: float = 0.0  # validation waited for the writer
+
+    def __iadd__(self, other: "StreamStats") -> "StreamStats":
+        self.batches += other.batches
+        self.failed_fetches += other.failed_fetches
+        self.fetch_blocked_s += other.fetch_blocked_s
+        self.validate_blocked_s += other.validate_blocked_s
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "failed_fetches": self.failed_fetches,
+            "fetch_blocked_s": round(self.fetch_blocked_s, 3),
+            "validate_blocked_s": round(self.validate_blocked_s, 3),
+        }
+
+
+async def _put(queue: asyncio.Queue, item: Any) -> float:
+    """queue.put(), returning how long it blocked on a full queue."""
+    if not queue.full():
+        queue.put_nowait(item)
+        return 0.0
+    start = time.perf_counter()
+    await queue.put(item)
+    return time.perf_counter() - start
+
+
+async def stream_to_db(
+        source: AsyncGenerator[Any, None],
+        processor: DataProcessor,
+        batch_size: int,
+        queue_depth: int = 2,
+) -> Tuple[int, WriteStats, StreamStats]:
+    """
+    Run fetch -> validate -> write as three overlapping stages.
+
+    Items from the `source` async generator (None = failed fetch, dropped) are grouped into
+    batch_size lists, validated with processor.process_async and written with
+    processor.save_to_db_async, each stage in its own task. Stages are joined
+    by queues holding at most `queue_depth` batches: when the DB is the slowest
+    stage, validation and then fetching block instead of buffering, so at most
+    2 * queue_depth + 3 batches are held at once. Batches are written in order
+    by a single writer. If any stage fails the others are cancelled and the
+    error is raised.
+
+    Returns (records written, write stats, stage stats).
+    """
+    from processing.processor import WriteStats
+
+    raw_q: asyncio.Queue = asyncio.Queue(maxsize=queue_depth)
+    rec_q: asyncio.Queue = asyncio.Queue(maxsize=queue_depth)
+    stats = WriteStats()
+    stream = StreamStats()
+    count = 0
+
+    async def fetch_stage() -> None:
+        batch: List[Any] = []
+        async with aclosing(source) as items:
+            async for item in items:
+                if item:
+                    batch.append(item)
+                elif item is None:
+                    stream.failed_fetches += 1
+                if len(batch) >= batch_size:
+                    stream.fetch_blocked_s += await _put(raw_q, batch)
+                    batch = []
+        if batch:
+            stream.fetch_blocked_s += await _put(raw_q, batch)
+        await raw_q.put(_END)
+
+    async def validate_stage() -> None:
+        while (batch := await raw_q.get()) is not _END:
+            records = await processor.process_async(batch)
+            stream.validate_blocked_s += await _put(rec_q, records)
+        await rec_q.put(_END)
+
+    async def write_stage() -> None:
+        nonlocal stats, count
+        while (records := await rec_q.get()) is not _END:
+            stats += await processor.save_to_db_async(records)
+            count += len(records)
+            stream.batches += 1
+
+    await _run_stages([fetch_stage(), validate_stage(), write_stage()])
+    logger.info("Streamed %s record(s) in %s batch(es): %s", count, stream.batches, stream.to_dict())
+    return count, stats, stream
+
+
+async def _run_stages(stages: List[Coroutine[Any, Any, None]]) -> None:
+    """Await every stage; on the first failure cancel the rest and re-raise."""
+    tasks = [asyncio.create_task(stage) for stage in stages]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
@@ -1,16 +1,19 @@
 from __future__ import annotations
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from pathlib import Path
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
-def mermaid_from_config(cfg: Dict[str, Any], latest_status: Dict[str, str]) -> str:
+def mermaid_from_config(cfg: Dict[str, Any], latest_status: Dict[str, str],
+                        durations: Optional[Dict[str, float]] = None) -> str:
     """
-    Build a simple Mermaid graph where each pipeline is a node.
-    Color nodes by latest status: SUCCESS=green, FAILED=red, RUNNING=yellow, default=gray.
+    Build a Mermaid graph where each pipeline is a node and each depends_on is an edge.
+    Color nodes by latest status: SUCCESS=green, FAILED=red, RUNNING=yellow,
+    SKIPPED=orange, default=gray. Nodes that ran are labelled with their duration.
     """
+    durations = durations or {}
     lines: List[str] = []
     lines.append("```mermaid")
     lines.append("graph LR")
@@ -18,10 +21,14 @@ def mermaid_from_config(cfg: Dict[str, Any], latest_status: Dict[str, str]) -> s
     lines.append("  classDef failed fill:#ffd6d6,stroke:#a00,stroke-width:1px;")
     lines.append("  classDef running fill:#fff3bf,stroke:#aa0,stroke-width:1px;")
     lines.append("  classDef pending fill:#eee,stroke:#999,stroke-width:1px;")
+    lines.append("  classDef skipped fill:#ffe8cc,stroke:#d80,stroke-width:1px;")
 
     for p in cfg.get("pipelines", []):
         name = p["name"]
-        label = f'{name}({name})'
+        text = name
+        if name in durations:
+            text = f"{name}<br/>{durations[name]:.2f}s"
+        label = f'{name}("{text}")'
         lines.append(f"  {label}")
         status = (latest_status.get(name) or "PENDING").upper()
         cls = "pending"
@@ -31,13 +38,14 @@ def mermaid_from_config(cfg: Dict[str, Any], latest_status: Dict[str, str]) -> s
             cls = "failed"
         elif status == "RUNNING":
             cls = "running"
+        elif status == "SKIPPED":
+            cls = "skipped"
         lines.append(f"  class {name} {cls};")
 
-    # (Optional) Add faux edges if you want a linear flow
-    # for i in range(len(cfg.get('pipelines', [])) - 1):
-    #     a = cfg['pipelines'][i]['name']
-    #     b = cfg['pipelines'][i+1]['name']
-    #     lines.append(f"  {a} --> {b}")
+    # Dependency edges: parent --> child
+    for p in cfg.get("pipelines", []):
+        for dep in p.get("depends_on") or []:
+            lines.append(f"  {dep} --> {p['name']}")
 
     lines.append("```")
     return "\n".join(lines)
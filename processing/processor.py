@@ -1,56 +1,65 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 import asyncio
+import atexit
+import multiprocessing
+import threading
 
-from psycopg2.extras import execute_values
-
-from db.postgres import PostgresDB
+from processing.schemas import POSTS, ColumnBatch, Schema, get_schema
+from utils import metrics
 from utils.logger import get_logger
 
+if TYPE_CHECKING:
+    # Drivers are imported where they're used, so validation (and its worker
+    # processes) never loads psycopg2 / asyncpg
+    from db.async_postgres import AsyncPostgresDB
+    from db.postgres import PostgresDB
+
 logger = get_logger(__name__)
 
 
 # --------------------------------
-# 1) Lightweight schema model
+# 1) Schema model (generated by processing.schemas)
 # --------------------------------
+# jsonplaceholder posts: PostRecord(id, title, body, user_id=None) with
+# from_dict / content_hash, and the columnar PostBatch (title(i), body(i), ...)
+PostRecord = POSTS.record
+PostBatch = POSTS.batch
+
+# What process() returns / save_to_db() accepts
+Records = Union[List[Any], ColumnBatch]
+
+
 @dataclass(slots=True)
-class PostRecord:
-    """
-    Minimal schema for jsonplaceholder posts.
-    Using dataclass (with __slots__) for:
-     - type hints
-     -low memory footprint
-     -basic runtime validation (custom from_dict)
-    """
+class WriteStats:
+    """Outcome of a save: rows inserted, updated, and skipped because nothing changed."""
 
-    id: int
-    title: str
-    body: str
-    user_id: Optional[int] = field(default=None)
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
 
-    @staticmethod
-    def from_dict(d: Dict[str, Any]) -> "PostRecord":
+    def __iadd__(self, other: "WriteStats") -> "WriteStats":
+        self.inserted += other.inserted
+        self.updated += other.updated
+        self.unchanged += other.unchanged
+        return self
+
+    def add_counts(self, row: Any, sent: int) -> int:
         """
-        Coerce & validate
-        :param d:
-        :return:
+        Add an (inserted, updated) result row for `sent` rows written; rows that were
+        sent but neither inserted nor updated were skipped as unchanged.
+        Returns how many rows the statement actually wrote.
         """
-
-        try:
-            """ Accept either 'userId' or 'user_id """
-            raw_user_id = d.get("user_id", d.get("userId"))
-            return PostRecord(
-                id=int(d["id"]),
-                title=str(d["title"]),
-                body=str(d["body"]),
-                user_id=int(raw_user_id) if raw_user_id is not None else None,
-            )
-        except KeyError as e:
-            raise ValueError(f"Missing required key: {e}") from e
-        except (TypeError, ValueError) as e:
-            raise ValueError(f"Bad field types: {e}") from e
+        written = int(row["inserted"]) + int(row["updated"])
+        self.inserted += int(row["inserted"])
+        self.updated += int(row["updated"])
+        if sent:
+            self.unchanged += sent - written
+        return written
 
 
 # -----------------------------------------
@@ -60,141 +69,317 @@ class PostRecord:
 class DataProcessor:
     """
     Enterprise-grade processor:
-    - Validate & normalize raw data -> PostRecord(s)
+    - Validate & normalize raw data -> records of its schema (processing.schemas),
+      or one columnar batch
     - Ensures table exists
-    - Bulk upserts in batches with ON CONFLICT
-    - Sync API + async wrapper
+    - Bulk upserts in batches with ON CONFLICT, or COPY into a staging table + one merge
+    - Optional change detection: a content hash per row lets unchanged rows be skipped
+    - Large payloads are validated in parallel across worker processes
+    - Sync API + async API (native asyncpg when given an AsyncPostgresDB)
     """
 
+    WRITE_MODES = ("upsert", "copy")
+
     def __init__(
             self,
             table_name: str = 'posts',
             batch_size: int = 500,
             db: Optional[PostgresDB] = None,
+            write_mode: str = "upsert",
+            async_db: Optional[AsyncPostgresDB] = None,
+            incremental: bool = False,
+            parallel_threshold: Optional[int] = 50_000,
+            workers: Optional[int] = None,
+            chunk_size: int = 10_000,
+            columnar: bool = False,
+            schema: Union[str, Schema] = "posts",
     ) -> None:
+        if write_mode not in self.WRITE_MODES:
+            raise ValueError(f"write_mode must be one of {self.WRITE_MODES}, got {write_mode!r}")
         self.table_name = table_name
         self.batch_size = batch_size
-        self.db = db or PostgresDB()  # lazy connect via PostgresDB
+        if db is None:
+            from db.postgres import PostgresDB
+            db = PostgresDB()  # lazy connect via PostgresDB
+        self.db = db
+        self.write_mode = write_mode
+        self.async_db = async_db  # shared asyncpg pool for save_to_db_async (optional)
+        self.incremental = incremental  # skip rows whose content_hash hasn't changed
+        # Payloads with >= parallel_threshold rows are validated in a process pool (None = never)
+        self.parallel_threshold = parallel_threshold
+        self.workers = workers  # pool size; None = os.cpu_count()
+        self.chunk_size = max(1, chunk_size)
+        self.columnar = columnar  # process() returns one ColumnBatch instead of records
+        # Record type, validator, DDL and upsert SQL of what this processor loads
+        self.schema = get_schema(schema) if isinstance(schema, str) else schema
 
     # --------------- Public API ---------------
 
     def process(self,
                 data: Union[Dict[str, Any], List[Dict[str, Any]]]
-                ) -> List[PostRecord]:
+                ) -> Records:
         """
-        Validate & normalize raw data into a list of PostRecord.
+        Validate & normalize raw data into a list of schema records
+        (or a single columnar batch when columnar=True).
         Accepts a single dict or a list of dicts.
         :param data:
         :return:
         """
 
         logger.info("Processing data ...")
-        records: List[PostRecord] = []
 
         if isinstance(data, dict):
-            try:
-                records.append(PostRecord.from_dict(data))
-            except ValueError as v:
-                logger.warning(f"Skipping bad records: {v}")
-        elif isinstance(data, list):
-            for idx, item in enumerate(data):
-                try:
-                    records.append((PostRecord.from_dict(item)))
-                except ValueError as e:
-                    # Skip bad rows but keep going: log with index for traceability
-                    logger.warning(f"Skipping bad record ar index{idx}:{e}")
-        else:
+            data = [data]
+        elif not isinstance(data, list):
             logger.warning("Unexpected payload type: expected dict or list of dicts.")
-            return []
+            return self.schema.batch() if self.columnar else []
+
+        with metrics.stage_timer("validate"):
+            if self.parallel_threshold is not None and len(data) >= self.parallel_threshold:
+                records, errors = self._validate_parallel(data)
+            else:
+                records, errors = _validate_chunk((0, data, self.schema, self.columnar))
+        metrics.ROWS.inc(len(records), stage="validate", outcome="valid")
+        metrics.ROWS.inc(len(errors), stage="validate", outcome="rejected")
+        for idx, e in errors:
+            # Skip bad rows but keep going: log with index for traceability
+            logger.warning("Skipping bad record ar index%s:%s", idx, e)
 
         logger.info(f"Validated {len(records)} records.")
         return records
 
+    def _validate_parallel(self, data: List[Dict[str, Any]]) -> Tuple[Records, List[Tuple[int, str]]]:
+        """
+        Validate chunk_size slices in the shared process pool. Chunks come back in
+        order, so records keep payload order and bad-record indexes stay global.
+        """
+        chunks = [
+            (i, data[i: i + self.chunk_size], self.schema, self.columnar)
+            for i in range(0, len(data), self.chunk_size)
+        ]
+        logger.info(f"Validating {len(data)} records in {len(chunks)} chunk(s) across worker processes...")
+        records: Records = self.schema.batch() if self.columnar else []
+        errors: List[Tuple[int, str]] = []
+        for chunk_records, chunk_errors in _process_pool(self.workers).map(_validate_chunk, chunks):
+            records.extend(chunk_records)
+            errors.extend(chunk_errors)
+        return records, errors
+
     async def process_async(self,
                             data: Union[Dict[str, Any], List[Dict[str, Any]]]
-                            ) -> List[PostRecord]:
+                            ) -> Records:
 
         """
         Async-friendly wrapper (runs validation in a a worker thread)
-        Useful if upstream is async and you want to avoid blocking loop
+        Useful if upstream is async and you want to avoid blocking loop.
+        Large payloads fan out to the process pool, so the thread mostly waits
+        (GIL released) instead of competing with the event loop.
         """
 
         return await asyncio.to_thread(self.process, data)
 
-    def save_to_db(self, records: Sequence[PostRecord]) -> None:
+    def save_to_db(self, records: Records) -> WriteStats:
 
         """
-        Create table if needed, then upsert in batches using execute_values.
-        Idempotent: primary key on id + ON CONFLICT DO UPDATE for title/body/user_id.
+        Create table if needed, then upsert using the configured write_mode:
+          - "upsert": execute_values in chunks of batch_size
+          - "copy":   COPY ... FROM STDIN into a temp staging table, then one
+                      INSERT ... SELECT ... ON CONFLICT merge (much faster for large loads)
+        Idempotent: the schema's primary key + ON CONFLICT DO UPDATE for the other columns.
+        In incremental mode rows whose content_hash is unchanged are skipped, both
+        before the write and by the ON CONFLICT ... WHERE guard.
+        Accepts records or a columnar batch; row tuples are built one batch_size
+        slice at a time (incremental COPY keeps the changed rows until the COPY).
+        Returns inserted/updated/unchanged counts.
+        """
+        stats = WriteStats()
+        if not records:
+            logger.info("No records to save.")
+            return stats
+
+        logger.info(
+            f"Saving {len(records)} record(s) to database "
+            f"(mode={self.write_mode}, batch_size={self.batch_size}, incremental={self.incremental})..."
+        )
+        with metrics.stage_timer("save"):
+            self._ensure_table()
+
+            chunks = self._row_chunks(records)
+            if self.incremental:
+                chunks = (self._drop_unchanged(chunk, stats) for chunk in chunks)
+                if self.write_mode == "copy":
+                    # The hash lookups need a cursor of their own; run them before COPY starts
+                    chunks = list(chunks)
+
+            if self.write_mode == "copy":
+                stats += self._copy_upsert(chunks)
+            else:
+                stats += self._batch_upsert(chunks)
+
+        _count_saved(stats)
+        logger.info(f"✅ Save completed: {stats}")
+        return stats
+
+    async def save_to_db_async(self, records: Records) -> WriteStats:
+        """
+        Async save. With an AsyncPostgresDB (asyncpg pool) the write runs natively on
+        the event loop: copy_records_to_table + merge in "copy" mode, unnest()-based
+        multi-row upserts otherwise. Without one, falls back to save_to_db in a worker thread.
         """
+        if self.async_db is None:
+            return await asyncio.to_thread(self.save_to_db, records)
+
+        stats = WriteStats()
         if not records:
             logger.info("No records to save.")
-            return
+            return stats
+
+        logger.info(
+            f"Saving {len(records)} record(s) to database via asyncpg "
+            f"(mode={self.write_mode}, batch_size={self.batch_size}, incremental={self.incremental})..."
+        )
+        chunks: Iterable[List[tuple]] = self._row_chunks(records)
+        key = self.schema.key
+        try:
+            with metrics.stage_timer("save"):
+                async with self.async_db.transaction() as conn:
+                    await conn.execute(self._table_ddl())
+                    if self.incremental:
+                        kept = []
+                        for chunk in chunks:
+                            found = await conn.fetch(
+                                f"SELECT {key}, content_hash FROM {self.table_name} WHERE {key} = ANY($1::bigint[])",
+                                [r[0] for r in chunk],
+                            )
+                            kept.append(_drop_known(chunk, {rec[key]: rec["content_hash"] for rec in found}, stats))
+                        chunks = kept
+
+                    if self.write_mode == "copy":
+                        await conn.execute(self._stage_ddl(_STAGE_TABLE))
+                        await conn.copy_records_to_table(
+                            _STAGE_TABLE, records=chain.from_iterable(chunks), columns=self.schema.write_columns
+                        )
+                        staged = await conn.fetchval(f"SELECT count(DISTINCT {key}) FROM {_STAGE_TABLE}")
+                        stats.add_counts(await conn.fetchrow(self._merge_sql(_STAGE_TABLE)), staged)
+                    else:
+                        sql = self._upsert_sql(f"SELECT * FROM unnest({self.schema.unnest_params()})")
+                        for chunk in chunks:
+                            if chunk:
+                                stats.add_counts(await conn.fetchrow(sql, *map(list, zip(*chunk))), len(chunk))
+        except Exception:
+            logger.exception("Failed to save records via asyncpg.")
+            raise
 
-        logger.info(f"Saving {len(records)} record(s) to database (batch_size={self.batch_size})...")
-        self._ensure_table()
+        _count_saved(stats)
+        logger.info(f"✅ Save completed: {stats}")
+        return stats
 
-        # Prepare tuples for bulk insert
-        rows = [
-            (r.id, r.title, r.body, r.user_id)
-            for r in records
-        ]
+    # ---------- Internal helpers ----------
+
+    def _row_chunks(self, records: Records) -> Iterator[List[tuple]]:
+        """(*columns, content_hash) tuples, one batch_size slice at a time."""
+        size = self.batch_size if self.batch_size > 0 else len(records)
+        for start in range(0, len(records), size):
+            if isinstance(records, ColumnBatch):
+                yield records.rows(start, start + size)
+            else:
+                yield self.schema.record_rows(records[start: start + size])
+
+    def _upsert_sql(self, values: str) -> str:
+        """INSERT ... ON CONFLICT returning (inserted, updated); see Schema.upsert_sql."""
+        return self.schema.upsert_sql(self.table_name, values, self.incremental)
+
+    def _stage_ddl(self, stage: str) -> str:
+        """Temp staging table shaped like the target, plus a load-order column."""
+        return (
+            f"CREATE TEMP TABLE {stage} "
+            f"(LIKE {self.table_name} INCLUDING DEFAULTS, _seq BIGSERIAL) ON COMMIT DROP;"
+        )
+
+    def _merge_sql(self, stage: str) -> str:
+        """Merge staged rows into the target; if a key repeats, the last one loaded wins."""
+        return self.schema.merge_sql(self.table_name, stage, self.incremental)
+
+    def _table_ddl(self) -> str:
+        return self.schema.ddl(self.table_name)
+
+    def _drop_unchanged(self, rows: List[tuple], stats: WriteStats) -> List[tuple]:
+        """Look up stored hashes (by primary key) and drop rows that wouldn't change anything."""
+        key = self.schema.key
+        with self.db.cursor() as cur:
+            cur.execute(
+                f"SELECT {key}, content_hash FROM {self.table_name} WHERE {key} = ANY(%s)",
+                ([r[0] for r in rows],),
+            )
+            known = {rec[key]: rec["content_hash"] for rec in cur.fetchall()}
+        return _drop_known(rows, known, stats)
+
+    def _batch_upsert(self, chunks: Iterable[List[tuple]]) -> WriteStats:
+        """Multi-row INSERT ... ON CONFLICT, one transaction per batch_size chunk."""
+        from psycopg2.extras import execute_values
 
-        columns = ("id", "title", "body", "user_id")  # must match table cols
-        insert_sql = f"""
-                    INSERT INTO {self.table_name} ({", ".join(columns)})
-                    VALUES %s
-                    ON CONFLICT (id)
-                    DO UPDATE SET
-                        title = EXCLUDED.title,
-                        body = EXCLUDED.body,
-                        user_id = EXCLUDED.user_id;
-                """
+        insert_sql = self._upsert_sql("VALUES %s")
+        stats = WriteStats()
 
         # Bulk in batches
-        for chunk in _chunks(rows, self.batch_size):
+        for chunk in chunks:
+            if not chunk:
+                continue
             try:
                 with self.db.cursor() as cur:
-                    execute_values(
+                    pages = execute_values(
                         cur,
                         insert_sql,
                         chunk,
-                        template="(%s, %s, %s, %s)",
+                        template=self.schema.values_template,
                         page_size=min(len(chunk), 1000),
+                        fetch=True,
                     )
                     # commit handled by PostgresDB.cursor() context manager
-                logger.debug(f"Upserted {len(chunk)} record(s).")
+                sent = len(chunk)
+                for page in pages:
+                    sent -= stats.add_counts(page, 0)
+                stats.unchanged += sent  # skipped by the ON CONFLICT ... WHERE guard
+                logger.debug("Upserted %d record(s).", len(chunk))
             except Exception:
                 # PostgresDB handles rollback; we add context to logs here
                 logger.exception("Failed to upsert batch.")
                 raise
+        return stats
 
-        logger.info("✅ Save completed.")
-
-    async def save_to_db_async(self, records: Sequence[PostRecord]) -> None:
+    def _copy_upsert(self, chunks: Iterable[List[tuple]]) -> WriteStats:
         """
-        Async-friendly wrapper (runs DB save in a worker thread).
+        Stream rows into a temp staging table with COPY, then merge into the target
+        with a single INSERT ... SELECT ... ON CONFLICT. Everything runs in one
+        transaction; the staging table is dropped on commit.
+        If an id appears more than once, the last occurrence wins (same as batch upserts).
         """
-        await asyncio.to_thread(self.save_to_db, records)
-
-    # ---------- Internal helpers ----------
+        stats = WriteStats()
+        try:
+            with self.db.cursor() as cur:
+                cur.execute(self._stage_ddl(_STAGE_TABLE))
+                cur.copy_expert(
+                    f"COPY {_STAGE_TABLE} ({', '.join(self.schema.write_columns)}) FROM STDIN",
+                    _CopyStream(chain.from_iterable(chunks)),
+                )
+                cur.execute(f"SELECT count(DISTINCT {self.schema.key}) AS staged FROM {_STAGE_TABLE}")
+                staged = cur.fetchone()["staged"]
+                cur.execute(self._merge_sql(_STAGE_TABLE))
+                stats.add_counts(cur.fetchone(), staged)
+                logger.debug("COPY-merged %d record(s).", staged)
+        except Exception:
+            logger.exception("Failed to COPY-upsert records.")
+            raise
+        return stats
 
     def _ensure_table(self) -> None:
         """
         Create the table if it doesn't exist (bootstrap).
         In production, a migration tool is preferred (Alembic/Flyway).
         """
-        ddl = f"""
-                CREATE TABLE IF NOT EXISTS {self.table_name} (
-                    id      BIGINT PRIMARY KEY,
-                    title   TEXT NOT NULL,
-                    body    TEXT NOT NULL,
-                    user_id BIGINT NULL
-                );
-                """
         try:
             with self.db.cursor() as cur:
-                cur.execute(ddl)
+                cur.execute(self._table_ddl())
             logger.debug(f"Ensured table exists: {self.table_name}")
         except Exception:
             logger.exception("Failed to ensure table exists.")
@@ -202,12 +387,104 @@ class DataProcessor:
 
 
 # -----------------------------
-# 3) Utility: batch chunking
+# 3) Utility: parallel validation
+# -----------------------------
+_POOLS: Dict[Optional[int], ProcessPoolExecutor] = {}  # by worker count
+_POOL_LOCK = threading.Lock()
+
+
+def _validate_chunk(
+        chunk: Tuple[int, Sequence[Dict[str, Any]], Schema, bool]
+) -> Tuple[Records, List[Tuple[int, str]]]:
+    """
+    Validate (offset, items, schema, columnar) into schema records or one columnar batch.
+    Returns the records + (global index, error) pairs. Runs in workers for large payloads.
+    """
+    offset, items, schema, columnar = chunk
+    records: Records = schema.batch() if columnar else []
+    from_dict = schema.record.from_dict
+    add = records.append_dict if columnar else (lambda d: records.append(from_dict(d)))
+    errors: List[Tuple[int, str]] = []
+    for idx, item in enumerate(items, start=offset):
+        try:
+            add(item)
+        except ValueError as e:
+            errors.append((idx, str(e)))
+    return records, errors
+
+
+def _process_pool(workers: Optional[int]) -> ProcessPoolExecutor:
+    """
+    One pool per worker count, created on first use (worker start-up is the expensive part).
+    spawn, not fork: by then the logging listener, to_thread workers and the event loop
+    are running, and a forked child would inherit their locks mid-use.
+    """
+    with _POOL_LOCK:
+        pool = _POOLS.get(workers)
+        if pool is None:
+            pool = _POOLS[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+            )
+            atexit.register(pool.shutdown)
+        return pool
+
+
+# -----------------------------
+# 4) Utility: batch chunking + COPY helpers
 # -----------------------------
-def _chunks(seq: Sequence[Any], size: int) -> Iterable[Sequence[Any]]:
-    """Yield fixed-size chunks from a sequence (last chunk may be smaller)."""
-    if size <= 0:
-        yield seq
-        return
-    for i in range(0, len(seq), size):
-        yield seq[i: i + size]
+_STAGE_TABLE = "_copy_stage"
+
+# COPY text format: backslash-escape the delimiter, row separators and backslash itself
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _count_saved(stats: WriteStats) -> None:
+    for outcome in ("inserted", "updated", "unchanged"):
+        metrics.ROWS.inc(getattr(stats, outcome), stage="save", outcome=outcome)
+
+
+def _drop_known(rows: List[tuple], known: Dict[int, str], stats: WriteStats) -> List[tuple]:
+    """Keep rows that are new or whose content_hash (last column) differs from the stored one."""
+    fresh = [r for r in rows if known.get(r[0]) != r[-1]]
+    stats.unchanged += len(rows) - len(fresh)
+    return fresh
+
+
+def _copy_line(row: Sequence[Any]) -> str:
+    return "\t".join(
+        "\\N" if v is None else str(v).translate(_COPY_ESCAPES) for v in row
+    ) + "\n"
+
+
+class _CopyStream:
+    """
+    Minimal read-only file object for cursor.copy_expert.
+    Encodes rows lazily, so COPY never needs the whole payload as one string.
+    """
+
+    def __init__(self, rows: Iterable[Sequence[Any]]) -> None:
+        self._lines = map(_copy_line, rows)
+        self._buf = ""
+
+    def read(self, size: int = -1) -> str:
+        parts, n = [self._buf], len(self._buf)
+        while size < 0 or n < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            parts.append(line)
+            n += len(line)
+        data = "".join(parts)
+        if size < 0:
+            self._buf = ""
+            return data
+        self._buf = data[size:]
+        return data[:size]
+
+    def readline(self, size: int = -1) -> str:
+        # copy_expert only calls read(); readline is here for file-API completeness
+        if not self._buf:
+            self._buf = next(self._lines, "")
+        line, self._buf = self._buf, ""
+        return line
+
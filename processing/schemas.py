@@ -0,0 +1,506 @@
+"""
+Schema registry: one declarative definition per API resource.
+
+A Schema is an ordered list of Fields. When the schema is built, it generates
+everything DataProcessor needs for that resource:
+
+  - the record type: a slots dataclass with from_dict() and content_hash()
+  - the validator behind from_dict(), compiled from source generated for these
+    exact fields, so it costs the same as a hand-written one
+  - a columnar batch type (ColumnBatch subclass with one accessor per field)
+  - the table DDL and the upsert / COPY-merge SQL
+
+Built in: posts, comments and albums (jsonplaceholder). A new resource is
+one definition:
+
+    register(Schema("photos", [
+        Field("id", "int"),
+        Field("album_id", "int", aliases=("albumId",)),
+        Field("title"),
+        Field("url"),
+        Field("thumbnail_url", aliases=("thumbnailUrl",)),
+    ]))
+
+Register schemas at import time of a module: worker processes that validate
+large payloads rebuild a schema they don't know from its definition.
+"""
+from __future__ import annotations
+
+import hashlib
+import keyword
+from array import array
+from dataclasses import dataclass, field as dc_field, make_dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+# type -> (Python converter, Postgres column type, asyncpg array type, array typecode)
+_TYPES: Dict[str, Tuple[str, str, str, Optional[str]]] = {
+    "int": ("int", "BIGINT", "bigint[]", "q"),
+    "float": ("float", "DOUBLE PRECISION", "double precision[]", "d"),
+    "str": ("str", "TEXT", "text[]", None),
+}
+HASH_COLUMN = "content_hash"
+
+
+@dataclass(frozen=True, slots=True)
+class Field:
+    """One column: payload key(s) -> coerced value -> table column."""
+    name: str  # column and record attribute; also the first payload key tried
+    type: str = "str"  # "int" | "float" | "str"
+    required: bool = True  # False: a missing or null value is stored as NULL
+    aliases: Tuple[str, ...] = ()  # payload keys tried after name, e.g. ("userId",)
+
+
+def content_hash(payload: str) -> str:
+    """Digest of a row's non-key values joined by \\x1f (see Schema); used to skip no-op updates."""
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class Schema:
+    """
+    A resource's fields plus the code and SQL generated from them. The key is
+    the first field: a required int, the table's primary key. Optional fields
+    come last (they default to None in the record type).
+    """
+
+    def __init__(self, name: str, fields: Sequence[Field], key: str = "id") -> None:
+        self.name = name
+        self.fields: Tuple[Field, ...] = tuple(fields)
+        self.key = key
+        self._check()
+        self.columns: Tuple[str, ...] = tuple(f.name for f in self.fields)
+        self.write_columns: Tuple[str, ...] = self.columns + (HASH_COLUMN,)
+        self._pg_arrays = tuple(_TYPES[f.type][2] for f in self.fields) + ("text[]",)
+        self.coerce: Callable[[Dict[str, Any]], tuple] = self._compile("coerce", self._coerce_source())
+        self.record_rows: Callable[[Sequence[Any]], List[tuple]] = self._compile(
+            "record_rows", self._record_rows_source())
+        self.record = self._record_type()
+        # ColumnBatch storage: one list of arrays / bytearrays per batch, laid out by _slots
+        self._slots, self._factories = self._column_layout()
+        self._append_values = self._compile("append_values", self._append_source())
+        self._batch_rows = self._compile("batch_rows", self._batch_rows_source())
+        self.batch = self._batch_type()
+
+    def __repr__(self) -> str:
+        return f"Schema({self.name!r}, columns={self.columns})"
+
+    def __reduce__(self):
+        # Generated functions don't pickle; worker processes look the schema up (or rebuild it)
+        return _restore_schema, (self.name, self.fields, self.key)
+
+    # ---------- SQL ----------
+
+    def ddl(self, table: str) -> str:
+        """CREATE TABLE IF NOT EXISTS, plus the content_hash column for tables that predate it."""
+        lines = []
+        for f in self.fields:
+            constraint = "PRIMARY KEY" if f.name == self.key else "NOT NULL" if f.required else "NULL"
+            lines.append(f"{f.name:<12} {_TYPES[f.type][1]} {constraint}")
+        lines.append(f"{HASH_COLUMN:<12} TEXT NULL")
+        columns = ",\n                    ".join(lines)
+        return f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    {columns}
+                );
+                ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {HASH_COLUMN} TEXT NULL;
+                """
+
+    def conflict_clause(self, table: str, incremental: bool) -> str:
+        """ON CONFLICT update; incremental mode leaves rows with the same content_hash untouched."""
+        updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in self.write_columns if c != self.key)
+        clause = f"ON CONFLICT ({self.key}) DO UPDATE SET {updates}"
+        if incremental:
+            clause += f" WHERE {table}.{HASH_COLUMN} IS DISTINCT FROM EXCLUDED.{HASH_COLUMN}"
+        return clause
+
+    def upsert_sql(self, table: str, values: str, incremental: bool = False) -> str:
+        """
+        INSERT ... ON CONFLICT statement; `values` is the VALUES/SELECT payload (driver-specific).
+        Returns one row per page: (inserted, updated) counts, via xmax = 0 for fresh inserts.
+        """
+        return _counted(f"""
+                    INSERT INTO {table} ({", ".join(self.write_columns)})
+                    {values}
+                    {self.conflict_clause(table, incremental)}
+                """)
+
+    def merge_sql(self, table: str, stage: str, incremental: bool = False) -> str:
+        """Merge staged rows into the target; if a key repeats, the last one loaded wins."""
+        cols = ", ".join(self.write_columns)
+        return _counted(f"""
+                    INSERT INTO {table} ({cols})
+                    SELECT DISTINCT ON ({self.key}) {cols}
+                    FROM {stage}
+                    ORDER BY {self.key}, _seq DESC
+                    {self.conflict_clause(table, incremental)}
+                """)
+
+    @property
+    def values_template(self) -> str:
+        """psycopg2 execute_values row template: (%s, %s, ...)."""
+        return f"({', '.join(['%s'] * len(self.write_columns))})"
+
+    def unnest_params(self) -> str:
+        """asyncpg array parameters, one per write column: $1::bigint[], $2::text[], ..."""
+        return ", ".join(f"${i}::{t}" for i, t in enumerate(self._pg_arrays, start=1))
+
+    # ---------- code generation ----------
+
+    def _check(self) -> None:
+        if not self.fields:
+            raise ValueError(f"schema {self.name!r} has no fields")
+        names = [f.name for f in self.fields]
+        reserved = set(dir(ColumnBatch)) | {"schema", "from_dict", HASH_COLUMN}
+        for f in self.fields:
+            if not f.name.isidentifier() or keyword.iskeyword(f.name) or f.name in reserved:
+                raise ValueError(f"schema {self.name!r}: invalid field name {f.name!r}")
+            if f.type not in _TYPES:
+                raise ValueError(f"schema {self.name!r}: field {f.name!r} has unknown type {f.type!r}")
+        if len(set(names)) != len(names):
+            raise ValueError(f"schema {self.name!r}: duplicate field names")
+        first = self.fields[0]
+        if first.name != self.key or first.type != "int" or not first.required:
+            raise ValueError(f"schema {self.name!r}: the first field must be the required int key {self.key!r}")
+        required = [f.required for f in self.fields]
+        if required != sorted(required, reverse=True):
+            raise ValueError(f"schema {self.name!r}: optional fields must come after required ones")
+
+    def _compile(self, name: str, source: str) -> Callable:
+        namespace: Dict[str, Any] = {"_hash": content_hash, "_I64_MIN": -2 ** 63, "_I64_MAX": 2 ** 63 - 1}
+        exec(compile(source, f"<schema {self.name}: {name}>", "exec"), namespace)
+        return namespace[name]
+
+    def _hash_expr(self, values: Sequence[str]) -> str:
+        """_hash(f"{v1}\\x1f{v2}...") over the non-key values (key excluded: the hash tracks content)."""
+        parts = "\\x1f".join(f"{{{v}}}" for f, v in zip(self.fields, values) if f.name != self.key)
+        return f'_hash(f"{parts}")'
+
+    def _coerce_source(self) -> str:
+        pre, exprs = [], []
+        for i, f in enumerate(self.fields):
+            conv = _TYPES[f.type][0]
+            keys = (f.name,) + tuple(f.aliases)
+            if f.required:
+                expr = f"d[{keys[-1]!r}]"
+                for k in reversed(keys[:-1]):
+                    expr = f"(d[{k!r}] if {k!r} in d else {expr})"
+                exprs.append(f"{conv}({expr})")
+            else:
+                expr = "None"
+                for k in reversed(keys):
+                    expr = f"d.get({k!r}, {expr})"
+                pre.append(f"v{i} = {expr}")
+                exprs.append(f"{conv}(v{i}) if v{i} is not None else None")
+        body = "\n".join(f"        {line}" for line in pre)
+        values = "".join(f"            {e},\n" for e in exprs)
+        return f'''
+def coerce(d):
+    try:
+{body}
+        return (
+{values}        )
+    except KeyError as e:
+        raise ValueError(f"Missing required key: {{e}}") from e
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Bad field types: {{e}}") from e
+'''
+
+    def _record_rows_source(self) -> str:
+        names = [f"v{i}" for i in range(len(self.fields))]
+        reads = "".join(f"        {v} = r.{f.name}\n" for v, f in zip(names, self.fields))
+        return f'''
+def record_rows(records):
+    out = []
+    add = out.append
+    for r in records:
+{reads}        add(({", ".join(names)}, {self._hash_expr(names)}))
+    return out
+'''
+
+    def _record_type(self) -> type:
+        spec = []
+        for f in self.fields:
+            annotation = _TYPES[f.type][0]
+            if f.required:
+                spec.append((f.name, annotation))
+            else:
+                spec.append((f.name, f"Optional[{annotation}]", dc_field(default=None)))
+        coerce, columns, row_of = self.coerce, self.columns, self.record_rows
+        schema = self
+
+        def from_dict(d: Dict[str, Any]):
+            """Coerce & validate (ValueError on bad input)."""
+            return cls(*coerce(d))
+
+        def content_hash(self) -> str:
+            """Stable digest of the non-key columns, used to skip no-op updates."""
+            return row_of((self,))[0][-1]
+
+        def __reduce__(self):
+            return _restore_record, (schema, tuple(getattr(self, c) for c in columns))
+
+        cls = make_dataclass(
+            _record_name(self.name), spec, slots=True,
+            namespace={"from_dict": staticmethod(from_dict), "content_hash": content_hash, "__reduce__": __reduce__},
+        )
+        cls.__module__ = __name__
+        cls.__doc__ = f"One validated {self.name} row (generated from the {self.name!r} schema)."
+        return cls
+
+    def _column_layout(self) -> Tuple[Tuple[Tuple[int, Optional[int], Optional[int]], ...], List[Callable[[], Any]]]:
+        """
+        Per field: (values, ends, mask) indexes into the batch's storage list.
+        Numbers go in a typed array; text is UTF-8 appended to one bytearray
+        addressed by an end-offset array; optional fields add a 0/1 NULL mask.
+        """
+        slots, factories = [], []
+
+        def add(factory: Callable[[], Any]) -> int:
+            factories.append(factory)
+            return len(factories) - 1
+
+        for f in self.fields:
+            typecode = _TYPES[f.type][3]
+            if typecode is None:
+                values, ends = add(bytearray), add(lambda: array("q"))
+            else:
+                values, ends = add(lambda tc=typecode: array(tc)), None
+            mask = None if f.required else add(lambda: array("b"))
+            slots.append((values, ends, mask))
+        return tuple(slots), factories
+
+    def _append_source(self) -> str:
+        """
+        append_values(cols, values): every value is encoded / range-checked first,
+        and only then appended, so a bad row never leaves the columns misaligned.
+        """
+        names = [f"v{i}" for i in range(len(self.fields))]
+        check, write = [f"{', '.join(names)}, = values"], []
+        for f, v, (values, ends, mask) in zip(self.fields, names, self._slots):
+            if mask is not None:
+                write.append(f"c{mask}.append({v} is not None)")
+            if ends is None:
+                if _TYPES[f.type][3] == "q":
+                    in_range = f"_I64_MIN <= {v} <= _I64_MAX"
+                    if mask is not None:
+                        in_range = f"{v} is None or {in_range}"
+                    check += [f"if not ({in_range}):",
+                              f"    raise ValueError('Bad field values: {f.name} outside the BIGINT range')"]
+                write.append(f"c{values}.append({v})" if mask is None
+                             else f"c{values}.append({v} if {v} is not None else 0)")
+                continue
+            encode = f"{v}.encode('utf-8')"
+            check.append(f"b{v} = {encode}" if mask is None else f"b{v} = {encode} if {v} is not None else b''")
+            write += [f"c{values} += b{v}", f"c{ends}.append(len(c{values}))"]
+        unpack = f"{', '.join(f'c{i}' for i in range(len(self._factories)))}, = cols"
+        body = "".join(f"    {line}\n" for line in check + [unpack] + write)
+        return f"\ndef append_values(cols, values):\n{body}"
+
+    def _batch_rows_source(self) -> str:
+        names = [f"v{i}" for i in range(len(self.fields))]
+        reads = []
+        for v, (values, ends, mask) in zip(names, self._slots):
+            if ends is None:
+                read = f"c{values}[i]"
+            else:
+                read = f"c{values}[(c{ends}[i - 1] if i else 0):c{ends}[i]].decode('utf-8')"
+            if mask is not None:
+                read = f"{read} if c{mask}[i] else None"
+            reads.append(f"        {v} = {read}\n")
+        unpack = ", ".join(f"c{i}" for i in range(len(self._factories)))
+        return f'''
+def batch_rows(cols, start, stop):
+    {unpack}, = cols
+    out = []
+    add = out.append
+    for i in range(start, stop):
+{"".join(reads)}        add(({", ".join(names)}, {self._hash_expr(names)}))
+    return out
+'''
+
+    def _batch_type(self) -> type:
+        namespace: Dict[str, Any] = {"__slots__": (), "schema": self, "__module__": __name__}
+        for idx, f in enumerate(self.fields):
+            namespace[f.name] = _accessor(idx, f.name)
+        name = _record_name(self.name).replace("Record", "Batch")
+        cls = type(name, (ColumnBatch,), namespace)
+        cls.__doc__ = f"Columnar batch of {self.name} (generated from the {self.name!r} schema)."
+        return cls
+
+
+class ColumnBatch:
+    """
+    Columnar batch of one schema's rows: one object for N rows instead of N records.
+
+    - int / float columns live in typed arrays (8 bytes per value, no per-value objects)
+    - text columns are UTF-8 bytes appended to one contiguous bytearray each,
+      addressed by an end-offset array
+    DataProcessor.process(columnar=True) fills it straight from the raw payload;
+    save_to_db pulls row tuples out of it one batch_size slice at a time.
+    Each schema generates a subclass (Schema.batch) with one accessor per field.
+    """
+
+    __slots__ = ("_cols",)
+    schema: Schema  # set on the generated subclass
+
+    def __init__(self) -> None:
+        self._cols = [factory() for factory in self.schema._factories]
+
+    def __len__(self) -> int:
+        return len(self._cols[0])  # the key: a required int column
+
+    def __reduce__(self):
+        return _restore_batch, (self.schema, self._cols)
+
+    def append(self, *values: Any) -> None:
+        """Append one row of already-valid values, in field order (optional trailing ones may be left out)."""
+        missing = len(self.schema.fields) - len(values)
+        self._append_row(values + (None,) * missing if missing else values)
+
+    def append_dict(self, d: Dict[str, Any]) -> None:
+        """Validate like the record's from_dict, then append (raises ValueError on bad rows)."""
+        self._append_row(self.schema.coerce(d))
+
+    def _append_row(self, values: tuple) -> None:
+        try:
+            self.schema._append_values(self._cols, values)
+        except UnicodeEncodeError as e:  # e.g. a lone surrogate; raised before any column changes
+            raise ValueError(f"Bad field values: {e}") from e
+
+    def extend(self, other: "ColumnBatch") -> None:
+        for values, ends, mask in self.schema._slots:
+            if ends is None:
+                self._cols[values].extend(other._cols[values])
+            else:
+                base = len(self._cols[values])
+                self._cols[values] += other._cols[values]
+                self._cols[ends].extend(end + base for end in other._cols[ends])
+            if mask is not None:
+                self._cols[mask].extend(other._cols[mask])
+
+    def value(self, field_index: int, i: int) -> Any:
+        values, ends, mask = self.schema._slots[field_index]
+        if mask is not None and not self._cols[mask][i]:
+            return None
+        if ends is None:
+            return self._cols[values][i]
+        bounds = self._cols[ends]
+        return self._cols[values][(bounds[i - 1] if i else 0):bounds[i]].decode("utf-8")
+
+    def __getitem__(self, i: int) -> Any:
+        if i < 0:
+            i += len(self)
+        return self.schema.record(*(self.value(idx, i) for idx in range(len(self.schema.fields))))
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> List[tuple]:
+        """(*columns, content_hash) tuples for rows [start, stop)."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        return self.schema._batch_rows(self._cols, start, stop)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate payload size (array buffers + string storage)."""
+        return sum(c.itemsize * len(c) if isinstance(c, array) else len(c) for c in self._cols)
+
+
+def _accessor(idx: int, name: str) -> Callable[[ColumnBatch, int], Any]:
+    def get(self: ColumnBatch, i: int) -> Any:
+        return self.value(idx, i)
+
+    get.__name__ = name
+    return get
+
+
+def _record_name(resource: str) -> str:
+    """posts -> PostRecord, user_events -> UserEventRecord."""
+    singular = resource[:-1] if resource.endswith("s") else resource
+    return "".join(part.capitalize() for part in singular.split("_")) + "Record"
+
+
+def _counted(insert_sql: str) -> str:
+    """Wrap an INSERT ... ON CONFLICT so it returns (inserted, updated) instead of rows."""
+    return f"""
+                WITH written AS (
+                    {insert_sql.strip()}
+                    RETURNING (xmax = 0) AS inserted
+                )
+                SELECT count(*) FILTER (WHERE inserted) AS inserted,
+                       count(*) FILTER (WHERE NOT inserted) AS updated
+                FROM written;
+            """
+
+
+# -----------------------------
+# Registry
+# -----------------------------
+_REGISTRY: Dict[str, Schema] = {}
+
+
+def register(schema: Schema) -> Schema:
+    """Make a schema available by name (DataProcessor(schema=...), pipelines' `schema:`)."""
+    _REGISTRY[schema.name] = schema
+    return schema
+
+
+def get_schema(name: str) -> Schema:
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"unknown schema {name!r}; registered: {sorted(_REGISTRY)}") from None
+
+
+def schema_for_url(url: str) -> Schema:
+    """Schema of the resource a URL points at: .../comments and .../comments/3 -> comments."""
+    segments = [s for s in urlsplit(url).path.split("/") if s and not s.isdigit()]
+    if not segments:
+        raise ValueError(f"no resource in URL {url!r}")
+    return get_schema(segments[-1])
+
+
+def _restore_schema(name: str, fields: Tuple[Field, ...], key: str) -> Schema:
+    known = _REGISTRY.get(name)
+    if known is not None and known.fields == fields and known.key == key:
+        return known
+    return _rebuild_schema(name, fields, key)
+
+
+@lru_cache(maxsize=None)
+def _rebuild_schema(name: str, fields: Tuple[Field, ...], key: str) -> Schema:
+    # Built once per definition and process, and never registered: unpickling has no side effects
+    return Schema(name, fields, key)
+
+
+def _restore_record(schema: Schema, values: tuple) -> Any:
+    return schema.record(*values)
+
+
+def _restore_batch(schema: Schema, cols: List[Any]) -> ColumnBatch:
+    batch = schema.batch.__new__(schema.batch)
+    batch._cols = cols
+    return batch
+
+
+# -----------------------------
+# Built-in resources (jsonplaceholder)
+# -----------------------------
+POSTS = register(Schema("posts", [
+    Field("id", "int"),
+    Field("title"),
+    Field("body"),
+    Field("user_id", "int", required=False, aliases=("userId",)),
+]))
+
+COMMENTS = register(Schema("comments", [
+    Field("id", "int"),
+    Field("post_id", "int", aliases=("postId",)),
+    Field("name"),
+    Field("email"),
+    Field("body"),
+]))
+
+ALBUMS = register(Schema("albums", [
+    Field("id", "int"),
+    Field("title"),
+    Field("user_id", "int", required=False, aliases=("userId",)),
+]))
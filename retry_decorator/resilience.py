@@ -0,0 +1,173 @@
+"""
+Shared failure controls for the retry decorator.
+- CircuitBreaker: per-key (usually per-host) closed -> open -> half-open state machine
+- RetryBudget: token bucket shared by every retry, so an outage can't multiply load
+- retry_after_seconds / is_transient: read HTTP status and Retry-After off
+  requests / aiohttp exceptions
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Hashable, Optional
+from urllib.parse import urlsplit
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling out while a key's circuit is open."""
+
+    def __init__(self, key: Hashable, retry_in: float) -> None:
+        super().__init__(f"circuit open for {key!r}, retry in {retry_in:.1f}s")
+        self.key = key
+        self.retry_in = retry_in
+
+
+@dataclass(slots=True)
+class _Circuit:
+    state: str = CLOSED
+    failures: int = 0
+    opened_at: float = 0.0
+    probes: int = 0
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker keyed by host (or any hashable).
+
+    After `failure_threshold` consecutive failures a key opens and calls fail fast
+    with CircuitOpenError. Once `reset_timeout` seconds have passed, up to
+    `half_open_max` probe calls are let through: a success closes the circuit,
+    a failure opens it again for another `reset_timeout`.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, half_open_max: int = 1) -> None:
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be >= 1")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max = max(1, half_open_max)
+        self._circuits: Dict[Hashable, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def before(self, key: Hashable) -> None:
+        """Call before each attempt; raises CircuitOpenError if the key is open."""
+        with self._lock:
+            c = self._circuits.get(key)
+            if c is None or c.state == CLOSED:
+                return
+            if c.state == OPEN:
+                retry_in = c.opened_at + self.reset_timeout - time.monotonic()
+                if retry_in > 0:
+                    raise CircuitOpenError(key, retry_in)
+                c.state, c.probes = HALF_OPEN, 0
+            if c.probes >= self.half_open_max:
+                raise CircuitOpenError(key, 0.0)
+            c.probes += 1
+
+    def release(self, key: Hashable) -> None:
+        """
+        Free a half-open probe slot without an outcome: the attempt ended in
+        something that says nothing about the host (cancellation, a decode bug),
+        so the next call may probe instead of the circuit staying stuck.
+        """
+        with self._lock:
+            c = self._circuits.get(key)
+            if c is not None and c.state == HALF_OPEN and c.probes > 0:
+                c.probes -= 1
+
+    def record_success(self, key: Hashable) -> None:
+        with self._lock:
+            self._circuits.pop(key, None)
+
+    def record_failure(self, key: Hashable) -> None:
+        with self._lock:
+            c = self._circuits.setdefault(key, _Circuit())
+            c.failures += 1
+            if c.state == HALF_OPEN or c.failures >= self.failure_threshold:
+                c.state, c.opened_at = OPEN, time.monotonic()
+
+    def state(self, key: Hashable) -> str:
+        with self._lock:
+            c = self._circuits.get(key)
+            return c.state if c is not None else CLOSED
+
+
+class RetryBudget:
+    """
+    Token bucket shared across calls: every retry (not first attempts) spends one
+    token; tokens refill at `refill_per_s` up to `capacity`. When the bucket is
+    empty, failures are raised immediately instead of being retried.
+    """
+
+    def __init__(self, capacity: float = 100.0, refill_per_s: float = 10.0) -> None:
+        self.capacity = capacity
+        self.refill_per_s = refill_per_s
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.denied = 0
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_s)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.denied += 1
+            return False
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
+
+
+def host_key(url: str) -> str:
+    """Breaker key for a URL: scheme + host[:port]."""
+    parts = urlsplit(str(url))
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def http_status(exc: BaseException) -> Optional[int]:
+    """HTTP status carried by a requests.HTTPError / aiohttp.ClientResponseError, else None."""
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)  # requests
+    if status is None:
+        status = getattr(exc, "status", None)  # aiohttp
+    return status if isinstance(status, int) else None
+
+
+def is_transient(exc: BaseException) -> bool:
+    """
+    Worth retrying (and counts against the host): connection errors / timeouts
+    (no status), 408, 429 and 5xx. Other 4xx are the caller's fault.
+    """
+    status = http_status(exc)
+    return status is None or status in (408, 429) or status >= 500
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP-date), if the exception carries one."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or getattr(exc, "headers", None)
+    value = headers.get("Retry-After") if headers else None
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
@@ -4,6 +4,8 @@ Retry decorator with exponential backoff.
 - Works for both synchronous and asynchronous functions
 - Backward-compatible param names: (max_attempts / retries) and (delay_seconds / delay)
 - Optional jitter and custom logger
+- Optional per-key CircuitBreaker, shared RetryBudget and Retry-After support
+  (see retry_decorator/resilience.py)
 """
 
 from __future__ import annotations
@@ -13,7 +15,9 @@ import functools
 import logging
 import random
 import time
-from typing import Callable, Optional, Tuple, Type, Union
+from typing import Any, Callable, Hashable, Optional, Tuple, Type, Union
+
+from retry_decorator.resilience import CircuitBreaker, CircuitOpenError, RetryBudget, retry_after_seconds
 from utils.logger import get_logger
 logger = get_logger(__name__)
 
@@ -29,8 +33,14 @@ def retry(
     # Standard knobs:
     backoff: float = 2.0,
     exceptions: ExceptionTypes = (Exception,),
-    jitter: float = 0.0,  # adds up to ±jitter seconds to each delay
+    jitter: float = 0.0,  # adds up to ±jitter seconds to each delay (only + to a Retry-After)
     logger: Optional[logging.Logger] = None,
+    # Shared failure controls:
+    breaker: Optional[CircuitBreaker] = None,
+    budget: Optional[RetryBudget] = None,
+    key_func: Optional[Callable[..., Hashable]] = None,
+    retry_if: Optional[Callable[[BaseException], bool]] = None,
+    max_delay: float = 60.0,
 ):
     """
     Decorate a function to retry on specific exceptions with exponential backoff.
@@ -43,7 +53,17 @@ def retry(
         backoff: Multiplier applied to the delay after each failure.
         exceptions: Exception class (or tuple of classes) that triggers a retry.
         jitter: If > 0, adds small random noise to delay to avoid thundering herd.
+            A server-sent Retry-After is a floor: only positive noise is added to it.
         logger: Optional logger; defaults to root logger if not provided.
+        breaker: Optional CircuitBreaker; checked before every attempt, fed every outcome.
+            While the key is open, calls raise CircuitOpenError without running.
+        budget: Optional RetryBudget shared with other call sites; each retry takes a token,
+            and when none are left the failure is raised instead of retried.
+        key_func: Called with the wrapped function's arguments to get the breaker key
+            (e.g. the URL's host); defaults to the function's qualified name.
+        retry_if: Optional predicate; matching exceptions for which it returns False are
+            raised at once and count as a healthy response for the breaker (e.g. HTTP 404).
+        max_delay: Cap in seconds for any single wait, including server-sent Retry-After.
     """
     attempts = retries if retries is not None else max_attempts
     initial_delay = delay if delay is not None else delay_seconds
@@ -53,63 +73,115 @@ def retry(
     if not isinstance(exceptions, tuple):
         exceptions = (exceptions,)
 
-    def _sleep_with_jitter(seconds: float, is_async: bool):
-        # Compute jittered sleep time
-        if jitter and jitter > 0:
-            # jitter in [-jitter, +jitter]
-            seconds = max(0.0, seconds + random.uniform(-jitter, jitter))
+    def _with_jitter(seconds: float, server_sent: bool) -> float:
+        if not jitter or jitter <= 0:
+            return seconds
+        if server_sent:
+            # Retry-After is the earliest the server wants us back: only ever wait longer
+            return seconds + random.uniform(0.0, jitter)
+        # jitter in [-jitter, +jitter]
+        return max(0.0, seconds + random.uniform(-jitter, jitter))
+
+    def _sleep(seconds: float, is_async: bool):
         if is_async:
             return asyncio.sleep(seconds)
         else:
             time.sleep(seconds)
             return None
 
+    def _key(func: Callable, args: Tuple[Any, ...], kwargs: dict) -> Hashable:
+        return key_func(*args, **kwargs) if key_func is not None else func.__qualname__
+
+    def _release(key: Hashable) -> None:
+        # An attempt that ended outside `exceptions` must still hand back its half-open probe slot
+        if breaker is not None:
+            breaker.release(key)
+
+    def _next_delay(func: Callable, key: Hashable, attempt_idx: int, e: BaseException,
+                    delay_now: float, is_async: bool) -> Optional[float]:
+        """Record a failure; seconds to wait before the next attempt, or None to give up."""
+        if retry_if is not None and not retry_if(e):
+            if breaker is not None:
+                breaker.record_success(key)  # the upstream answered; this failure is ours
+            return None
+        if breaker is not None:
+            breaker.record_failure(key)
+        if attempt_idx >= attempts:
+            log.error(
+                "Final %s %s failed for %s: %s",
+                "async attempt" if is_async else "attempt", attempt_idx, func.__name__, e
+            )
+            return None
+        if budget is not None and not budget.try_acquire():
+            log.error("Retry budget exhausted; not retrying %s: %s", func.__name__, e)
+            return None
+        server_delay = retry_after_seconds(e)
+        wait = min(max_delay, server_delay if server_delay is not None else delay_now)
+        wait = _with_jitter(wait, server_sent=server_delay is not None)
+        log.warning(
+            "%s %s failed for %s: %s. Retrying in %.2fs...",
+            "Async attempt" if is_async else "Attempt", attempt_idx, func.__name__, e, wait
+        )
+        return wait
+
     def decorator(func: Callable):
         # Async wrapper
         if asyncio.iscoroutinefunction(func):
 
             @functools.wraps(func)
             async def async_wrapper(*args, **kwargs):
+                key = _key(func, args, kwargs)
                 delay_now = initial_delay
                 for attempt_idx in range(1, attempts + 1):
+                    if breaker is not None:
+                        breaker.before(key)
                     try:
-                        return await func(*args, **kwargs)
+                        result = await func(*args, **kwargs)
+                    except CircuitOpenError:
+                        _release(key)
+                        raise
                     except exceptions as e:
-                        if attempt_idx >= attempts:
-                            log.error(
-                                "Final async attempt %s failed for %s: %s",
-                                attempt_idx, func.__name__, e
-                            )
+                        wait = _next_delay(func, key, attempt_idx, e, delay_now, is_async=True)
+                        if wait is None:
                             raise
-                        log.warning(
-                            "Async attempt %s failed for %s: %s. Retrying in %.2fs...",
-                            attempt_idx, func.__name__, e, delay_now
-                        )
-                        await _sleep_with_jitter(delay_now, is_async=True)
+                        await _sleep(wait, is_async=True)
                         delay_now *= backoff
+                    except BaseException:
+                        _release(key)  # e.g. CancelledError: no verdict on the host
+                        raise
+                    else:
+                        if breaker is not None:
+                            breaker.record_success(key)
+                        return result
 
             return async_wrapper
 
         # Sync wrapper
         @functools.wraps(func)
         def sync_wrapper(*args, **kwargs):
+            key = _key(func, args, kwargs)
             delay_now = initial_delay
             for attempt_idx in range(1, attempts + 1):
+                if breaker is not None:
+                    breaker.before(key)
                 try:
-                    return func(*args, **kwargs)
+                    result = func(*args, **kwargs)
+                except CircuitOpenError:
+                    _release(key)
+                    raise
                 except exceptions as e:
-                    if attempt_idx >= attempts:
-                        log.error(
-                            "Final attempt %s failed for %s: %s",
-                            attempt_idx, func.__name__, e
-                        )
+                    wait = _next_delay(func, key, attempt_idx, e, delay_now, is_async=False)
+                    if wait is None:
                         raise
-                    log.warning(
-                        "Attempt %s failed for %s: %s. Retrying in %.2fs...",
-                        attempt_idx, func.__name__, e, delay_now
-                    )
-                    _sleep_with_jitter(delay_now, is_async=False)
+                    _sleep(wait, is_async=False)
                     delay_now *= backoff
+                except BaseException:
+                    _release(key)
+                    raise
+                else:
+                    if breaker is not None:
+                        breaker.record_success(key)
+                    return result
 
         return sync_wrapper
 
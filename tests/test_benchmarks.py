@@ -0,0 +1,33 @@
+import requests
+
+from benchmarks.bench_ingest import compare, percentiles
+from benchmarks.mock_api import MockAPI
+
+
+def test_mock_api_serves_posts_and_injects_errors():
+    with MockAPI(payload_size=64, error_rate=0.0) as api:
+        post = requests.get(f"{api.base_url}/posts/7").json()
+        listing = requests.get(f"{api.base_url}/posts?_limit=3").json()
+        by_id = requests.get(f"{api.base_url}/posts?id=4&id=9").json()
+        page = requests.get(f"{api.base_url}/posts?_page=3&_limit=2").json()
+    assert post["id"] == 7 and len(post["body"]) == 64
+    assert [p["id"] for p in listing] == [1, 2, 3]
+    assert [p["id"] for p in by_id] == [4, 9]
+    assert [p["id"] for p in page] == [5, 6]
+
+    with MockAPI(error_rate=1.0) as api:
+        assert requests.get(f"{api.base_url}/posts/1").status_code == 500
+        assert api.requests == 1
+
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    base = {"results": {
+        "async": {"throughput_per_s": 100.0, "p95_ms": 10.0, "peak_rss_mb": 40.0},
+        "save_copy": {"skipped": "no db"},
+    }}
+    cur = {"results": {
+        "async": {"throughput_per_s": 95.0, "p95_ms": 15.0, "peak_rss_mb": 30.0},
+        "save_copy": {"throughput_per_s": 1.0},
+    }}
+    assert compare(cur, base, tolerance=0.1) == ["async.p95_ms: 10.0 -> 15.0 (+50%)"]
+    assert percentiles([0.001 * i for i in range(1, 101)])["p50_ms"] == 50.5
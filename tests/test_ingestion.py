@@ -0,0 +1,458 @@
+import asyncio
+import json
+import time
+
+import pytest
+from aiohttp import web
+
+from db.redis_cache import InMemoryRedis, RedisCache
+from ingestion.async_ingestor import AsyncIngestor
+from ingestion.rate_limit import HostLimiter, RateLimiter
+from ingestion.singleflight import LRUCache, SingleFlight
+from retry_decorator.resilience import CircuitBreaker, RetryBudget
+
+
+async def _serve(handler):
+    app = web.Application()
+    app.router.add_get("/posts/{id}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_async_ingestor_stream_respects_concurrency_limit():
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return web.json_response({"id": int(request.match_info["id"])})
+
+    async def main():
+        runner, base = await _serve(handler)
+        try:
+            urls = (f"{base}/posts/{i}" for i in range(1, 41))
+            ing = AsyncIngestor(urls, concurrency=4, connector={"limit": 10})
+            return [item async for item in ing.stream()]
+        finally:
+            await runner.cleanup()
+
+    results = asyncio.run(main())
+    assert sorted(r["id"] for r in results) == list(range(1, 41))
+    assert peak <= 4
+
+
+def test_async_ingestor_rerun_is_served_from_response_cache():
+    hits = 0
+
+    async def handler(request):
+        nonlocal hits
+        hits += 1
+        return web.json_response({"id": int(request.match_info["id"])})
+
+    cache = RedisCache(InMemoryRedis(), ttl=60)
+
+    async def main():
+        runner, base = await _serve(handler)
+        try:
+            for _ in range(2):
+                urls = [f"{base}/posts/{i}" for i in range(1, 11)]
+                results = await AsyncIngestor(urls, concurrency=5, cache=cache).run()
+                assert len(results) == 10
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(main())
+    assert hits == 10
+    assert cache.stats() == {"cache_hits": 10, "cache_misses": 10}
+
+
+def test_redis_cache_roundtrip_and_ttl_expiry():
+    cache = RedisCache(InMemoryRedis(), ttl=1)
+    payload = [{"id": 1, "title": "t" * 1000}]
+    cache.set("http://x/posts", payload)
+
+    raw = cache.client.get("http:http://x/posts")
+    assert len(raw) < 200  # stored compressed
+    assert cache.get("http://x/posts") == payload
+
+    time.sleep(1.05)
+    assert cache.get("http://x/posts") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_redis_cache_aclose_closes_both_clients():
+    closed = []
+
+    class Client:
+        def __init__(self, name):
+            self.name = name
+
+        def close(self):
+            closed.append(self.name)
+
+    class AsyncClient(Client):
+        async def aclose(self):
+            closed.append(self.name)
+
+    asyncio.run(RedisCache(Client("sync"), AsyncClient("async")).aclose())
+    asyncio.run(RedisCache(InMemoryRedis()).aclose())  # nothing to close
+    assert closed == ["sync", "async"]
+
+
+def test_single_flight_dedupes_duplicate_urls_in_one_run():
+    hits = 0
+
+    async def handler(request):
+        nonlocal hits
+        hits += 1
+        await asyncio.sleep(0.02)
+        return web.json_response({"id": int(request.match_info["id"])})
+
+    async def main():
+        runner, base = await _serve(handler)
+        try:
+            urls = [f"{base}/posts/{i % 3}" for i in range(12)]
+            return await AsyncIngestor(urls, concurrency=12, coalescer=SingleFlight()).run()
+        finally:
+            await runner.cleanup()
+
+    results = asyncio.run(main())
+    assert len(results) == 12
+    assert hits == 3
+
+
+def test_single_flight_shares_call_between_thread_and_coroutine():
+    flight = SingleFlight()
+    calls = 0
+
+    async def leader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"id": 1}
+
+    def follower():
+        return flight.do("k", lambda: {"id": "thread"})
+
+    async def main():
+        task = asyncio.create_task(flight.ado("k", leader))
+        await asyncio.sleep(0.01)
+        from_thread = await asyncio.to_thread(follower)
+        return await task, from_thread
+
+    assert asyncio.run(main()) == ({"id": 1}, {"id": 1})
+    assert calls == 1
+    assert flight.coalesced == 1
+
+
+def test_lru_cache_evicts_least_recently_used():
+    lru = LRUCache(maxsize=2, ttl=60)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.get("a")
+    lru.set("c", 3)
+    assert (lru.get("a"), lru.get("b"), lru.get("c")) == (1, None, 3)
+
+
+def test_async_ingestor_retries_then_short_circuits_a_failing_host():
+    hits = 0
+
+    async def handler(request):
+        nonlocal hits
+        hits += 1
+        post_id = int(request.match_info["id"])
+        if post_id == 1 and hits == 1:
+            return web.json_response({}, status=503, headers={"Retry-After": "0"})
+        if post_id >= 2:
+            return web.json_response({}, status=500)
+        return web.json_response({"id": post_id})
+
+    async def main():
+        runner, base = await _serve(handler)
+        try:
+            first = await AsyncIngestor([f"{base}/posts/1"]).run()
+            ing = AsyncIngestor(
+                [f"{base}/posts/{i}" for i in range(2, 12)], concurrency=1,
+                breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60),
+                budget=RetryBudget(capacity=10, refill_per_s=0),
+            )
+            return first, await ing.run()
+        finally:
+            await runner.cleanup()
+
+    first, rest = asyncio.run(main())
+    assert first == [{"id": 1}]
+    assert rest == [None] * 10
+    assert hits == 2 + 3  # one retried success, then 3 failures open the circuit
+
+
+def test_host_limiter_is_additive_up_multiplicative_down():
+    async def main():
+        host = HostLimiter(initial_concurrency=4, max_concurrency=8)
+        for _ in range(8):
+            await host.acquire()
+            await host.release(0.01, 200)
+        grown = host.limit
+        await host.acquire()
+        await host.release(0.01, 429)
+        return grown, host
+
+    grown, host = asyncio.run(main())
+    assert 5.5 < grown < 6.5  # ~ +1 per `limit` healthy responses
+    assert host.limit == grown / 2
+    assert host.stats()["throttled"] == 1 and host.stats()["decreases"] == 1
+
+
+def test_rate_limiter_backs_off_when_upstream_throttles():
+    in_flight = 0
+
+    async def handler(request):
+        nonlocal in_flight
+        in_flight += 1
+        try:
+            if in_flight > 3:
+                return web.json_response({}, status=429, headers={"Retry-After": "0"})
+            await asyncio.sleep(0.005)
+            return web.json_response({"id": int(request.match_info["id"])})
+        finally:
+            in_flight -= 1
+
+    limiter = RateLimiter(initial_concurrency=8, max_concurrency=16)
+
+    async def main():
+        runner, base = await _serve(handler)
+        try:
+            urls = [f"{base}/posts/{i}" for i in range(60)]
+            return await AsyncIngestor(urls, concurrency=16, limiter=limiter).run()
+        finally:
+            await runner.cleanup()
+
+    results = asyncio.run(main())
+    (stats,) = limiter.stats().values()
+    assert sum(1 for r in results if r) >= 55
+    assert stats["throttled"] > 0 and stats["low_limit"] <= 4
+
+
+def test_collection_batching_splits_responses_and_falls_back_per_id():
+    from ingestion.batching import CollectionBatching
+
+    hits = {"collection": 0, "single": 0}
+
+    async def collection(request):
+        hits["collection"] += 1
+        ids = [int(i) for i in request.query.getall("id")]
+        # The upstream silently drops some ids and adds one nobody asked for
+        return web.json_response([{"id": i} for i in ids if i % 7] + [{"id": 999}])
+
+    async def single(request):
+        hits["single"] += 1
+        return web.json_response({"id": int(request.match_info["id"])})
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/posts", collection)
+        app.router.add_get("/posts/{id}", single)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        try:
+            batching = CollectionBatching(collection="/posts", size=10)
+            ing = AsyncIngestor(batching.requests(base, "/posts/{id}", 1, 45), concurrency=3)
+            return [item async for item in ing.stream()], ing
+        finally:
+            await runner.cleanup()
+
+    results, ing = asyncio.run(main())
+    assert sorted(r["id"] for r in results) == list(range(1, 46))
+    assert hits == {"collection": 5, "single": 6}  # 7, 14, ..., 42 fetched one by one
+    assert (ing.batch_requests, ing.fallback_requests) == (5, 6)
+
+
+def test_page_batching_maps_id_ranges_onto_pages():
+    from ingestion.batching import CollectionBatching
+
+    batching = CollectionBatching(collection="/posts", strategy="page", size=10)
+    requests = list(batching.requests("http://x", "/posts/{id}", 15, 32))
+    assert [r.url for r in requests] == [
+        "http://x/posts?_page=2&_limit=10", "http://x/posts?_page=3&_limit=10", "http://x/posts?_page=4&_limit=10",
+    ]
+    assert requests[0].ids == tuple(range(15, 21)) and requests[-1].ids == (31, 32)
+    records, missing = requests[0].split([{"id": i} for i in range(11, 21)])
+    assert [r["id"] for r in records] == list(range(15, 21)) and missing == []
+    assert requests[0].split(None) == ([], list(range(15, 21)))
+    assert requests[0].fallback_url(15) == "http://x/posts/15"
+
+
+def test_sync_ingest_all_fans_out_over_pooled_connections():
+    from benchmarks.mock_api import MockAPI
+    from ingestion.batching import CollectionBatching
+    from ingestion.sync_ingestor import SyncIngestor
+
+    with MockAPI(latency=0.005) as api:
+        urls = [f"{api.base_url}/posts/{i}" for i in range(1, 41)] + [f"{api.base_url}/missing/1"]
+        with SyncIngestor(pool_size=4, max_workers=4) as ing:
+            start = time.perf_counter()
+            results = ing.ingest_all(urls)
+            elapsed = time.perf_counter() - start
+            batched = ing.ingest_all(CollectionBatching("/posts", size=10).requests(api.base_url, "/posts/{id}", 1, 25))
+        connections = api.connections
+
+    assert [r["id"] for r in results[:40]] == list(range(1, 41))  # input order
+    assert results[40] is None  # 404: logged, not raised
+    assert elapsed < 40 * 0.005  # requests overlapped
+    assert connections <= 4  # keep-alive: one connection per worker thread, reused
+    assert [r["id"] for r in batched] == list(range(1, 26))
+
+
+def test_get_decoder_prefers_installed_fast_decoder_and_rejects_unknown():
+    import pytest
+
+    from ingestion.codecs import available_decoders, get_decoder
+
+    name, decode = get_decoder()
+    assert name == next(iter(available_decoders()))  # first of PREFERRED that is installed
+    assert decode(b'{"id": 1, "title": "\xc3\xa9"}') == {"id": 1, "title": "é"}
+    assert get_decoder("json")[1](b"[1, 2]") == [1, 2]
+    with pytest.raises(ValueError):
+        get_decoder("yaml")
+
+
+def test_ingestors_negotiate_gzip_and_count_wire_bytes():
+    from benchmarks.mock_api import MockAPI
+    from ingestion.sync_ingestor import SyncIngestor
+    from utils import metrics
+
+    with MockAPI(payload_size=2048, list_size=20, compress=True) as api:
+        host = api.base_url
+        with SyncIngestor(decoder="json") as ing:
+            listing = ing.fetch(f"{host}/posts")
+        sync_wire = metrics.TRANSFERRED_BYTES.value(host=host)
+        sync_decoded = metrics.FETCHED_BYTES.value(host=host)
+
+        # offload_decode_bytes=1: every body goes through the worker-thread path
+        ing = AsyncIngestor([f"{host}/posts/{i}" for i in range(1, 6)], concurrency=2, offload_decode_bytes=1)
+        posts = asyncio.run(ing.run())
+
+    assert [p["id"] for p in listing] == list(range(1, 21))
+    assert sorted(p["id"] for p in posts) == [1, 2, 3, 4, 5]
+    assert 0 < sync_wire < sync_decoded / 5  # gzip on the wire, full JSON after decoding
+    assert metrics.TRANSFERRED_BYTES.value(host=host) - sync_wire < (
+            metrics.FETCHED_BYTES.value(host=host) - sync_decoded) / 5
+
+
+def test_async_cache_without_async_client_keeps_the_loop_free():
+    class SlowRedis:
+        """Sync client whose calls block like a network round trip."""
+
+        def __init__(self):
+            self.store = InMemoryRedis()
+
+        def get(self, key):
+            time.sleep(0.05)
+            return self.store.get(key)
+
+        def set(self, key, value, ex=None):
+            return self.store.set(key, value, ex=ex)
+
+    cache = RedisCache(SlowRedis(), ttl=60)
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await cache.aset("u", {"id": 1})
+        value = await cache.aget("u")
+        task.cancel()
+        return value, ticks
+
+    value, ticks = asyncio.run(main())
+    assert value == {"id": 1} and ticks >= 3  # the loop kept running during the blocking get
+
+
+def test_single_flight_leader_cancellation_is_not_shared():
+    flight = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"call": calls}
+
+    async def main():
+        leader = asyncio.create_task(flight.ado("u", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.ado("u", fetch))
+        quitter = asyncio.create_task(flight.ado("u", fetch))
+        await asyncio.sleep(0.01)
+        quitter.cancel()  # a waiter giving up must not cancel the shared call
+        await asyncio.sleep(0)
+        leader.cancel()
+        result = await follower
+        return leader.cancelled(), quitter.cancelled(), result
+
+    leader_cancelled, quitter_cancelled, result = asyncio.run(main())
+    assert leader_cancelled and quitter_cancelled
+    assert result == {"call": 2} and calls == 2  # the follower re-claimed the key and fetched it
+
+
+def test_chunked_compressed_responses_count_compressed_wire_bytes():
+    from ingestion.sync_ingestor import SyncIngestor
+    from utils import metrics
+
+    async def handler(request):
+        resp = web.StreamResponse(headers={"Content-Type": "application/json"})
+        resp.enable_compression()
+        resp.enable_chunked_encoding()  # streamed: no Content-Length to fall back on
+        await resp.prepare(request)
+        await resp.write(json.dumps([{"id": i, "body": "lorem ipsum " * 50} for i in range(20)]).encode())
+        await resp.write_eof()
+        return resp
+
+    async def main():
+        runner, base = await _serve(handler)
+        try:
+            sync_posts = await asyncio.to_thread(lambda: SyncIngestor(decoder="json").fetch(f"{base}/posts/1"))
+            sync_counts = metrics.TRANSFERRED_BYTES.value(host=base), metrics.FETCHED_BYTES.value(host=base)
+            async_posts = await AsyncIngestor([f"{base}/posts/2"]).run()
+            return base, sync_posts, sync_counts, async_posts[0]
+        finally:
+            await runner.cleanup()
+
+    base, sync_posts, (sync_wire, sync_decoded), async_posts = asyncio.run(main())
+    assert len(sync_posts) == len(async_posts) == 20
+    assert sync_wire == 0 and sync_decoded > 0  # urllib3 can't count chunked raw bytes: left out, not guessed
+    async_wire = metrics.TRANSFERRED_BYTES.value(host=base) - sync_wire
+    assert 0 < async_wire < (metrics.FETCHED_BYTES.value(host=base) - sync_decoded) / 5
+
+
+def test_stream_raises_when_a_worker_dies_instead_of_hanging():
+    async def main():
+        ing = AsyncIngestor([f"http://127.0.0.1:9/posts/{i}" for i in range(1, 9)], concurrency=3)
+
+        async def fetch(session, url):
+            if url.endswith("/3"):
+                raise RuntimeError("split failed")
+            return {"url": url}
+
+        ing.fetch = fetch
+        return await asyncio.wait_for(ing.run(), timeout=5)
+
+    with pytest.raises(RuntimeError, match="split failed"):
+        asyncio.run(main())
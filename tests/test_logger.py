@@ -0,0 +1,38 @@
+import logging
+import threading
+
+from utils import logger as log_config
+
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.records.append(self.format(record))
+        self.threads.add(threading.current_thread().name)
+
+
+def test_queued_logging_formats_and_writes_off_the_calling_thread():
+    sink = _Collect()
+    try:
+        log_config.configure([sink], queued=True)
+        logging.getLogger("t.queued").info("Success: %s", "http://x/1")
+        log_config.configure([sink], queued=False)  # stops + drains the listener
+    finally:
+        log_config.configure([], queued=False)
+
+    assert sink.records == ["Success: http://x/1"]
+    assert threading.current_thread().name not in sink.threads
+
+
+def test_rate_limit_filter_drops_excess_and_reports_it():
+    flt = log_config.RateLimitFilter(per_second=2)
+    records = [logging.LogRecord("t", logging.INFO, __file__, 1, "Success: %s", (i,), None) for i in range(5)]
+    passed = [r for r in records if flt.filter(r)]
+
+    assert len(passed) == 2 and flt.suppressed == 3
+    flt._tokens = 1
+    assert flt.filter(records[0]) and records[0].getMessage() == "Success: 0 (+3 similar suppressed)"
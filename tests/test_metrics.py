@@ -0,0 +1,68 @@
+import asyncio
+import urllib.request
+
+from aiohttp import web
+
+from ingestion.async_ingestor import AsyncIngestor
+from processing.processor import DataProcessor
+from utils import metrics
+
+
+def test_histogram_and_counter_render_prometheus_text():
+    registry = metrics.Registry()
+    hist = registry.register(metrics.Histogram("t_seconds", "Test.", ["stage"], buckets=(0.1, 1)))
+    errors = registry.register(metrics.Counter("t_errors_total", "Errors.", ["stage"]))
+    hist.observe(0.05, stage="save", pipeline='a"b')
+    hist.observe(0.5, stage="save", pipeline='a"b')
+    errors.inc(stage="save", pipeline="p")
+
+    text = registry.render()
+    assert '# TYPE t_seconds histogram' in text
+    assert 't_seconds_bucket{pipeline="a\\"b",stage="save",le="0.1"} 1' in text
+    assert 't_seconds_bucket{pipeline="a\\"b",stage="save",le="+Inf"} 2' in text
+    assert 't_seconds_count{pipeline="a\\"b",stage="save"} 2' in text
+    assert 't_errors_total{pipeline="p",stage="save"} 1' in text
+
+
+def test_stages_are_labelled_with_the_running_pipeline():
+    async def handler(request):
+        return web.json_response({"id": 1, "title": "t", "body": "b" * 100})
+
+    async def main():
+        metrics.current_pipeline.set("metrics_test")
+        app = web.Application()
+        app.router.add_get("/posts/1", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            raw = await AsyncIngestor([f"http://127.0.0.1:{port}/posts/1"]).run()
+        finally:
+            await runner.cleanup()
+        # to_thread copies the context, so validation is labelled too
+        await DataProcessor(db=object()).process_async(raw + [{"id": "x"}])
+        return port
+
+    port = asyncio.run(main())
+    labels = {"pipeline": "metrics_test"}
+    assert metrics.STAGE_SECONDS.count(stage="fetch", **labels) == 1
+    assert metrics.FETCHED_BYTES.value(host=f"http://127.0.0.1:{port}", **labels) > 100
+    assert metrics.ROWS.value(stage="validate", outcome="valid", **labels) == 1
+    assert metrics.ROWS.value(stage="validate", outcome="rejected", **labels) == 1
+
+
+def test_textfile_and_http_exporters(tmp_path):
+    path = tmp_path / "out" / "ingestion.prom"
+    metrics.write_textfile(str(path))
+    assert "ingestion_stage_duration_seconds" in path.read_text()
+
+    server = metrics.start_http_server(0, host="127.0.0.1")
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as resp:
+            assert resp.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert b"# TYPE ingestion_rows_total counter" in resp.read()
+    finally:
+        server.shutdown()
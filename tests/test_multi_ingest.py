@@ -0,0 +1,38 @@
+from datetime import datetime
+
+import pytest
+
+from app.multi_ingest import ShardResult, shard_ranges, shard_status, summarise
+
+
+def test_shard_ranges_cover_the_id_range_exactly():
+    assert shard_ranges(1, 10, 4) == [(1, 4), (5, 8), (9, 10)]
+    assert shard_ranges(5, 5, 100) == [(5, 5)]
+    with pytest.raises(ValueError):
+        shard_ranges(1, 10, 0)
+
+
+def test_summarise_aggregates_shards_into_one_event():
+    results = [
+        ShardResult(1, 100, records=100, inserted=60, updated=40, seconds=1.5, worker=11),
+        ShardResult(101, 200, records=90, inserted=90, seconds=2.0, worker=12),
+        ShardResult(201, 300, seconds=0.1, worker=11, error="ConnectionError: refused"),
+    ]
+    event = summarise("posts_async", datetime(2024, 1, 1), results, workers=2)
+
+    assert event.status == "FAILED"
+    assert event.detail == "ids 201-300: ConnectionError: refused"
+    assert (event.records, event.inserted, event.updated, event.unchanged) == (190, 150, 40, 0)
+    assert event.stats["sharded"]["shards"] == 3
+    assert event.stats["sharded"]["failed_shards"] == 1
+    assert event.stats["sharded"]["worker_pids"] == 2
+    assert event.stats["sharded"]["shard_seconds_max"] == 2.0
+
+    ok = summarise("posts_async", datetime(2024, 1, 1), results[:2], workers=2)
+    assert ok.status == "SUCCESS" and ok.detail is None
+
+
+def test_shard_status_only_marks_fully_fetched_shards_done():
+    assert shard_status(ShardResult(1, 10, records=10)) == "DONE"
+    assert shard_status(ShardResult(1, 10, records=9, failed_fetches=1)) == "INCOMPLETE"
+    assert shard_status(ShardResult(1, 10, error="boom")) == "FAILED"
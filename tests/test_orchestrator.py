@@ -0,0 +1,247 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from orchestrator.event_store import EventStore, IngestionEvent
+from orchestrator.scheduler import DagScheduler
+from orchestrator.visualise import mermaid_from_config
+
+
+class _RecordingStore(EventStore):
+    def __init__(self, **kwargs):
+        super().__init__(db=object(), **kwargs)
+        self.batches = []
+
+    def log_many(self, events):
+        self.batches.append([e.pipeline for e in events])
+
+
+def test_buffered_event_store_batches_and_drains_on_close():
+    store = _RecordingStore(flush_size=3, flush_interval=0.05)
+
+    async def main():
+        await store.start()
+        for i in range(4):
+            await store.log_async(IngestionEvent(pipeline=f"p{i}", status="RUNNING"))
+        await asyncio.sleep(0.1)  # size trigger for p0-p2, time trigger for p3
+        await store.log_async(IngestionEvent(pipeline="p4", status="SUCCESS"))
+        await store.aclose()
+
+    asyncio.run(main())
+    assert store.batches == [["p0", "p1", "p2"], ["p3"], ["p4"]]
+
+
+def _p(name, depends_on=(), slots=1):
+    return SimpleNamespace(name=name, depends_on=list(depends_on), slots=slots)
+
+
+def test_dag_scheduler_runs_dependents_after_parents_and_skips_on_failure():
+    log = []
+    running = 0
+    peak = 0
+
+    async def run(p):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        log.append(("start", p.name))
+        await asyncio.sleep(0.01)
+        running -= 1
+        log.append(("end", p.name))
+        return "FAILED" if p.name == "b" else "SUCCESS"
+
+    pipelines = [_p("a"), _p("b"), _p("c", ["a"]), _p("d", ["b"]), _p("e", ["d"])]
+    scheduler = DagScheduler(pipelines, run, max_parallel=2)
+    statuses = asyncio.run(scheduler.run())
+
+    assert statuses == {"a": "SUCCESS", "b": "FAILED", "c": "SUCCESS", "d": "SKIPPED", "e": "SKIPPED"}
+    assert log.index(("end", "a")) < log.index(("start", "c"))
+    assert peak == 2
+    assert set(scheduler.durations) == {"a", "b", "c"}
+
+
+def test_dag_scheduler_rejects_cycles():
+    with pytest.raises(ValueError, match="cycle"):
+        DagScheduler([_p("a", ["b"]), _p("b", ["a"])], run=None).topo_order()
+
+
+def test_mermaid_draws_dependency_edges_and_durations():
+    cfg = {"pipelines": [{"name": "a"}, {"name": "b", "depends_on": ["a"]}]}
+    text = mermaid_from_config(cfg, {"a": "SUCCESS", "b": "SKIPPED"}, {"a": 1.5})
+    assert "a --> b" in text
+    assert 'a("a<br/>1.50s")' in text
+    assert "class b skipped;" in text
+
+
+class _SlowWriteProcessor:
+    """DataProcessor stand-in: instant validation, slow writes, records what is held in memory."""
+
+    def __init__(self, write_delay=0.001, fail_on_batch=None):
+        self.write_delay = write_delay
+        self.gate = None  # set to an asyncio.Event to hold the first write until released
+        self.fail_on_batch = fail_on_batch
+        self.events = []
+        self.written = []
+
+    async def process_async(self, batch):
+        self.events.append(("validate", batch[0]["id"]))
+        return [r["id"] for r in batch]
+
+    async def save_to_db_async(self, records):
+        from processing.processor import WriteStats
+
+        self.events.append(("save_start", records[0]))
+        if self.fail_on_batch is not None and len(self.written) == self.fail_on_batch:
+            raise RuntimeError("db down")
+        if self.gate is not None:
+            await self.gate.wait()
+        await asyncio.sleep(self.write_delay)
+        self.written.append(records)
+        self.events.append(("save_end", records[0]))
+        return WriteStats(inserted=len(records))
+
+
+def test_streaming_overlaps_stages_and_applies_backpressure():
+    from orchestrator.streaming import stream_to_db
+
+    pulled = 0
+
+    async def source():
+        nonlocal pulled
+        for i in range(100):
+            pulled += 1
+            yield {"id": i} if i % 10 != 3 else None  # None = failed fetch
+
+    processor = _SlowWriteProcessor()
+
+    async def main():
+        processor.gate = asyncio.Event()
+        task = asyncio.create_task(stream_to_db(source(), processor, batch_size=9, queue_depth=1))
+        for _ in range(50):  # let every stage run until it blocks on the stuck writer
+            await asyncio.sleep(0)
+        in_flight = pulled
+        processor.gate.set()
+        return in_flight, await task
+
+    in_flight, (count, stats, stream) = asyncio.run(main())
+
+    # The writer is the bottleneck: fetching pauses once 2 * queue_depth + 3 batches
+    # (of 9 valid items per 10 pulled) are held
+    assert in_flight <= (2 * 1 + 3) * 10
+    assert count == stats.inserted == 90
+    assert stream.batches == 10 and stream.fetch_blocked_s > 0
+    # Batches are written in order, and batch 2 was validated before batch 1 finished saving
+    assert [b[0] for b in processor.written] == sorted(b[0] for b in processor.written)
+    assert processor.events.index(("validate", processor.written[1][0])) < processor.events.index(
+        ("save_end", processor.written[0][0]))
+
+
+def test_streaming_failure_cancels_the_other_stages():
+    from orchestrator.streaming import stream_to_db
+
+    closed = False
+
+    async def source():
+        nonlocal closed
+        try:
+            for i in range(10_000):
+                yield {"id": i}
+                await asyncio.sleep(0)
+        finally:
+            closed = True
+
+    processor = _SlowWriteProcessor(fail_on_batch=1)
+    with pytest.raises(RuntimeError, match="db down"):
+        asyncio.run(stream_to_db(source(), processor, batch_size=10))
+    assert closed
+    assert len(processor.written) == 1
+
+
+def test_pending_chunks_skips_ranges_covered_by_done_checkpoints():
+    from orchestrator.checkpoints import id_chunks, pending_chunks
+
+    chunks = id_chunks(1, 50, 10)
+    assert chunks == [(1, 10), (11, 20), (21, 30), (31, 40), (41, 50)]
+    # (1, 20) was checkpointed with a larger chunk size
+    assert pending_chunks(chunks, [(1, 20), (31, 40)]) == [(21, 30), (41, 50)]
+
+
+class _MemoryCheckpoints:
+    def __init__(self):
+        self.rows = {}
+
+    def done_ranges(self, pipeline):
+        return [chunk for (p, chunk), (status, _) in self.rows.items() if p == pipeline and status == "DONE"]
+
+    def mark(self, pipeline, chunk, status, records=0):
+        self.rows[(pipeline, chunk)] = (status, records)
+
+    def clear(self, pipeline):
+        self.rows = {k: v for k, v in self.rows.items() if k[0] != pipeline}
+
+
+def test_checkpointed_run_resumes_with_unfinished_chunks_only():
+    from orchestrator.orchestrator import PipelineConfig, RunContext, _ingest_checkpointed
+
+    p = PipelineConfig(name="p", enabled=True, mode="async", base_url="http://x", table="t",
+                       url_pattern="/posts/{id}", id_range={"start": 1, "end": 40}, checkpoint_size=10)
+    checkpoints = _MemoryCheckpoints()
+    fetched = []
+    flaky = True  # first run: one fetch in 11-20 fails, then the DB fails during 21-30
+
+    async def ingest(chunk):
+        fetched.append(chunk)
+        if flaky and chunk == (21, 30):
+            raise RuntimeError("db down")
+        failed = 1 if flaky and chunk == (11, 20) else 0
+        return chunk[1] - chunk[0] + 1 - failed, failed, None
+
+    first = RunContext(store=None, checkpoints=checkpoints)
+    with pytest.raises(RuntimeError):
+        asyncio.run(_ingest_checkpointed(p, first, ingest))
+    assert checkpoints.rows[("p", (1, 10))] == ("DONE", 10)
+    assert checkpoints.rows[("p", (11, 20))] == ("INCOMPLETE", 9)
+    assert checkpoints.rows[("p", (21, 30))][0] == "FAILED"
+
+    fetched.clear()
+    flaky = False
+    resumed = RunContext(store=None, checkpoints=checkpoints, resume=True)
+    count, _, info = asyncio.run(_ingest_checkpointed(p, resumed, ingest))
+    assert fetched == [(11, 20), (21, 30), (31, 40)]
+    assert count == 30
+    assert info == {"chunks": 4, "skipped": 1, "incomplete": 0}
+    assert {status for status, _ in checkpoints.rows.values()} == {"DONE"}
+
+    # A fresh (non-resumed) run starts over
+    fetched.clear()
+    asyncio.run(_ingest_checkpointed(p, RunContext(store=None, checkpoints=checkpoints), ingest))
+    assert len(fetched) == 4
+
+
+def test_sync_pipelines_fetch_every_endpoint_and_flatten_payloads():
+    from orchestrator.orchestrator import PipelineConfig, _flatten, _sync_requests
+
+    p = PipelineConfig(name="p", enabled=True, mode="sync", base_url="http://x", table="t",
+                       endpoint="/posts", endpoints=["/more"], url_pattern="/posts/{id}", id_range={"start": 1, "end": 2})
+    assert _sync_requests(p) == ["http://x/posts", "http://x/more", "http://x/posts/1", "http://x/posts/2"]
+    assert _flatten([[{"id": 1}, {"id": 2}], None, {"id": 3}]) == [{"id": 1}, {"id": 2}, {"id": 3}]
+    with pytest.raises(ValueError, match="requires endpoint"):
+        _sync_requests(PipelineConfig(name="q", enabled=True, mode="sync", base_url="http://x", table="t"))
+
+
+def test_pipeline_schema_falls_back_for_unregistered_tables(caplog):
+    from orchestrator.orchestrator import parse_pipelines
+
+    base = {"enabled": True, "mode": "async", "base_url": "http://x"}
+    with caplog.at_level("WARNING"):
+        archive, comments, odd = parse_pipelines({"pipelines": [
+            dict(base, name="a", table="posts_archive", url_pattern="/posts/{id}"),
+            dict(base, name="c", table="staging", url_pattern="/comments/{id}"),
+            dict(base, name="o", table="staging", url_pattern="/{id}"),
+        ]})
+    assert [archive.schema, comments.schema, odd.schema] == ["posts", "comments", "posts"]
+    assert "'posts_archive' is not a registered schema" in caplog.text
+
+    with pytest.raises(ValueError, match="b: unknown schema 'nope'"):
+        parse_pipelines({"pipelines": [dict(base, name="b", table="t", schema="nope")]})
@@ -0,0 +1,131 @@
+import pickle
+
+from processing.processor import DataProcessor, PostBatch, PostRecord, WriteStats, _drop_known
+
+
+def _processor(**kwargs):
+    return DataProcessor(db=object(), **kwargs)
+
+
+def test_content_hash_tracks_mutable_columns_only():
+    a = PostRecord(id=1, title="t", body="b", user_id=1)
+    assert a.content_hash() == PostRecord(id=2, title="t", body="b", user_id=1).content_hash()
+    assert a.content_hash() != PostRecord(id=1, title="t", body="b2", user_id=1).content_hash()
+
+
+def test_drop_known_skips_rows_with_unchanged_hash():
+    recs = [PostRecord(id=i, title="t", body=str(i)) for i in range(1, 4)]
+    rows = [(r.id, r.title, r.body, r.user_id, r.content_hash()) for r in recs]
+    known = {1: rows[0][-1], 2: "stale"}
+    stats = WriteStats()
+
+    assert [r[0] for r in _drop_known(rows, known, stats)] == [2, 3]
+    assert stats.unchanged == 1
+
+
+def test_incremental_upsert_guards_on_content_hash():
+    sql = _processor(incremental=True)._upsert_sql("VALUES %s")
+    assert "posts.content_hash IS DISTINCT FROM EXCLUDED.content_hash" in sql
+    assert "RETURNING (xmax = 0) AS inserted" in sql
+    assert "IS DISTINCT FROM" not in _processor()._upsert_sql("VALUES %s")
+
+
+def test_parallel_validation_keeps_order_and_global_bad_indexes(caplog):
+    data = [{"id": i, "title": "t", "body": "b"} for i in range(25)]
+    data[7] = {"id": 7}
+    data[19] = {"id": "x", "title": "t", "body": "b"}
+    processor = _processor(parallel_threshold=10, workers=2, chunk_size=4)
+
+    with caplog.at_level("WARNING"):
+        records = processor.process(data)
+
+    assert [r.id for r in records] == [i for i in range(25) if i not in (7, 19)]
+    assert "index7:" in caplog.text and "index19:" in caplog.text
+
+
+def test_columnar_batch_matches_record_rows():
+    data = [{"id": i, "title": f"t{i}", "body": "é" * i, "userId": i or None} for i in range(6)]
+    data[3] = {"id": 3}
+    records = _processor(batch_size=4).process(data)
+    processor = _processor(batch_size=4, columnar=True)
+    batch = processor.process(data)
+
+    assert isinstance(batch, PostBatch) and len(batch) == len(records) == 5
+    assert batch[4] == records[4] and batch.user_id(0) is None
+    expected = [(r.id, r.title, r.body, r.user_id, r.content_hash()) for r in records]
+    assert [row for chunk in processor._row_chunks(batch) for row in chunk] == expected
+    assert [len(c) for c in processor._row_chunks(pickle.loads(pickle.dumps(batch)))] == [4, 1]
+
+
+def test_columnar_bad_row_between_good_rows_leaves_batch_aligned(caplog):
+    data = [
+        {"id": 1, "title": "a", "body": "aa", "userId": 1},
+        {"id": 2, "title": "b", "body": "bad \ud800", "userId": 2},  # lone surrogate: not UTF-8 encodable
+        {"id": 3, "title": "c", "body": "cc", "userId": 2 ** 63},  # outside BIGINT
+        {"id": 4, "title": "d", "body": "dd", "userId": 4},
+    ]
+    with caplog.at_level("WARNING"):
+        batch = _processor(columnar=True).process(data)
+
+    assert len(batch) == 2 and "index1:" in caplog.text and "index2:" in caplog.text
+    assert batch[1] == PostRecord(id=4, title="d", body="dd", user_id=4)
+    assert [row[:4] for row in batch.rows()] == [(1, "a", "aa", 1), (4, "d", "dd", 4)]
+
+
+def test_process_pool_is_spawned_per_worker_count():
+    from processing.processor import _process_pool
+
+    assert _process_pool(2) is _process_pool(2)
+    assert _process_pool(3) is not _process_pool(2) and _process_pool(3)._max_workers == 3
+    assert _process_pool(2)._mp_context.get_start_method() == "spawn"
+
+
+class _NestingDB:
+    """Fake PostgresDB: records every statement and how deeply cursors were nested."""
+
+    def __init__(self):
+        self.depth = self.max_depth = 0
+        self.statements = []
+
+    def cursor(self):
+        from contextlib import contextmanager
+
+        @contextmanager
+        def cursor():
+            self.depth += 1
+            self.max_depth = max(self.max_depth, self.depth)
+            try:
+                yield _NestingCursor(self)
+            finally:
+                self.depth -= 1
+        return cursor()
+
+
+class _NestingCursor:
+    def __init__(self, db):
+        self.db = db
+        self.copied = ""
+
+    def execute(self, sql, params=None):
+        self.db.statements.append(" ".join(sql.split()[:2]))
+
+    def copy_expert(self, sql, stream):
+        self.db.statements.append("COPY")
+        self.copied = stream.read()
+
+    def fetchall(self):
+        return [{"id": 1, "content_hash": PostRecord(id=1, title="t", body="1").content_hash()}]
+
+    def fetchone(self):
+        rows = self.copied.count("\n")
+        return {"staged": rows, "inserted": rows, "updated": 0}
+
+
+def test_incremental_copy_looks_up_hashes_before_copy_starts():
+    db = _NestingDB()
+    processor = DataProcessor(db=db, write_mode="copy", incremental=True, batch_size=2)
+    stats = processor.save_to_db([PostRecord(id=i, title="t", body=str(i)) for i in range(1, 6)])
+
+    assert db.max_depth == 1
+    assert db.statements.index("COPY") > max(i for i, s in enumerate(db.statements) if s == "SELECT id,")
+    assert (stats.inserted, stats.unchanged) == (4, 1)
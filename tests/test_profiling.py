@@ -0,0 +1,59 @@
+import asyncio
+import pstats
+import time
+
+from utils.profiling import Profiler, thread_cpu
+
+
+def _busy_sync_work():
+    return sum(i * i for i in range(50_000))
+
+
+def _blocking_loop_work():
+    time.sleep(0.05)
+
+
+def test_sync_pipeline_is_profiled_in_its_worker_thread(tmp_path):
+    profiler = Profiler(str(tmp_path))
+
+    def worker():
+        with thread_cpu():
+            return _busy_sync_work()
+
+    async def main():
+        with profiler.pipeline("sync_p", cpu_here=False):
+            await asyncio.to_thread(worker)
+
+    asyncio.run(main())
+    profiler.write_summary()
+
+    stats = pstats.Stats(str(tmp_path / "sync_p.pstats"))
+    assert any(func[2] == "_busy_sync_work" for func in stats.stats)
+    assert (tmp_path / "sync_p.alloc.txt").read_text().startswith("peak traced memory")
+    assert not (tmp_path / "sync_p.looplag.json").exists()
+    assert "_busy_sync_work" in (tmp_path / "summary.md").read_text()
+
+
+def test_async_pipeline_records_loop_lag(tmp_path):
+    profiler = Profiler(str(tmp_path))
+
+    async def main():
+        with profiler.pipeline("async_p") as prof:
+            async with prof.loop_lag(interval=0.005):
+                await asyncio.sleep(0.02)
+                _blocking_loop_work()  # stalls the loop
+                await asyncio.sleep(0.02)
+        return prof
+
+    prof = asyncio.run(main())
+    profiler.write_summary()
+
+    assert prof.lag_summary()["max_ms"] >= 40
+    assert (tmp_path / "async_p.looplag.json").exists()
+    summary = (tmp_path / "summary.md").read_text()
+    assert "## async_p" in summary and "Event-loop lag" in summary
+
+
+def test_thread_cpu_is_a_noop_without_an_active_profile():
+    with thread_cpu():
+        assert _busy_sync_work() > 0
@@ -0,0 +1,127 @@
+import asyncio
+import time
+
+import pytest
+import requests
+
+from retry_decorator.resilience import (
+    OPEN, CircuitBreaker, CircuitOpenError, RetryBudget, is_transient, retry_after_seconds,
+)
+from retry_decorator.retry import retry
+
+
+class _HTTPError(Exception):
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.headers = headers or {}
+
+
+def test_breaker_opens_per_key_and_half_opens_after_timeout():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    calls = 0
+
+    @retry(max_attempts=5, delay_seconds=0, breaker=breaker, key_func=lambda host: host)
+    def fetch(host):
+        nonlocal calls
+        calls += 1
+        if host == "down":
+            raise ConnectionError(host)
+        return host
+
+    with pytest.raises(CircuitOpenError):
+        fetch("down")
+    assert calls == 2 and breaker.state("down") == OPEN
+    assert fetch("up") == "up"  # other hosts unaffected
+
+    time.sleep(0.06)
+    with pytest.raises(CircuitOpenError):
+        fetch("down")  # one probe let through, it fails, circuit opens again
+    assert calls == 4
+
+
+def test_shared_budget_stops_retries_across_call_sites():
+    budget = RetryBudget(capacity=2, refill_per_s=0)
+    calls = 0
+
+    @retry(max_attempts=10, delay_seconds=0, budget=budget)
+    async def flaky():
+        nonlocal calls
+        calls += 1
+        raise _HTTPError(503)
+
+    async def main():
+        return await asyncio.gather(flaky(), flaky(), return_exceptions=True)
+
+    assert all(isinstance(r, _HTTPError) for r in asyncio.run(main()))
+    assert calls == 4  # 2 first attempts + 2 budgeted retries
+    assert budget.denied == 2
+
+
+def test_retry_after_is_honoured_and_client_errors_are_not_retried():
+    seen = []
+
+    @retry(max_attempts=2, delay_seconds=5, retry_if=is_transient)
+    def call(status):
+        seen.append(time.monotonic())
+        if len(seen) == 1 or status == 404:
+            raise _HTTPError(status, {"Retry-After": "0"})
+        return "ok"
+
+    assert call(429) == "ok"
+    assert seen[1] - seen[0] < 1  # waited Retry-After: 0, not delay_seconds=5
+    with pytest.raises(_HTTPError):
+        call(404)
+    assert len(seen) == 3
+
+
+def test_retry_after_is_a_floor_for_jitter(monkeypatch):
+    import retry_decorator.retry as retry_module
+
+    sleeps = []
+    monkeypatch.setattr(retry_module.time, "sleep", sleeps.append)
+    monkeypatch.setattr(retry_module.random, "uniform", lambda low, high: low)  # most negative jitter
+    headers = iter([{"Retry-After": "2"}, {}, {}])
+
+    @retry(max_attempts=3, delay_seconds=1, jitter=0.5)
+    def call():
+        raise _HTTPError(503, next(headers))
+
+    with pytest.raises(_HTTPError):
+        call()
+    assert sleeps == [2.0, 1.5]  # never earlier than Retry-After; plain backoff still jitters down
+
+
+def test_retry_after_reads_requests_responses():
+    response = requests.Response()
+    response.status_code = 503
+    response.headers["Retry-After"] = "7"
+    assert retry_after_seconds(requests.HTTPError(response=response)) == 7.0
+    assert retry_after_seconds(ValueError()) is None
+
+
+def test_probe_ending_in_unretried_exception_does_not_wedge_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    outcome = ConnectionError
+
+    @retry(max_attempts=1, delay_seconds=0, breaker=breaker, exceptions=(ConnectionError,),
+           key_func=lambda: "host")
+    async def fetch():
+        if outcome is not None:
+            raise outcome("boom")
+        return "ok"
+
+    async def main():
+        nonlocal outcome
+        with pytest.raises(ConnectionError):
+            await fetch()  # opens the circuit
+        for probe_error in (ValueError, asyncio.CancelledError):  # a decode bug, a cancelled worker
+            await asyncio.sleep(0.02)
+            outcome = probe_error
+            with pytest.raises(probe_error):
+                await fetch()  # the half-open probe ends outside `exceptions`
+        outcome = None
+        return await fetch()  # the slot was handed back: the next probe goes through
+
+    assert asyncio.run(main()) == "ok"
+    assert breaker.state("host") == "closed"
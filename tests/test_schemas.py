@@ -0,0 +1,86 @@
+import pickle
+
+import pytest
+
+from processing.processor import DataProcessor, PostRecord
+from processing.schemas import ALBUMS, COMMENTS, POSTS, Field, Schema, content_hash, get_schema, schema_for_url
+
+COMMENT = {"postId": 1, "id": 2, "name": "n", "email": "a@b.c", "body": "é"}
+
+
+def test_registry_validates_comments_and_albums_payloads(caplog):
+    comments = DataProcessor(db=object(), table_name="comments", schema="comments")
+    with caplog.at_level("WARNING"):
+        records = comments.process([COMMENT, {"id": 3, "name": "n"}])
+    assert records == [COMMENTS.record(id=2, post_id=1, name="n", email="a@b.c", body="é")]
+    assert "Missing required key: 'postId'" in caplog.text
+
+    albums = DataProcessor(db=object(), schema="albums").process([{"userId": "4", "id": 1, "title": "t"}])
+    assert albums[0].user_id == 4 and type(albums[0]).__name__ == "AlbumRecord"
+
+    assert schema_for_url("https://x/comments") is COMMENTS and schema_for_url("https://x/albums/3") is ALBUMS
+    with pytest.raises(ValueError):
+        get_schema("users")
+
+
+def test_generated_sql_and_rows_follow_the_schema():
+    processor = DataProcessor(db=object(), table_name="comments", schema=COMMENTS, incremental=True)
+    ddl = processor._table_ddl()
+    assert "post_id      BIGINT NOT NULL" in ddl and "email        TEXT NOT NULL" in ddl
+    sql = processor._upsert_sql("VALUES %s")
+    assert "INSERT INTO comments (id, post_id, name, email, body, content_hash)" in sql
+    assert "ON CONFLICT (id) DO UPDATE SET post_id = EXCLUDED.post_id" in sql
+    assert COMMENTS.values_template.count("%s") == 6
+    assert COMMENTS.unnest_params().startswith("$1::bigint[], $2::bigint[], $3::text[]")
+
+    # posts hashes are unchanged, so rows already stored stay "unchanged" in incremental runs
+    post = PostRecord(id=1, title="t", body="b", user_id=3)
+    assert post.content_hash() == content_hash("t\x1fb\x1f3")
+    assert "user_id      BIGINT NULL," in POSTS.ddl("posts")
+
+
+def test_columnar_batches_and_pickling_work_for_any_schema():
+    data = [dict(COMMENT, id=i, body="é" * i) for i in range(1, 26)]
+    data[4] = {"id": 5}
+    records = DataProcessor(db=object(), schema="comments", parallel_threshold=10, workers=2,
+                            chunk_size=4).process(data)
+    processor = DataProcessor(db=object(), schema="comments", batch_size=10, columnar=True)
+    batch = processor.process(data)
+
+    assert [r.id for r in records] == [i for i in range(1, 26) if i != 5]  # via the process pool
+    assert isinstance(batch, COMMENTS.batch) and len(batch) == 24
+    assert batch[3] == records[3] and batch.body(3) == "é" * 4
+    expected = [row for chunk in processor._row_chunks(records) for row in chunk]
+    assert [row for chunk in processor._row_chunks(batch) for row in chunk] == expected
+    assert pickle.loads(pickle.dumps(batch)).rows() == batch.rows()
+
+    todos = Schema("todos", [Field("id", "int"), Field("title"), Field("done", "int", required=False)])
+    restored = pickle.loads(pickle.dumps(todos.record.from_dict({"id": 1, "title": "t"})))
+    assert restored.done is None and type(restored).__name__ == "TodoRecord"
+    with pytest.raises(ValueError):
+        get_schema("todos")  # unpickling rebuilds the schema without registering it
+    with pytest.raises(ValueError):
+        Schema("bad", [Field("title"), Field("id", "int")])
+
+
+def test_bad_row_never_misaligns_generated_batch_columns():
+    notes = Schema("notes", [Field("id", "int"), Field("text"), Field("score", "float"),
+                             Field("tag", required=False), Field("ref", "int", required=False)])
+    batch = notes.batch()
+    batch.append_dict({"id": 1, "text": "a", "score": 1, "tag": "x"})
+    bad = [
+        {"id": 2, "text": "b", "score": 2, "tag": "\udc00"},  # fails on the last text column
+        {"id": 3, "text": "c", "score": 3, "ref": 2 ** 64},  # fails on the last int column
+        {"id": 2 ** 63, "text": "d", "score": 4},
+    ]
+    for row in bad:
+        with pytest.raises(ValueError):
+            batch.append_dict(row)
+    batch.append_dict({"id": 5, "text": "e", "score": 5, "ref": 7})
+
+    assert len(batch) == 2 and [batch.tag(1), batch.ref(1)] == [None, 7]
+    assert [row[:-1] for row in batch.rows()] == [(1, "a", 1.0, "x", None), (5, "e", 5.0, None, 7)]
+    comments = COMMENTS.batch()
+    with pytest.raises(ValueError):
+        comments.append_dict(dict(COMMENT, postId=-2 ** 63 - 1))
+    assert comments.nbytes == 0
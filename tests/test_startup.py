@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+# Loaded per pipeline mode / on first DB use, never by importing an entry point
+HEAVY = {"aiohttp", "requests", "psycopg2", "asyncpg", "yaml", "redis"}
+BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "500"))
+
+
+def _import_times(module, cwd):
+    """{top-level module: cumulative us} from `python -X importtime -c 'import module'`."""
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd, env=env, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        times[name] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", ["orchestrator.orchestrator", "app.main"])
+def test_entry_points_import_fast_without_side_effects(module, tmp_path):
+    times = _import_times(module, tmp_path)
+
+    loaded = {name.split(".")[0] for name in times}
+    assert not loaded & HEAVY, f"{module} imports {sorted(loaded & HEAVY)} eagerly"
+    assert not (tmp_path / "app.log").exists(), "importing must not create log files"
+    assert times[module] / 1000 < BUDGET_MS
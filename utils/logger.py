@@ -1,46 +1,162 @@
 # utils/logger.py
 
+import atexit
 import logging
+import os
+import queue
 import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from typing import List, Optional
 
 # -----------------------------------
 # Base logger configuration
 # -----------------------------------
-
-# Ensure log file directory exists
-log_file = Path("app.log")
-log_file.parent.mkdir(parents=True, exist_ok=True)
+# Nothing is configured at import: entry points call setup_logging(), library
+# code only calls get_logger(). Without setup, Python's last-resort handler
+# prints WARNING and above to stderr.
 
 # Create formatter (shared)
 formatter = logging.Formatter(
     "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 
-# Console handler
-console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setLevel(logging.DEBUG)
-console_handler.setFormatter(formatter)
+# Per-request success lines go here, so they can be sampled separately
+REQUEST_LOGGER = "ingestion.requests"
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+
+    The stock prepare() runs the Formatter (timestamp, traceback text) in the
+    logging thread; here only the %-args are merged, so the caller (often the
+    event loop) pays for a getMessage() and a queue put, nothing else.
+    Records stay in-process, so exc_info can travel as-is.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most `per_second` records through (token bucket, bursts up to
+    `per_second`); the next record that passes notes how many were dropped.
+    """
+
+    def __init__(self, per_second: float = 10.0) -> None:
+        super().__init__()
+        self.per_second = per_second
+        self.suppressed = 0
+        self._tokens = per_second
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.per_second, self._tokens + (now - self._updated) * self.per_second)
+            self._updated = now
+            if self._tokens < 1:
+                self.suppressed += 1
+                return False
+            self._tokens -= 1
+            suppressed, self.suppressed = self.suppressed, 0
+        if suppressed:
+            record.msg = f"{record.msg} (+{suppressed} similar suppressed)"
+        return True
+
+
+_listener: Optional[QueueListener] = None
+
+
+def configure(handlers: List[logging.Handler], queued: bool = True,
+              level: int = logging.DEBUG) -> Optional[QueueListener]:
+    """
+    Point the root logger at `handlers`.
+
+    queued=True: the root logger only gets a DeferredQueueHandler; a background
+    QueueListener thread formats records and does the stream/file I/O.
+    queued=False: handlers are attached directly (I/O in the logging thread).
+    Replaces (and drains) any listener from a previous call.
+    """
+    global _listener
+    root = logging.getLogger()
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.setLevel(level)
+
+    if not queued:
+        for h in handlers:
+            root.addHandler(h)
+        return None
+
+    q: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    root.addHandler(DeferredQueueHandler(q))
+    _listener = QueueListener(q, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def _stop_listener() -> None:
+    if _listener is not None:
+        _listener.stop()  # flushes everything still queued
+
+
+atexit.register(_stop_listener)
+
+
+def setup_logging(log_path: str = "app.log", queued: Optional[bool] = None,
+                  request_rate: Optional[float] = None) -> Optional[QueueListener]:
+    """
+    Configure logging for a process: console (DEBUG) + log file (INFO), queued
+    unless LOG_QUEUE=0, with per-request success logs limited to request_rate
+    (LOG_REQUEST_RATE, default 10) records per second. Call once from entry points.
+    """
+    if queued is None:
+        queued = os.getenv("LOG_QUEUE", "1") != "0"
+    if request_rate is None:
+        request_rate = float(os.getenv("LOG_REQUEST_RATE", "10"))
+
+    # Console handler
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setLevel(logging.DEBUG)
+    console_handler.setFormatter(formatter)
+
+    # File handler
+    log_file = Path(log_path)
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+    file_handler = logging.FileHandler(log_file, mode="a")
+    file_handler.setLevel(logging.INFO)
+    file_handler.setFormatter(formatter)
 
-# File handler
-file_handler = logging.FileHandler(log_file, mode="a")
-file_handler.setLevel(logging.INFO)
-file_handler.setFormatter(formatter)
+    request_logger = logging.getLogger(REQUEST_LOGGER)
+    for f in [f for f in request_logger.filters if isinstance(f, RateLimitFilter)]:
+        request_logger.removeFilter(f)
+    request_logger.addFilter(RateLimitFilter(per_second=request_rate))
 
-# Root logger config
-logging.basicConfig(level=logging.DEBUG, handlers=[console_handler, file_handler])
+    return configure([console_handler, file_handler], queued=queued)
 
 
 def get_logger(name: str) -> logging.Logger:
     """
-    Returns a logger with the given name,
-    already configured with console & file handlers.
+    Returns a logger with the given name; its records reach the console & file
+    handlers once the entry point has called setup_logging().
     """
     return logging.getLogger(name)
 
 
 # Example usage when running this file directly
 if __name__ == "__main__":
+    setup_logging()
     logger = get_logger("TestLogger")
     logger.debug("Debug message")
     logger.info("Info message")
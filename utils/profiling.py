@@ -0,0 +1,181 @@
+"""
+Per-pipeline profiling artifacts for `--profile` runs.
+
+For each pipeline, written under <out_dir>/:
+  <name>.pstats        cProfile dump (open with `python -m pstats` or snakeviz)
+  <name>.alloc.txt     tracemalloc top allocations + peak traced memory
+  <name>.looplag.json  event-loop lag samples (async pipelines)
+and one summary.md with the hottest functions, allocations and lag per pipeline.
+
+cProfile only sees the thread it was enabled in: the orchestrator enables it on
+the event loop for async pipelines, and sync pipelines call thread_cpu() inside
+their worker thread (the active profile travels via a ContextVar, which
+asyncio.to_thread copies). Pipelines must not overlap, so profiled runs use
+max_parallel=1.
+"""
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import io
+import json
+import pstats
+import statistics
+import time
+import tracemalloc
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_active: ContextVar[Optional["PipelineProfile"]] = ContextVar("active_profile", default=None)
+
+TOP_N = 15
+
+
+class PipelineProfile:
+    """Profiling state of one pipeline run; use Profiler.pipeline() to create it."""
+
+    def __init__(self, name: str, out_dir: Path) -> None:
+        self.name = name
+        self.out_dir = out_dir
+        self.cpu = cProfile.Profile()
+        self.lag_samples: List[float] = []
+        self.alloc_top: List[str] = []
+        self.peak_bytes = 0
+        self.seconds = 0.0
+
+    @contextmanager
+    def cpu_profile(self) -> Iterator[None]:
+        """cProfile the calling thread for the duration of the block."""
+        self.cpu.enable()
+        try:
+            yield
+        finally:
+            self.cpu.disable()
+
+    async def _sample_loop_lag(self, interval: float) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            self.lag_samples.append(max(0.0, loop.time() - start - interval))
+
+    @asynccontextmanager
+    async def loop_lag(self, interval: float = 0.01) -> AsyncIterator[None]:
+        """Sample how late an `interval` sleep wakes up on this loop while the block runs."""
+        sampler = asyncio.create_task(self._sample_loop_lag(interval))
+        try:
+            yield
+        finally:
+            sampler.cancel()
+            await asyncio.gather(sampler, return_exceptions=True)
+
+    def hot_functions(self, sort: str = "cumulative", limit: int = TOP_N) -> str:
+        out = io.StringIO()
+        stats = pstats.Stats(self.cpu, stream=out)
+        if not stats.stats:  # nothing ran under the profiler
+            return "(no samples)\n"
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def lag_summary(self) -> Dict[str, float]:
+        lags = self.lag_samples
+        if not lags:
+            return {}
+        cuts = statistics.quantiles(lags, n=100) if len(lags) > 1 else lags * 99
+        return {
+            "samples": len(lags),
+            "p50_ms": round(cuts[49] * 1000, 3),
+            "p99_ms": round(cuts[98] * 1000, 3),
+            "max_ms": round(max(lags) * 1000, 3),
+        }
+
+    def write(self) -> None:
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.cpu.dump_stats(str(self.out_dir / f"{self.name}.pstats"))
+        (self.out_dir / f"{self.name}.alloc.txt").write_text(
+            f"peak traced memory: {self.peak_bytes / 2 ** 20:.1f} MiB\n\n" + "\n".join(self.alloc_top) + "\n"
+        )
+        if self.lag_samples:
+            (self.out_dir / f"{self.name}.looplag.json").write_text(json.dumps({
+                "summary": self.lag_summary(),
+                "samples_ms": [round(lag * 1000, 3) for lag in self.lag_samples],
+            }))
+
+
+class Profiler:
+    """Collects PipelineProfiles for one run and writes <out_dir>/summary.md."""
+
+    def __init__(self, out_dir: str) -> None:
+        self.out_dir = Path(out_dir)
+        self.profiles: List[PipelineProfile] = []
+
+    @contextmanager
+    def pipeline(self, name: str, cpu_here: bool = True) -> Iterator[PipelineProfile]:
+        """
+        Profile one pipeline: tracemalloc for the whole block, cProfile on this
+        thread if cpu_here (otherwise the worker thread calls thread_cpu()).
+        """
+        profile = PipelineProfile(name, self.out_dir)
+        token = _active.set(profile)
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            if cpu_here:
+                with profile.cpu_profile():
+                    yield profile
+            else:
+                yield profile
+        finally:
+            profile.seconds = time.perf_counter() - started
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ))
+            profile.peak_bytes = tracemalloc.get_traced_memory()[1]
+            if not was_tracing:
+                tracemalloc.stop()
+            profile.alloc_top = [str(stat) for stat in snapshot.statistics("lineno")[:TOP_N]]
+            _active.reset(token)
+            profile.write()
+            self.profiles.append(profile)
+
+    def write_summary(self) -> Path:
+        lines = ["# Profile summary", ""]
+        for prof in self.profiles:
+            lines += [
+                f"## {prof.name} ({prof.seconds:.2f}s, peak traced memory {prof.peak_bytes / 2 ** 20:.1f} MiB)",
+                "",
+                f"Artifacts: `{prof.name}.pstats`, `{prof.name}.alloc.txt`"
+                + (f", `{prof.name}.looplag.json`" if prof.lag_samples else ""),
+                "",
+            ]
+            if prof.lag_samples:
+                lines += [f"Event-loop lag: {prof.lag_summary()}", ""]
+            lines += ["Hottest functions (cumulative):", "", "```", prof.hot_functions().strip(), "```", ""]
+            lines += ["Top allocations:", "", "```", *prof.alloc_top[:5], "```", ""]
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        path = self.out_dir / "summary.md"
+        path.write_text("\n".join(lines))
+        logger.info("Profile artifacts written to %s", self.out_dir)
+        return path
+
+
+@contextmanager
+def thread_cpu() -> Iterator[None]:
+    """cProfile this worker thread into the active pipeline profile (no-op when not profiling)."""
+    profile = _active.get()
+    if profile is None:
+        yield
+        return
+    with profile.cpu_profile():
+        yield
+
@@ -4,8 +4,6 @@ import functools
 
 from utils.logger import logger
 
-logging = logger.warning("This is a warning")
-
 
 def retry(max_attempts=3, delay_seconds=2, exceptions=(Exception,)):
     """